@@ -8,6 +8,8 @@ from datetime import datetime, timezone
 from .observability import org_id_ctx, request_id_ctx, trace_id_ctx, user_id_ctx
 
 
+EXTRA_FIELDS = ["db_queries", "db_time_ms", "db_repeated_queries", "path"]
+
 SENSITIVE_FIELDS = [
     "password",
     "secret",
@@ -61,4 +63,7 @@ class JsonFormatter(logging.Formatter):
             "org_id": getattr(record, "org_id", "-"),
             "user_id": getattr(record, "user_id", "-"),
         }
+        for field in EXTRA_FIELDS:
+            if hasattr(record, field):
+                payload[field] = getattr(record, field)
         return json.dumps(payload, sort_keys=True)
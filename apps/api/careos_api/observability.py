@@ -1,7 +1,12 @@
 from __future__ import annotations
 
+import bisect
+import fcntl
+import glob
 import importlib.util
+import json
 import os
+import threading
 import time
 import uuid
 from contextvars import ContextVar
@@ -17,29 +22,222 @@ org_id_ctx: ContextVar[str] = ContextVar("org_id", default="-")
 user_id_ctx: ContextVar[str] = ContextVar("user_id", default="-")
 
 
+LATENCY_BUCKETS_SECONDS = tuple(0.001 * 2**exponent for exponent in range(15))
+RETIRED_SPOOL_FILE = "metrics-retired.json"
+
+
 @dataclass
 class MetricsSnapshot:
     total_requests: int
     last_duration_ms: float
 
 
-class MetricsCollector:
+class _Histogram:
     def __init__(self) -> None:
+        self.buckets = [0] * len(LATENCY_BUCKETS_SECONDS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        index = bisect.bisect_left(LATENCY_BUCKETS_SECONDS, seconds)
+        if index < len(self.buckets):
+            self.buckets[index] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def to_dict(self) -> dict:
+        return {"buckets": list(self.buckets), "count": self.count, "sum": self.sum}
+
+
+def _status_class(status: int) -> str:
+    return f"{status // 100}xx"
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _spool_pid(path: str) -> int | None:
+    name = os.path.basename(path)[len("metrics-") : -len(".json")]
+    pid = name.split("-", 1)[0]
+    return int(pid) if pid.isdigit() else None
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _read_state(path: str) -> dict | None:
+    try:
+        with open(path, encoding="utf-8") as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_state(path: str, state: dict) -> None:
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as handle:
+        json.dump(state, handle)
+    os.replace(temp_path, path)
+
+
+def _merge_states(states: list[dict]) -> dict:
+    total_requests = 0
+    merged: dict[tuple[str, ...], _Histogram] = {}
+    for state in states:
+        total_requests += state["total_requests"]
+        for entry in state["histograms"]:
+            histogram = merged.setdefault(tuple(entry["labels"]), _Histogram())
+            histogram.buckets = [
+                left + right for left, right in zip(histogram.buckets, entry["buckets"])
+            ]
+            histogram.count += entry["count"]
+            histogram.sum += entry["sum"]
+    return {
+        "total_requests": total_requests,
+        "histograms": [
+            {"labels": list(key), **histogram.to_dict()} for key, histogram in merged.items()
+        ],
+    }
+
+
+class MetricsCollector:
+    def __init__(self, spool_dir: str = "", spool_interval_seconds: float = 1.0) -> None:
         self.total_requests = 0
         self.last_duration_ms = 0.0
+        self.spool_dir = spool_dir
+        self.spool_interval_seconds = spool_interval_seconds
+        self._histograms: dict[tuple[str, str, str], _Histogram] = {}
+        self._lock = threading.Lock()
+        self._last_spooled = 0.0
+        self._spool_owner = 0
+        self._spool_name = ""
 
-    def record(self, duration_ms: float) -> None:
-        self.total_requests += 1
-        self.last_duration_ms = duration_ms
+    def record(
+        self, duration_ms: float, route: str = "", method: str = "", status: int = 0
+    ) -> None:
+        key = (route or "unmatched", method or "-", _status_class(status))
+        with self._lock:
+            self.total_requests += 1
+            self.last_duration_ms = duration_ms
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram()
+            histogram.observe(duration_ms / 1000)
+        if self.spool_dir and time.monotonic() - self._last_spooled >= self.spool_interval_seconds:
+            self.spool()
 
     def snapshot(self) -> MetricsSnapshot:
-        return MetricsSnapshot(
-            total_requests=self.total_requests,
-            last_duration_ms=self.last_duration_ms,
-        )
+        with self._lock:
+            return MetricsSnapshot(
+                total_requests=self.total_requests,
+                last_duration_ms=self.last_duration_ms,
+            )
 
+    def reset(self) -> None:
+        with self._lock:
+            self.total_requests = 0
+            self.last_duration_ms = 0.0
+            self._histograms.clear()
 
-metrics = MetricsCollector()
+    def state(self) -> dict:
+        with self._lock:
+            return {
+                "total_requests": self.total_requests,
+                "histograms": [
+                    {"labels": list(key), **histogram.to_dict()}
+                    for key, histogram in self._histograms.items()
+                ],
+            }
+
+    def spool(self) -> None:
+        self._last_spooled = time.monotonic()
+        os.makedirs(self.spool_dir, exist_ok=True)
+        pid = os.getpid()
+        if self._spool_owner != pid:
+            self._spool_owner = pid
+            self._spool_name = f"metrics-{pid}-{uuid.uuid4().hex[:12]}.json"
+        _write_state(os.path.join(self.spool_dir, self._spool_name), self.state())
+
+    def _retire_dead_spools(self) -> None:
+        retired_path = os.path.join(self.spool_dir, RETIRED_SPOOL_FILE)
+        retired = _read_state(retired_path) or {"total_requests": 0, "histograms": []}
+        merged_files = {
+            name
+            for name in retired.get("files", [])
+            if os.path.exists(os.path.join(self.spool_dir, name))
+        }
+        dead = []
+        for path in glob.glob(os.path.join(self.spool_dir, "metrics-*.json")):
+            pid = _spool_pid(path)
+            if pid is not None and not _pid_alive(pid):
+                dead.append(path)
+        pending = [path for path in dead if os.path.basename(path) not in merged_files]
+        states = [state for state in map(_read_state, pending) if state is not None]
+        if states:
+            retired = _merge_states([retired, *states])
+            retired["files"] = sorted(merged_files | {os.path.basename(path) for path in pending})
+            _write_state(retired_path, retired)
+        for path in dead:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def aggregate(self) -> dict:
+        if not self.spool_dir:
+            return self.state()
+        self.spool()
+        with open(os.path.join(self.spool_dir, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self._retire_dead_spools()
+            paths = glob.glob(os.path.join(self.spool_dir, "metrics-*.json"))
+            states = [state for state in map(_read_state, paths) if state is not None]
+        return _merge_states(states)
+
+    def render_prometheus(self) -> str:
+        state = self.aggregate()
+        lines = [
+            "# HELP careos_http_requests_total Total HTTP requests handled.",
+            "# TYPE careos_http_requests_total counter",
+            f"careos_http_requests_total {state['total_requests']}",
+            "# HELP careos_http_request_duration_seconds HTTP request latency by route.",
+            "# TYPE careos_http_request_duration_seconds histogram",
+        ]
+        for entry in sorted(state["histograms"], key=lambda item: item["labels"]):
+            route, method, status_class = (_escape_label(label) for label in entry["labels"])
+            labels = f'route="{route}",method="{method}",status="{status_class}"'
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS_SECONDS, entry["buckets"]):
+                cumulative += count
+                lines.append(
+                    f'careos_http_request_duration_seconds_bucket{{{labels},le="{bound:g}"}} '
+                    f"{cumulative}"
+                )
+            lines.append(
+                f'careos_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} '
+                f"{entry['count']}"
+            )
+            lines.append(f"careos_http_request_duration_seconds_sum{{{labels}}} {entry['sum']}")
+            lines.append(
+                f"careos_http_request_duration_seconds_count{{{labels}}} {entry['count']}"
+            )
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsCollector(
+    spool_dir=os.environ.get("METRICS_SPOOL_DIR", ""),
+    spool_interval_seconds=float(os.environ.get("METRICS_SPOOL_INTERVAL_SECONDS", "1.0")),
+)
 
 
 class RequestContextMiddleware:
@@ -55,7 +253,13 @@ class RequestContextMiddleware:
         start = time.time()
         response = self.get_response(request)
         duration_ms = (time.time() - start) * 1000
-        metrics.record(duration_ms)
+        resolver_match = getattr(request, "resolver_match", None)
+        metrics.record(
+            duration_ms,
+            route=resolver_match.route if resolver_match else "",
+            method=request.method or "",
+            status=response.status_code,
+        )
         response["X-Request-ID"] = request_id
         return response
 
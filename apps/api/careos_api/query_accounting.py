@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+from typing import Callable
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+
+logger = logging.getLogger("careos_api.db")
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*\?\s*,?)+\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql: str) -> str:
+    template = _STRING_LITERAL.sub("?", sql)
+    template = _NUMBER_LITERAL.sub("?", template)
+    template = _IN_LIST.sub("IN (...)", template.replace("%s", "?"))
+    return _WHITESPACE.sub(" ", template).strip()
+
+
+class QueryStats:
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration_ms = 0.0
+        self.templates: Counter[str] = Counter()
+
+    def __call__(self, execute, sql, params, many, context):  # type: ignore[no-untyped-def]
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration_ms += (time.perf_counter() - start) * 1000
+            self.templates[normalize_sql(sql)] += 1
+
+    def repeated(self, threshold: int) -> dict[str, int]:
+        return {
+            template: count for template, count in self.templates.most_common() if count > threshold
+        }
+
+
+class QueryAccountingMiddleware:
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        stats = QueryStats()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            response = self.get_response(request)
+
+        if settings.DB_QUERY_HEADERS_ENABLED:
+            response["X-DB-Queries"] = str(stats.count)
+            response["X-DB-Time-ms"] = f"{stats.duration_ms:.2f}"
+        fields = {
+            "db_queries": stats.count,
+            "db_time_ms": round(stats.duration_ms, 2),
+            "path": request.path,
+        }
+        repeated = stats.repeated(settings.DB_N_PLUS_ONE_THRESHOLD)
+        if repeated:
+            logger.warning("db.n_plus_one", extra={**fields, "db_repeated_queries": repeated})
+        else:
+            logger.info("db.request", extra=fields)
+        return response
@@ -34,6 +34,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "careos_api.observability.RequestContextMiddleware",
+    "careos_api.query_accounting.QueryAccountingMiddleware",
     "core.security.SecurityHeadersMiddleware",
     "core.security.LoginRateLimitMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -43,6 +44,7 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "core.middleware.TenantMiddleware",
+    "core.middleware.AuditBatchMiddleware",
 ]
 
 ROOT_URLCONF = "careos_api.urls"
@@ -91,8 +93,72 @@ EVIDENCE_STORAGE_DIR = os.environ.get(
     "EVIDENCE_STORAGE_DIR", str(BASE_DIR / ".data" / "evidence")
 )
 EXPORT_STORAGE_DIR = os.environ.get("EXPORT_STORAGE_DIR", str(BASE_DIR / ".data" / "exports"))
+IMPORT_STORAGE_DIR = os.environ.get("IMPORT_STORAGE_DIR", str(BASE_DIR / ".data" / "imports"))
+PATIENT_IMPORT_BATCH_SIZE = int(os.environ.get("PATIENT_IMPORT_BATCH_SIZE", "1000"))
+MEDICATION_PLAN_HORIZON_HOURS = int(os.environ.get("MEDICATION_PLAN_HORIZON_HOURS", "48"))
+MEDICATION_REMINDER_BATCH_SIZE = int(os.environ.get("MEDICATION_REMINDER_BATCH_SIZE", "500"))
+MEDICATION_REMINDER_LOOKAHEAD_SECONDS = int(
+    os.environ.get("MEDICATION_REMINDER_LOOKAHEAD_SECONDS", "300")
+)
+MEDICATION_MISSED_GRACE_MINUTES = int(os.environ.get("MEDICATION_MISSED_GRACE_MINUTES", "120"))
+ADHERENCE_REBUILD_DAYS = int(os.environ.get("ADHERENCE_REBUILD_DAYS", "2"))
+CONSENT_CACHE_SECONDS = int(os.environ.get("CONSENT_CACHE_SECONDS", "300"))
+DUPLICATE_MIN_SCORE = float(os.environ.get("DUPLICATE_MIN_SCORE", "0.5"))
+DUPLICATE_SCAN_INTERVAL_SECONDS = float(os.environ.get("DUPLICATE_SCAN_INTERVAL_SECONDS", "900"))
+DUPLICATE_SCAN_OVERLAP_SECONDS = float(os.environ.get("DUPLICATE_SCAN_OVERLAP_SECONDS", "300"))
+OUTBOX_RELAY_BATCH_SIZE = int(os.environ.get("OUTBOX_RELAY_BATCH_SIZE", "200"))
+OUTBOX_RELAY_INTERVAL_SECONDS = float(os.environ.get("OUTBOX_RELAY_INTERVAL_SECONDS", "5"))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_MAX_BACKOFF_SECONDS = int(os.environ.get("OUTBOX_MAX_BACKOFF_SECONDS", "300"))
+OUTBOX_RETENTION_HOURS = int(os.environ.get("OUTBOX_RETENTION_HOURS", "24"))
+EMAIL_DELIVERY_BATCH_SIZE = int(os.environ.get("EMAIL_DELIVERY_BATCH_SIZE", "100"))
+EMAIL_DELIVERY_INTERVAL_SECONDS = float(os.environ.get("EMAIL_DELIVERY_INTERVAL_SECONDS", "30"))
+EMAIL_ORG_RATE_PER_MINUTE = int(os.environ.get("EMAIL_ORG_RATE_PER_MINUTE", "60"))
+EMAIL_MAX_ATTEMPTS = int(os.environ.get("EMAIL_MAX_ATTEMPTS", "6"))
+EMAIL_MAX_BACKOFF_SECONDS = int(os.environ.get("EMAIL_MAX_BACKOFF_SECONDS", "1800"))
+EMAIL_SENDING_LEASE_SECONDS = int(os.environ.get("EMAIL_SENDING_LEASE_SECONDS", "300"))
+PORTAL_SESSION_HOURS = int(os.environ.get("PORTAL_SESSION_HOURS", "24"))
+PATIENT_TOKEN_DAYS = int(os.environ.get("PATIENT_TOKEN_DAYS", "7"))
+SESSION_EXPIRY_COALESCE_MINUTES = int(os.environ.get("SESSION_EXPIRY_COALESCE_MINUTES", "15"))
+SESSION_CACHE_TTL_SECONDS = float(os.environ.get("SESSION_CACHE_TTL_SECONDS", "60"))
+SESSION_CACHE_MAX_ENTRIES = int(os.environ.get("SESSION_CACHE_MAX_ENTRIES", "10000"))
+SESSION_SWEEP_BATCH_SIZE = int(os.environ.get("SESSION_SWEEP_BATCH_SIZE", "1000"))
+REALTIME_BACKEND = os.environ.get("REALTIME_BACKEND", "memory")
+REALTIME_REDIS_URL = os.environ.get("REALTIME_REDIS_URL", "redis://localhost:6379/1")
+REALTIME_BUFFER_SIZE = int(os.environ.get("REALTIME_BUFFER_SIZE", "200"))
+REALTIME_STREAM_TTL_SECONDS = int(os.environ.get("REALTIME_STREAM_TTL_SECONDS", "86400"))
+REALTIME_HEARTBEAT_SECONDS = float(os.environ.get("REALTIME_HEARTBEAT_SECONDS", "15"))
+REALTIME_MAX_CONNECTION_SECONDS = float(os.environ.get("REALTIME_MAX_CONNECTION_SECONDS", "300"))
+REALTIME_MAX_CONNECTIONS_PER_USER = int(os.environ.get("REALTIME_MAX_CONNECTIONS_PER_USER", "5"))
+REALTIME_RETRY_MS = int(os.environ.get("REALTIME_RETRY_MS", "3000"))
 SLA_WARNING_MINUTES = int(os.environ.get("SLA_WARNING_MINUTES", "60"))
 SLA_DEFAULT_MINUTES = int(os.environ.get("SLA_DEFAULT_MINUTES", "120"))
+CACHE_URL = os.environ.get("CACHE_URL", "")
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache"
+        if CACHE_URL
+        else "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": CACHE_URL,
+    }
+}
+SHARED_CACHE_ENABLED = bool(CACHE_URL)
+TENANT_MEMBERSHIP_CACHE_TTL_SECONDS = int(
+    os.environ.get("TENANT_MEMBERSHIP_CACHE_TTL_SECONDS", "30")
+)
+TENANT_MEMBERSHIP_CACHE_MAX_ENTRIES = int(
+    os.environ.get("TENANT_MEMBERSHIP_CACHE_MAX_ENTRIES", "10000")
+)
+TENANT_MEMBERSHIP_GENERATION_CHECK_SECONDS = float(
+    os.environ.get("TENANT_MEMBERSHIP_GENERATION_CHECK_SECONDS", "1")
+)
+DB_QUERY_HEADERS_ENABLED = (
+    os.environ.get("DB_QUERY_HEADERS_ENABLED", "true").lower() == "true"
+)
+DB_N_PLUS_ONE_THRESHOLD = int(os.environ.get("DB_N_PLUS_ONE_THRESHOLD", "5"))
+PAGINATION_COUNT_CACHE_SECONDS = int(
+    os.environ.get("PAGINATION_COUNT_CACHE_SECONDS", "60")
+)
 AUTO_CREATE_EPISODE_WORK_ITEM = (
     os.environ.get("AUTO_CREATE_EPISODE_WORK_ITEM", "true").lower() == "true"
 )
@@ -102,10 +168,22 @@ AUTO_CREATE_APPOINTMENT_WORK_ITEM = (
 CELERY_BROKER_URL = os.environ.get("CELERY_BROKER_URL", "redis://localhost:6379/0")
 CELERY_RESULT_BACKEND = os.environ.get("CELERY_RESULT_BACKEND", "redis://localhost:6379/0")
 CELERY_BEAT_SCHEDULE = {
+    "outbox-relay": {
+        "task": "core.tasks.relay_outbox_task",
+        "schedule": OUTBOX_RELAY_INTERVAL_SECONDS,
+    },
+    "email-delivery": {
+        "task": "core.tasks.deliver_queued_emails_task",
+        "schedule": EMAIL_DELIVERY_INTERVAL_SECONDS,
+    },
     "sla-notifications": {
         "task": "core.tasks.check_sla_notifications_task",
         "schedule": 60.0,
     },
+    "counter-reconcile": {
+        "task": "core.tasks.reconcile_counters_task",
+        "schedule": 3600.0,
+    },
     "retention-purge": {
         "task": "core.tasks.purge_retention_task",
         "schedule": 86400.0,
@@ -114,6 +192,30 @@ CELERY_BEAT_SCHEDULE = {
         "task": "core.tasks.run_report_jobs_task",
         "schedule": 3600.0,
     },
+    "medication-plan": {
+        "task": "core.tasks.plan_medication_doses_task",
+        "schedule": 3600.0,
+    },
+    "medication-reminders": {
+        "task": "core.tasks.dispatch_medication_reminders_task",
+        "schedule": 60.0,
+    },
+    "medication-missed-sweep": {
+        "task": "core.tasks.sweep_missed_doses_task",
+        "schedule": 900.0,
+    },
+    "medication-adherence-rollups": {
+        "task": "core.tasks.rebuild_adherence_rollups_task",
+        "schedule": 86400.0,
+    },
+    "session-sweep": {
+        "task": "core.tasks.sweep_expired_tokens_task",
+        "schedule": 3600.0,
+    },
+    "patient-duplicates": {
+        "task": "core.tasks.scan_patient_duplicates_task",
+        "schedule": DUPLICATE_SCAN_INTERVAL_SECONDS,
+    },
 }
 STRIPE_SECRET_KEY = os.environ.get("STRIPE_SECRET_KEY", "")
 STRIPE_WEBHOOK_SECRET = os.environ.get("STRIPE_WEBHOOK_SECRET", "")
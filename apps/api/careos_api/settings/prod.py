@@ -11,3 +11,8 @@ SECURE_HSTS_INCLUDE_SUBDOMAINS = True
 SECURE_HSTS_PRELOAD = True
 
 INTEROP_SIMULATOR_ENABLED = False
+DB_QUERY_HEADERS_ENABLED = False
+
+REALTIME_BACKEND = os.environ.get("REALTIME_BACKEND", "redis")  # noqa: F405
+if REALTIME_BACKEND != "redis":
+    raise RuntimeError("REALTIME_BACKEND must be redis in production.")
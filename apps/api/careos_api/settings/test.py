@@ -3,3 +3,5 @@ from .base import *  # noqa: F403
 DEBUG = False  # noqa: F405
 CELERY_TASK_ALWAYS_EAGER = True  # noqa: F405
 CELERY_TASK_EAGER_PROPAGATES = True  # noqa: F405
+REALTIME_BACKEND = "memory"
+SHARED_CACHE_ENABLED = True
@@ -1,6 +1,39 @@
 import pytest
+from django.core.cache import cache
+
+from core.tenancy import membership_cache
+from core.realtime import get_broker
+from core.tokens import token_cache
 
 
 @pytest.fixture(scope="session")
 def django_db_use_migrations() -> bool:
     return True
+
+
+@pytest.fixture(autouse=True)
+def _reset_membership_cache():
+    membership_cache.clear()
+    yield
+    membership_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def _reset_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def _reset_token_cache():
+    token_cache.clear()
+    yield
+    token_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def _reset_realtime_broker():
+    get_broker.cache_clear()
+    yield
+    get_broker.cache_clear()
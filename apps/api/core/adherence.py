@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Iterable
+from datetime import date, datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import Count, F, Q, QuerySet, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import MedicationAdherenceDaily, MedicationDoseEvent, PatientProfile
+
+ADHERENCE_WINDOWS = (7, 30, 90)
+
+DoseKey = tuple[int, int, date, str]
+
+
+def _dose_key(event: MedicationDoseEvent) -> DoseKey:
+    return (
+        event.schedule_id,
+        event.patient_id,
+        event.scheduled_for.astimezone(dt_timezone.utc).date(),
+        event.status,
+    )
+
+
+def _apply_dose_counts(counts: Counter[DoseKey]) -> None:
+    counts = Counter(
+        {key: count for key, count in counts.items() if key[3] in {"taken", "missed"} and count}
+    )
+    if not counts:
+        return
+    organizations = dict(
+        PatientProfile.objects.filter(
+            id__in={patient_id for _, patient_id, _, _ in counts}
+        ).values_list("id", "organization_id")
+    )
+    with transaction.atomic():
+        MedicationAdherenceDaily.objects.bulk_create(
+            [
+                MedicationAdherenceDaily(
+                    organization_id=organizations[patient_id],
+                    patient_id=patient_id,
+                    schedule_id=schedule_id,
+                    day=day,
+                )
+                for schedule_id, patient_id, day in {key[:3] for key in counts}
+            ],
+            ignore_conflicts=True,
+        )
+        for (schedule_id, _patient_id, day, status), count in counts.items():
+            MedicationAdherenceDaily.objects.filter(schedule_id=schedule_id, day=day).update(
+                **{status: F(status) + count}
+            )
+
+
+def record_dose_events(events: Iterable[MedicationDoseEvent]) -> None:
+    _apply_dose_counts(Counter(_dose_key(event) for event in events))
+
+
+def change_dose_status(event: MedicationDoseEvent, status: str) -> None:
+    if event.status == status:
+        return
+    previous = _dose_key(event)
+    event.status = status
+    event.save(update_fields=["status", "updated_at"])
+    _apply_dose_counts(Counter({previous: -1, _dose_key(event): 1}))
+
+
+def rebuild_adherence_rollups(
+    since: date | None = None, changed_since: datetime | None = None
+) -> int:
+    events = MedicationDoseEvent.objects.annotate(day=TruncDate("scheduled_for"))
+    rollups = MedicationAdherenceDaily.objects.all()
+    if since is not None:
+        days = Q(day__gte=since)
+        if changed_since is not None:
+            changed = events.filter(updated_at__gte=changed_since, day__lt=since)
+            days |= Q(day__in=set(changed.values_list("day", flat=True).distinct()))
+        events = events.filter(days)
+        rollups = rollups.filter(days)
+    rows = (
+        events.values("schedule_id", "patient_id", "patient__organization_id", "day")
+        .annotate(
+            taken=Count("id", filter=Q(status="taken")),
+            missed=Count("id", filter=Q(status="missed")),
+        )
+        .order_by()
+    )
+    with transaction.atomic():
+        rollups.delete()
+        created = MedicationAdherenceDaily.objects.bulk_create(
+            [
+                MedicationAdherenceDaily(
+                    organization_id=row["patient__organization_id"],
+                    patient_id=row["patient_id"],
+                    schedule_id=row["schedule_id"],
+                    day=row["day"],
+                    taken=row["taken"],
+                    missed=row["missed"],
+                )
+                for row in rows.iterator(chunk_size=2000)
+            ],
+            batch_size=2000,
+        )
+    return len(created)
+
+
+def _window_aggregates(today: date) -> dict:
+    aggregates = {}
+    for days in ADHERENCE_WINDOWS:
+        in_window = Q(day__gte=today - timedelta(days=days - 1))
+        aggregates[f"taken_{days}"] = Sum("taken", filter=in_window, default=0)
+        aggregates[f"missed_{days}"] = Sum("missed", filter=in_window, default=0)
+    return aggregates
+
+
+def _windows_payload(row: dict) -> dict:
+    payload = {}
+    for days in ADHERENCE_WINDOWS:
+        taken = row[f"taken_{days}"]
+        missed = row[f"missed_{days}"]
+        total = taken + missed
+        payload[f"{days}d"] = {
+            "taken": taken,
+            "missed": missed,
+            "adherence": round(taken * 100 / total, 1) if total else None,
+        }
+    return payload
+
+
+def empty_windows() -> dict:
+    return _windows_payload(
+        {f"{kind}_{days}": 0 for days in ADHERENCE_WINDOWS for kind in ("taken", "missed")}
+    )
+
+
+def _window_rollups(rollups: QuerySet, today: date) -> QuerySet:
+    return rollups.filter(
+        day__gte=today - timedelta(days=max(ADHERENCE_WINDOWS) - 1), day__lte=today
+    )
+
+
+def adherence_summary(rollups: QuerySet, today: date | None = None) -> dict:
+    today = today or timezone.now().date()
+    row = _window_rollups(rollups, today).aggregate(**_window_aggregates(today))
+    return _windows_payload(row)
+
+
+def adherence_breakdown(rollups: QuerySet, key: str, today: date | None = None) -> dict:
+    today = today or timezone.now().date()
+    rows = (
+        _window_rollups(rollups, today)
+        .values(key)
+        .annotate(**_window_aggregates(today))
+        .order_by(key)
+    )
+    return {row[key]: _windows_payload(row) for row in rows}
@@ -1,6 +1,11 @@
 from __future__ import annotations
 
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from functools import wraps
+
 from .models import AuditEvent, Organization
+from .models.audit import AuditBatch, active_audit_batch
 
 
 def record_audit_event(
@@ -11,8 +16,9 @@ def record_audit_event(
     target_type: str,
     target_id: str,
     metadata: dict | None = None,
+    generic: bool = False,
 ) -> AuditEvent:
-    return AuditEvent.objects.create(
+    event = AuditEvent(
         organization=organization,
         actor_id=actor_id,
         action=action,
@@ -20,3 +26,46 @@ def record_audit_event(
         target_id=target_id,
         metadata=metadata or {},
     )
+    record_audit_events([event], generic=generic)
+    return event
+
+
+def record_audit_events(events: Iterable[AuditEvent], *, generic: bool = False) -> None:
+    batch = active_audit_batch.get()
+    if batch is None:
+        events = list(events)
+        if len(events) == 1:
+            events[0].save()
+        elif events:
+            AuditEvent.objects.bulk_create(events)
+        return
+    for event in events:
+        batch.add(event, generic=generic)
+
+
+@contextmanager
+def audit_batch() -> Iterator[AuditBatch]:
+    batch = active_audit_batch.get()
+    if batch is not None:
+        yield batch
+        return
+
+    batch = AuditBatch()
+    token = active_audit_batch.set(batch)
+    try:
+        yield batch
+    finally:
+        active_audit_batch.reset(token)
+        if not batch.connection.needs_rollback:
+            events = batch.coalesced()
+            if events:
+                AuditEvent.objects.bulk_create(events)
+
+
+def audit_batched(func: Callable) -> Callable:
+    @wraps(func)
+    def wrapper(*args, **kwargs):  # type: ignore[no-untyped-def]
+        with audit_batch():
+            return func(*args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ConsentRecord, Patient
+
+EPISODES_READ = "episodes.read"
+
+_NO_CONSENT = 0.0
+_NO_EXPIRY = float("inf")
+
+
+def _cache_key(patient_id: int, scope: str) -> str:
+    return f"consent:{patient_id}:{scope}"
+
+
+def requires_consent(patient: Patient | None) -> bool:
+    return bool(patient and patient.restricted)
+
+
+def _active_until(organization_id: int, patient_ids: Iterable[int], scope: str) -> dict[int, float]:
+    now = timezone.now()
+    until = dict.fromkeys(patient_ids, _NO_CONSENT)
+    records = ConsentRecord.objects.filter(
+        organization_id=organization_id,
+        patient_id__in=list(until),
+        scope=scope,
+        granted=True,
+        revoked_at__isnull=True,
+    ).filter(Q(expires_at__isnull=True) | Q(expires_at__gte=now))
+    for patient_id, expires_at in records.values_list("patient_id", "expires_at"):
+        expiry = _NO_EXPIRY if expires_at is None else expires_at.timestamp()
+        until[patient_id] = max(until[patient_id], expiry)
+    return until
+
+
+def patients_with_active_consent(
+    organization_id: int, patient_ids: Iterable[int], scope: str
+) -> set[int]:
+    patient_ids = set(patient_ids)
+    if not patient_ids:
+        return set()
+    if not settings.SHARED_CACHE_ENABLED or settings.CONSENT_CACHE_SECONDS <= 0:
+        until = _active_until(organization_id, patient_ids, scope)
+    else:
+        keys = {_cache_key(patient_id, scope): patient_id for patient_id in patient_ids}
+        cached = cache.get_many(list(keys))
+        until = {keys[key]: value for key, value in cached.items()}
+        missing = patient_ids - until.keys()
+        if missing:
+            loaded = _active_until(organization_id, missing, scope)
+            cache.set_many(
+                {_cache_key(patient_id, scope): value for patient_id, value in loaded.items()},
+                timeout=settings.CONSENT_CACHE_SECONDS,
+            )
+            until.update(loaded)
+    now = timezone.now().timestamp()
+    return {patient_id for patient_id, value in until.items() if value >= now}
+
+
+def has_active_consent(patient: Patient | None, scope: str) -> bool:
+    if patient is None:
+        return True
+    return patient.id in patients_with_active_consent(patient.organization_id, [patient.id], scope)
+
+
+def consent_allows(patient: Patient | None, scope: str) -> bool:
+    return not requires_consent(patient) or has_active_consent(patient, scope)
+
+
+def invalidate_consent(pairs: Iterable[tuple[int | None, str]]) -> None:
+    keys = [_cache_key(patient_id, scope) for patient_id, scope in pairs if patient_id]
+    if keys:
+        transaction.on_commit(partial(cache.delete_many, keys))
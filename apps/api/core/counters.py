@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Iterable
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .messaging import last_read_message_id
+from .models import Membership, Message, Notification, UserCounter, WorkItem
+
+COUNTER_FIELDS = ("unread_notifications", "open_work_items", "breached_slas", "unread_messages")
+WORK_FIELDS = ("open_work_items", "breached_slas")
+OPEN_WORK_STATUSES = ["open", "assigned"]
+
+Key = tuple[int, int]
+
+
+def _scope(queryset, org_field: str, user_field: str, keys: set[Key] | None, organization_id=None):
+    if organization_id is not None:
+        queryset = queryset.filter(**{org_field: organization_id})
+    if keys is None:
+        return queryset
+    condition = Q()
+    for org_id, user_id in keys:
+        condition |= Q(**{org_field: org_id, user_field: user_id})
+    return queryset.filter(condition)
+
+
+def _aggregate(
+    keys: set[Key] | None,
+    fields: Iterable[str],
+    now: datetime,
+    organization_id: int | None = None,
+) -> dict[Key, dict]:
+    fields = set(fields)
+    values: dict[Key, dict] = {}
+    if "unread_notifications" in fields:
+        rows = _scope(
+            Notification.objects.filter(unread=True),
+            "organization_id",
+            "recipient_id",
+            keys,
+            organization_id,
+        ).values_list("organization_id", "recipient_id")
+        for org_id, user_id, total in rows.annotate(total=Count("id")).order_by():
+            values.setdefault((org_id, user_id), {})["unread_notifications"] = total
+    if fields & set(WORK_FIELDS):
+        rows = _scope(
+            WorkItem.objects.filter(status__in=OPEN_WORK_STATUSES, assigned_to__isnull=False),
+            "organization_id",
+            "assigned_to_id",
+            keys,
+            organization_id,
+        ).annotate(breach_at=Coalesce("sla_breach_at", "due_at"))
+        for org_id, user_id, total, breached in (
+            rows.values_list("organization_id", "assigned_to_id")
+            .annotate(total=Count("id"), breached=Count("id", filter=Q(breach_at__lte=now)))
+            .order_by()
+        ):
+            entry = values.setdefault((org_id, user_id), {})
+            entry["open_work_items"] = total
+            entry["breached_slas"] = breached
+    if "unread_messages" in fields:
+        rows = (
+            _scope(
+                Message.objects.annotate(participant_id=F("conversation__participants")),
+                "organization_id",
+                "participant_id",
+                keys,
+                organization_id,
+            )
+            .annotate(
+                watermark=last_read_message_id(OuterRef("conversation"), OuterRef("participant_id"))
+            )
+            .filter(~Q(sender_id=F("participant_id")), id__gt=F("watermark"))
+            .values_list("organization_id", "participant_id")
+        )
+        for org_id, user_id, total in rows.annotate(total=Count("id")).order_by():
+            values.setdefault((org_id, user_id), {})["unread_messages"] = total
+    return values
+
+
+def _ensure_rows(keys: Iterable[Key]) -> None:
+    UserCounter.objects.bulk_create(
+        [UserCounter(organization_id=org_id, user_id=user_id) for org_id, user_id in sorted(keys)],
+        ignore_conflicts=True,
+    )
+
+
+def refresh_counters(keys: Iterable[Key], fields: Iterable[str] = COUNTER_FIELDS) -> None:
+    keys = {key for key in keys if key[1] is not None}
+    if not keys:
+        return
+    fields = tuple(fields)
+    with transaction.atomic():
+        _ensure_rows(keys)
+        rows = list(
+            _scope(UserCounter.objects.all(), "organization_id", "user_id", keys)
+            .order_by("organization_id", "user_id")
+            .select_for_update()
+        )
+        values = _aggregate(keys, fields, timezone.now())
+        for row in rows:
+            computed = values.get((row.organization_id, row.user_id), {})
+            for field in fields:
+                setattr(row, field, computed.get(field, 0))
+        UserCounter.objects.bulk_update(rows, list(fields))
+
+
+def refresh_work_counters(keys: Iterable[Key]) -> None:
+    refresh_counters(keys, WORK_FIELDS)
+
+
+def bump_counters(field: str, deltas: Counter[Key]) -> None:
+    deltas = Counter({key: delta for key, delta in deltas.items() if key[1] is not None and delta})
+    if not deltas:
+        return
+    with transaction.atomic():
+        _ensure_rows(deltas)
+        for (organization_id, user_id), delta in sorted(deltas.items()):
+            UserCounter.objects.filter(organization_id=organization_id, user_id=user_id).update(
+                **{field: Greatest(F(field) + delta, 0)}
+            )
+
+
+def user_counters(organization_id: int, user_id: int) -> dict:
+    counter = UserCounter.objects.filter(organization_id=organization_id, user_id=user_id).first()
+    if counter is None:
+        refresh_counters([(organization_id, user_id)])
+        counter = UserCounter.objects.get(organization_id=organization_id, user_id=user_id)
+    return {field: getattr(counter, field) for field in COUNTER_FIELDS}
+
+
+def mark_all_notifications_read(organization_id: int, user_id: int) -> int:
+    now = timezone.now()
+    with transaction.atomic():
+        _ensure_rows([(organization_id, user_id)])
+        counter = UserCounter.objects.select_for_update().get(
+            organization_id=organization_id, user_id=user_id
+        )
+        updated = Notification.objects.filter(
+            organization_id=organization_id, recipient_id=user_id, unread=True
+        ).update(unread=False, read_at=now)
+        counter.unread_notifications = Greatest(F("unread_notifications") - updated, 0)
+        counter.save(update_fields=["unread_notifications"])
+    return updated
+
+
+def reconcile_counters(organization_id: int | None = None) -> int:
+    now = timezone.now()
+    memberships = Membership.objects.filter(is_active=True)
+    if organization_id is not None:
+        memberships = memberships.filter(organization_id=organization_id)
+    keys = set(memberships.values_list("organization_id", "user_id"))
+    values = _aggregate(None, COUNTER_FIELDS, now, organization_id)
+    keys |= set(values)
+    counters = UserCounter.objects.all()
+    if organization_id is not None:
+        counters = counters.filter(organization_id=organization_id)
+    with transaction.atomic():
+        _ensure_rows(keys)
+        rows = list(counters.order_by("organization_id", "user_id").select_for_update())
+        for row in rows:
+            computed = values.get((row.organization_id, row.user_id), {})
+            for field in COUNTER_FIELDS:
+                setattr(row, field, computed.get(field, 0))
+            row.reconciled_at = now
+        UserCounter.objects.bulk_update(rows, [*COUNTER_FIELDS, "reconciled_at"], batch_size=1000)
+    return len(rows)
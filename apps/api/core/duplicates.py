@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import (
+    Organization,
+    Patient,
+    PatientBlockingKey,
+    PatientDuplicateCandidate,
+    PatientDuplicateScan,
+)
+from .search import normalize_text
+
+SCAN_CHUNK_SIZE = 500
+MAX_BLOCK_SIZE = 200
+NHS_MISMATCH_PENALTY = 0.6
+
+REASON_WEIGHTS = {
+    "nhs_number": 0.6,
+    "date_of_birth": 0.2,
+    "phone": 0.2,
+    "email": 0.2,
+    "family_name": 0.15,
+    "given_name": 0.15,
+    "family_phonetic": 0.1,
+    "postal_code": 0.1,
+    "given_initial": 0.05,
+}
+PATIENT_FIELDS = (
+    "id",
+    "given_name",
+    "family_name",
+    "date_of_birth",
+    "nhs_number",
+    "phone",
+    "email",
+    "postal_code",
+)
+SCANNED_FIELDS = frozenset(
+    [field for field in PATIENT_FIELDS if field != "id"] + ["merged_into", "merged_into_id"]
+)
+
+_SOUNDEX_CODES = {
+    **dict.fromkeys("bfpv", "1"),
+    **dict.fromkeys("cgjkqsxz", "2"),
+    **dict.fromkeys("dt", "3"),
+    "l": "4",
+    **dict.fromkeys("mn", "5"),
+    "r": "6",
+}
+
+
+def soundex(value: str | None) -> str:
+    letters = [char for char in normalize_text(value) if "a" <= char <= "z"]
+    if not letters:
+        return ""
+    code = letters[0].upper()
+    previous = _SOUNDEX_CODES.get(letters[0], "")
+    for char in letters[1:]:
+        digit = _SOUNDEX_CODES.get(char, "")
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        if char not in "hw":
+            previous = digit
+    return code.ljust(4, "0")
+
+
+def normalize_phone(value: str | None) -> str:
+    digits = "".join(char for char in value or "" if char.isdigit())
+    return digits[-10:] if len(digits) >= 10 else ""
+
+
+def normalize_postcode(value: str | None) -> str:
+    return "".join((value or "").split()).upper()
+
+
+def _name(value: str | None) -> str:
+    return " ".join(normalize_text(value).split())
+
+
+def blocking_keys(patient: dict) -> set[str]:
+    keys = set()
+    if patient["nhs_number"]:
+        keys.add(f"nhs:{patient['nhs_number']}")
+    phonetic = soundex(patient["family_name"])
+    if patient["date_of_birth"] and phonetic:
+        keys.add(f"dob:{patient['date_of_birth'].isoformat()}:{phonetic}")
+    phone = normalize_phone(patient["phone"])
+    if phone:
+        keys.add(f"phone:{phone}")
+    email = (patient["email"] or "").strip().lower()
+    if email:
+        keys.add(f"email:{email}")
+    postcode = normalize_postcode(patient["postal_code"])
+    if postcode:
+        keys.add(f"postcode:{postcode}")
+    return keys
+
+
+def score_pair(left: dict, right: dict) -> tuple[float, list[str]]:
+    reasons = []
+    penalty = 0.0
+    if left["nhs_number"] and right["nhs_number"]:
+        if left["nhs_number"] == right["nhs_number"]:
+            reasons.append("nhs_number")
+        else:
+            penalty = NHS_MISMATCH_PENALTY
+    if left["date_of_birth"] and left["date_of_birth"] == right["date_of_birth"]:
+        reasons.append("date_of_birth")
+    left_phone = normalize_phone(left["phone"])
+    if left_phone and left_phone == normalize_phone(right["phone"]):
+        reasons.append("phone")
+    left_email = (left["email"] or "").strip().lower()
+    if left_email and left_email == (right["email"] or "").strip().lower():
+        reasons.append("email")
+    left_family, right_family = _name(left["family_name"]), _name(right["family_name"])
+    if left_family and left_family == right_family:
+        reasons.append("family_name")
+    elif left_family and soundex(left_family) == soundex(right_family):
+        reasons.append("family_phonetic")
+    left_given, right_given = _name(left["given_name"]), _name(right["given_name"])
+    if left_given and left_given == right_given:
+        reasons.append("given_name")
+    elif left_given and right_given and left_given[0] == right_given[0]:
+        reasons.append("given_initial")
+    left_postcode = normalize_postcode(left["postal_code"])
+    if left_postcode and left_postcode == normalize_postcode(right["postal_code"]):
+        reasons.append("postal_code")
+    score = sum(REASON_WEIGHTS[reason] for reason in reasons) - penalty
+    return round(min(max(score, 0.0), 1.0), 3), reasons
+
+
+def _dirty_patients(
+    organization: Organization, after: tuple[datetime, int] | None, limit: int
+) -> list[dict]:
+    patients = Patient.objects.filter(organization=organization)
+    if after is not None:
+        updated_at, patient_id = after
+        patients = patients.filter(
+            Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=patient_id)
+        )
+    return list(
+        patients.order_by("updated_at", "id").values(
+            *PATIENT_FIELDS, "updated_at", "merged_into_id"
+        )[:limit]
+    )
+
+
+def _scan_chunk(organization: Organization, chunk: list[dict], min_score: float) -> None:
+    chunk_ids = [patient["id"] for patient in chunk]
+    active = {patient["id"]: patient for patient in chunk if patient["merged_into_id"] is None}
+    keys_by_patient = {patient_id: blocking_keys(patient) for patient_id, patient in active.items()}
+
+    PatientBlockingKey.objects.filter(patient_id__in=chunk_ids).delete()
+    PatientBlockingKey.objects.bulk_create(
+        [
+            PatientBlockingKey(organization=organization, patient_id=patient_id, key=key)
+            for patient_id, keys in keys_by_patient.items()
+            for key in sorted(keys)
+        ],
+        batch_size=1000,
+    )
+
+    all_keys = set().union(*keys_by_patient.values())
+    usable_keys = set(
+        PatientBlockingKey.objects.filter(organization=organization, key__in=all_keys)
+        .values("key")
+        .annotate(size=Count("id"))
+        .filter(size__lte=MAX_BLOCK_SIZE)
+        .values_list("key", flat=True)
+    )
+    members: dict[str, set[int]] = defaultdict(set)
+    for key, patient_id in PatientBlockingKey.objects.filter(
+        organization=organization, key__in=usable_keys
+    ).values_list("key", "patient_id"):
+        members[key].add(patient_id)
+    pairs = set()
+    for patient_id, keys in keys_by_patient.items():
+        for key in keys & usable_keys:
+            for other_id in members[key]:
+                if other_id != patient_id:
+                    pairs.add((min(patient_id, other_id), max(patient_id, other_id)))
+
+    others = {patient_id for pair in pairs for patient_id in pair} - active.keys()
+    patients = dict(active)
+    patients.update(
+        (patient["id"], patient)
+        for patient in Patient.objects.filter(id__in=others, merged_into=None).values(
+            *PATIENT_FIELDS
+        )
+    )
+    scored = {}
+    for left_id, right_id in pairs:
+        if left_id not in patients or right_id not in patients:
+            continue
+        score, reasons = score_pair(patients[left_id], patients[right_id])
+        if score >= min_score:
+            scored[(left_id, right_id)] = (score, reasons)
+
+    stale = [
+        candidate_id
+        for candidate_id, left_id, right_id in PatientDuplicateCandidate.objects.filter(
+            organization=organization, status="open"
+        )
+        .filter(Q(patient_id__in=chunk_ids) | Q(candidate_id__in=chunk_ids))
+        .values_list("id", "patient_id", "candidate_id")
+        if (left_id, right_id) not in scored
+    ]
+    if stale:
+        PatientDuplicateCandidate.objects.filter(id__in=stale).delete()
+    PatientDuplicateCandidate.objects.bulk_create(
+        [
+            PatientDuplicateCandidate(
+                organization=organization,
+                patient_id=left_id,
+                candidate_id=right_id,
+                score=score,
+                reasons=reasons,
+            )
+            for (left_id, right_id), (score, reasons) in sorted(scored.items())
+        ],
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=["patient", "candidate"],
+        update_fields=["score", "reasons", "updated_at"],
+    )
+
+
+def mark_patients_changed(patient_ids: Iterable[int]) -> None:
+    Patient.objects.filter(pk__in=list(patient_ids)).update(updated_at=timezone.now())
+
+
+def scan_organization(
+    organization: Organization,
+    *,
+    chunk_size: int = SCAN_CHUNK_SIZE,
+    min_score: float | None = None,
+) -> int:
+    if min_score is None:
+        min_score = settings.DUPLICATE_MIN_SCORE
+    state, _ = PatientDuplicateScan.objects.get_or_create(organization=organization)
+    watermark = cursor = None
+    if state.last_updated_at is not None:
+        watermark = (state.last_updated_at, state.last_patient_id)
+        overlap = timedelta(seconds=settings.DUPLICATE_SCAN_OVERLAP_SECONDS)
+        cursor = (state.last_updated_at - overlap, 0) if overlap else watermark
+    scanned = 0
+    while True:
+        chunk = _dirty_patients(organization, cursor, chunk_size)
+        if not chunk:
+            break
+        cursor = (chunk[-1]["updated_at"], chunk[-1]["id"])
+        if watermark is None or cursor > watermark:
+            watermark = cursor
+        with transaction.atomic():
+            _scan_chunk(organization, chunk, min_score)
+            state.last_updated_at, state.last_patient_id = watermark
+            state.scanned_at = timezone.now()
+            state.save(update_fields=["last_updated_at", "last_patient_id", "scanned_at"])
+        scanned += len(chunk)
+    return scanned
+
+
+def scan_for_duplicates() -> int:
+    return sum(
+        scan_organization(organization) for organization in Organization.objects.order_by("id")
+    )
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import EmailDelivery, Notification
+from .outbox import enqueue
+
+DELIVER_TASK = "core.tasks.deliver_queued_emails_task"
+
+
+def queue_notification_emails(notifications: Iterable[Notification]) -> int:
+    deliveries = [
+        EmailDelivery(
+            organization_id=notification.organization_id,
+            notification=notification,
+            to_email=notification.recipient.email,
+            subject=f"[CareOS] {notification.title}"[:255],
+            body=notification.body or notification.title,
+        )
+        for notification in notifications
+        if notification.recipient and notification.recipient.email
+    ]
+    if not deliveries:
+        return 0
+    EmailDelivery.objects.bulk_create(deliveries)
+    enqueue(DELIVER_TASK, dedupe_key="email:deliver")
+    return len(deliveries)
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(30 * 2 ** (attempts - 1), settings.EMAIL_MAX_BACKOFF_SECONDS))
+
+
+def _org_budgets(organization_ids: set[int], now: datetime) -> Counter[int]:
+    sent = dict(
+        EmailDelivery.objects.filter(organization_id__in=organization_ids)
+        .filter(
+            Q(status="sent", sent_at__gte=now - timedelta(minutes=1))
+            | Q(status="sending", available_at__gt=now)
+        )
+        .values_list("organization_id")
+        .annotate(total=Count("id"))
+        .order_by()
+    )
+    limit = settings.EMAIL_ORG_RATE_PER_MINUTE
+    return Counter(
+        {
+            organization_id: max(limit - sent.get(organization_id, 0), 0)
+            for organization_id in organization_ids
+        }
+    )
+
+
+def _claim_batch(now: datetime, batch_size: int) -> tuple[int, list[EmailDelivery]]:
+    with transaction.atomic():
+        batch = list(
+            EmailDelivery.objects.select_for_update(skip_locked=True)
+            .filter(status__in=["pending", "sending"], available_at__lte=now)
+            .order_by("available_at", "id")[:batch_size]
+        )
+        if not batch:
+            return 0, []
+        budgets = _org_budgets({delivery.organization_id for delivery in batch}, now)
+        ready = []
+        for delivery in batch:
+            if budgets[delivery.organization_id] > 0:
+                budgets[delivery.organization_id] -= 1
+                delivery.status = "sending"
+                delivery.available_at = now + timedelta(
+                    seconds=settings.EMAIL_SENDING_LEASE_SECONDS
+                )
+                ready.append(delivery)
+            else:
+                delivery.status = "pending"
+                delivery.available_at = now + timedelta(minutes=1)
+        EmailDelivery.objects.bulk_update(batch, ["status", "available_at"])
+    return len(batch), ready
+
+
+def _send(deliveries: list[EmailDelivery]) -> tuple[list[int], list[EmailDelivery]]:
+    sent_ids: list[int] = []
+    failed = []
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+        for delivery in deliveries:
+            message = EmailMessage(
+                subject=delivery.subject,
+                body=delivery.body,
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=[delivery.to_email],
+                connection=connection,
+            )
+            try:
+                connection.send_messages([message])
+            except Exception as exc:
+                delivery.last_error = f"{type(exc).__name__}: {exc}"[:2000]
+                failed.append(delivery)
+            else:
+                sent_ids.append(delivery.id)
+    except Exception as exc:
+        failed = [delivery for delivery in deliveries if delivery.id not in set(sent_ids)]
+        for delivery in failed:
+            delivery.last_error = f"{type(exc).__name__}: {exc}"[:2000]
+    finally:
+        connection.close()
+    return sent_ids, failed
+
+
+def _deliver_batch(now: datetime, batch_size: int) -> tuple[int, int]:
+    claimed, ready = _claim_batch(now, batch_size)
+    if not ready:
+        return claimed, 0
+    sent_ids, failed = _send(ready)
+    for delivery in failed:
+        delivery.attempts += 1
+        if delivery.attempts >= settings.EMAIL_MAX_ATTEMPTS:
+            delivery.status = "failed"
+        else:
+            delivery.status = "pending"
+            delivery.available_at = now + _retry_delay(delivery.attempts)
+    with transaction.atomic():
+        EmailDelivery.objects.filter(id__in=sent_ids).update(status="sent", sent_at=now)
+        EmailDelivery.objects.bulk_update(
+            failed, ["attempts", "last_error", "status", "available_at"]
+        )
+    return claimed, len(sent_ids)
+
+
+def deliver_queued_emails(now: datetime | None = None, batch_size: int | None = None) -> int:
+    now = now or timezone.now()
+    batch_size = batch_size or settings.EMAIL_DELIVERY_BATCH_SIZE
+    delivered = 0
+    while True:
+        claimed, sent = _deliver_batch(now, batch_size)
+        delivered += sent
+        if claimed < batch_size:
+            return delivered
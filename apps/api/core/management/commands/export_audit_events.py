@@ -1,38 +1,239 @@
 from __future__ import annotations
 
+import gzip
+import hashlib
+import io
 import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, time
+from functools import partial
 from pathlib import Path
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 
 from core.models import AuditEvent, Organization
 
+EXPORT_FIELDS = ("id", "action", "target_type", "target_id", "created_at", "metadata")
+
+
+class _HashingWriter(io.BufferedIOBase):
+    def __init__(self, handle) -> None:  # type: ignore[no-untyped-def]
+        self.handle = handle
+        self.digest = hashlib.sha256()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:  # type: ignore[no-untyped-def]
+        self.digest.update(data)
+        return self.handle.write(data)
+
+    def flush(self) -> None:
+        self.handle.flush()
+
+
+def _parse_bound(value: str | None):  # type: ignore[no-untyped-def]
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f"Invalid date or datetime: {value}")
+        parsed = datetime.combine(day, time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _count_lines(path: str, compress: bool) -> int:
+    opener = gzip.open if compress else open
+    with opener(path, "rb") as existing:
+        return sum(block.count(b"\n") for block in iter(partial(existing.read, 1 << 20), b""))
+
+
+def _row(values: dict) -> dict:
+    return {**values, "created_at": values["created_at"].isoformat()}
+
+
+def _export_in_worker(*args, **kwargs) -> dict:  # type: ignore[no-untyped-def]
+    try:
+        return export_organization(*args, **kwargs)
+    finally:
+        connections.close_all()
+
+
+def export_organization(
+    org_id: int,
+    org_slug: str,
+    output_path: str,
+    *,
+    fmt: str,
+    compress: bool,
+    chunk_size: int,
+    after_id: int = 0,
+    since: str | None = None,
+    until: str | None = None,
+) -> dict:
+    events = AuditEvent.objects.filter(organization_id=org_id, id__gt=after_id)
+    since_bound = _parse_bound(since)
+    until_bound = _parse_bound(until)
+    if since_bound:
+        events = events.filter(created_at__gte=since_bound)
+    if until_bound:
+        events = events.filter(created_at__lt=until_bound)
+    resume = bool(after_id) and Path(output_path).exists()
+    rows = _count_lines(output_path, compress) if resume else 0
+    appended = 0
+    last_id = after_id
+    with open(output_path, "ab" if resume else "wb") as raw:
+        hashing = _HashingWriter(raw)
+        if resume:
+            with open(output_path, "rb") as existing:
+                for block in iter(partial(existing.read, 1 << 20), b""):
+                    hashing.digest.update(block)
+        binary: io.BufferedIOBase = hashing
+        if compress:
+            binary = gzip.GzipFile(fileobj=hashing, mode="wb", mtime=0)
+        if fmt == "json":
+            binary.write(b"[")
+        for values in events.order_by("id").values(*EXPORT_FIELDS).iterator(chunk_size=chunk_size):
+            line = json.dumps(_row(values), sort_keys=True).encode("utf-8")
+            if fmt == "json":
+                binary.write(b",\n" if appended else b"\n")
+                binary.write(line)
+            else:
+                binary.write(line + b"\n")
+            appended += 1
+            last_id = values["id"]
+        if fmt == "json":
+            binary.write(b"\n]\n")
+        if compress:
+            binary.close()
+    return {
+        "org_slug": org_slug,
+        "file": Path(output_path).name,
+        "after_id": after_id,
+        "appended_rows": appended,
+        "rows": rows + appended,
+        "last_id": last_id,
+        "sha256": hashing.digest.hexdigest(),
+    }
+
 
 class Command(BaseCommand):
-    help = "Export audit events for an organization to JSON."
+    help = "Export audit events for one or more organizations as JSON or NDJSON."
 
     def add_arguments(self, parser):
-        parser.add_argument("--org-slug", required=True)
+        parser.add_argument("--org-slug", action="append", dest="org_slugs")
+        parser.add_argument("--all-orgs", action="store_true")
         parser.add_argument("--output", default="audit-events.json")
+        parser.add_argument("--format", choices=["json", "ndjson"], default="json")
+        parser.add_argument("--gzip", action="store_true")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument("--after-id", type=int, default=0)
+        parser.add_argument("--resume", action="store_true")
+        parser.add_argument("--since")
+        parser.add_argument("--until")
+        parser.add_argument("--workers", type=int, default=1)
 
     def handle(self, *args, **options):
-        org_slug = options["org_slug"]
-        output_path = Path(options["output"]).resolve()
-        org = Organization.objects.filter(slug=org_slug).first()
-        if not org:
+        org_slugs = options["org_slugs"] or []
+        if options["all_orgs"]:
+            orgs = list(Organization.objects.order_by("slug"))
+        else:
+            if not org_slugs:
+                raise CommandError("Pass --org-slug or --all-orgs.")
+            orgs = list(Organization.objects.filter(slug__in=org_slugs).order_by("slug"))
+        if not orgs or len(orgs) < len(set(org_slugs)):
             self.stderr.write("Organization not found.")
             return
-        events = AuditEvent.objects.filter(organization=org).order_by("created_at")
-        payload = [
-            {
-                "id": event.id,
-                "action": event.action,
-                "target_type": event.target_type,
-                "target_id": event.target_id,
-                "created_at": event.created_at.isoformat(),
-                "metadata": event.metadata,
-            }
-            for event in events
-        ]
-        output_path.write_text(json.dumps(payload, indent=2, sort_keys=True))
-        self.stdout.write(f"Exported {len(payload)} events to {output_path}")
+        _parse_bound(options["since"])
+        _parse_bound(options["until"])
+
+        output_path = Path(options["output"]).resolve()
+        suffix = ".ndjson" if options["format"] == "ndjson" else ".json"
+        if options["gzip"]:
+            suffix += ".gz"
+        if len(orgs) == 1 and not options["all_orgs"]:
+            targets = [(orgs[0], output_path)]
+            manifest_path = output_path.with_name(f"{output_path.name}.manifest.json")
+        else:
+            output_path.mkdir(parents=True, exist_ok=True)
+            targets = [(org, output_path / f"{org.slug}{suffix}") for org in orgs]
+            manifest_path = output_path / "manifest.json"
+
+        cursors = {org.slug: options["after_id"] for org, _path in targets}
+        if options["resume"]:
+            if options["after_id"]:
+                raise CommandError("Pass either --resume or --after-id, not both.")
+            cursors.update(self._manifest_cursors(manifest_path, options))
+        elif options["after_id"] and len(targets) > 1:
+            raise CommandError(
+                "--after-id applies to a single organization; use --resume to continue "
+                "a multi-organization export from its manifest."
+            )
+
+        if options["format"] == "json" and any(
+            cursors[org.slug] and path.exists() and path.stat().st_size for org, path in targets
+        ):
+            raise CommandError(
+                "Cannot append to a JSON export; resume with --format=ndjson or a new --output."
+            )
+
+        export_options = {
+            "fmt": options["format"],
+            "compress": options["gzip"],
+            "chunk_size": options["chunk_size"],
+            "since": options["since"],
+            "until": options["until"],
+        }
+        if options["workers"] > 1 and len(targets) > 1:
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=options["workers"],
+                mp_context=multiprocessing.get_context("fork"),
+            ) as executor:
+                futures = [
+                    executor.submit(
+                        _export_in_worker,
+                        org.id,
+                        org.slug,
+                        str(path),
+                        after_id=cursors[org.slug],
+                        **export_options,
+                    )
+                    for org, path in targets
+                ]
+                results = [future.result() for future in futures]
+        else:
+            results = [
+                export_organization(
+                    org.id, org.slug, str(path), after_id=cursors[org.slug], **export_options
+                )
+                for org, path in targets
+            ]
+
+        manifest = {
+            "format": options["format"],
+            "gzip": options["gzip"],
+            "since": options["since"],
+            "until": options["until"],
+            "exports": results,
+        }
+        manifest_path.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+        total = sum(result["appended_rows"] for result in results)
+        self.stdout.write(f"Exported {total} events to {output_path}")
+
+    def _manifest_cursors(self, manifest_path: Path, options: dict) -> dict[str, int]:
+        try:
+            manifest = json.loads(manifest_path.read_text())
+        except FileNotFoundError:
+            raise CommandError(f"No manifest to resume from at {manifest_path}.") from None
+        if (manifest["format"], manifest["gzip"]) != (options["format"], options["gzip"]):
+            raise CommandError("--format and --gzip must match the export being resumed.")
+        return {entry["org_slug"]: entry["last_id"] for entry in manifest["exports"]}
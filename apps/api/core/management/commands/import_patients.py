@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Organization, PatientImportJob
+from core.patient_import import CONFLICT_POLICIES, IMPORT_FORMATS, run_patient_import
+
+
+class Command(BaseCommand):
+    help = "Bulk import patients for an organization from CSV or NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--org-slug", required=True)
+        parser.add_argument("--file", required=True)
+        parser.add_argument("--format", choices=sorted(IMPORT_FORMATS))
+        parser.add_argument("--conflict", choices=sorted(CONFLICT_POLICIES), default="skip")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        org = Organization.objects.filter(slug=options["org_slug"]).first()
+        if not org:
+            raise CommandError("Organization not found.")
+        path = Path(options["file"]).resolve()
+        if not path.exists():
+            raise CommandError(f"File not found: {path}")
+        source_format = options["format"] or (
+            "ndjson" if path.suffix in {".ndjson", ".jsonl"} else "csv"
+        )
+        job = PatientImportJob.objects.create(
+            organization=org,
+            source_format=source_format,
+            conflict_policy=options["conflict"],
+            file_path=str(path),
+        )
+        with path.open("rb") as stream:
+            run_patient_import(job, stream, batch_size=options["batch_size"])
+        self.stdout.write(
+            f"Imported {job.total_rows} rows: {job.created_count} created, "
+            f"{job.updated_count} updated, {job.skipped_count} skipped, "
+            f"{job.error_count} errors ({job.rows_per_second} rows/s)"
+        )
+        for error in job.errors[:20]:
+            self.stderr.write(f"row {error['row']}: {error['error']}")
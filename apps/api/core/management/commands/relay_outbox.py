@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.outbox import prune_outbox, relay_outbox
+
+
+class Command(BaseCommand):
+    help = "Relay pending outbox messages to the Celery broker."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--loop", action="store_true")
+        parser.add_argument("--interval", type=float, default=None)
+
+    def handle(self, *args, **options):
+        interval = options["interval"] or settings.OUTBOX_RELAY_INTERVAL_SECONDS
+        while True:
+            relayed = relay_outbox(batch_size=options["batch_size"])
+            prune_outbox()
+            if relayed or not options["loop"]:
+                self.stdout.write(f"Relayed {relayed} outbox messages")
+            if not options["loop"]:
+                return
+            if not relayed:
+                time.sleep(interval)
@@ -1,8 +1,26 @@
 from __future__ import annotations
 
+import heapq
+import threading
 from dataclasses import dataclass
-from datetime import datetime, time, timedelta
-from zoneinfo import ZoneInfo
+from datetime import date, datetime, time, timedelta
+from datetime import timezone as dt_timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, Max, OuterRef, Q
+from django.utils import timezone as django_timezone
+
+from .adherence import change_dose_status
+from .models import (
+    MedicationDoseEvent,
+    MedicationDoseSlot,
+    MedicationSchedule,
+    Notification,
+    PatientProfile,
+)
 
 
 @dataclass(frozen=True)
@@ -10,23 +28,274 @@ class ReminderWindow:
     scheduled_at: datetime
 
 
+@lru_cache(maxsize=512)
+def zone(name: str) -> ZoneInfo:
+    try:
+        return ZoneInfo(name or "UTC")
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo("UTC")
+
+
+@lru_cache(maxsize=1024)
+def _parse_time(entry: str) -> time:
+    hour, minute = entry.split(":")
+    return time(int(hour), int(minute))
+
+
 def next_reminders(
     *,
     times: list[str],
     now: datetime,
     timezone: str,
 ) -> list[ReminderWindow]:
-    tz = ZoneInfo(timezone)
+    tz = zone(timezone)
     localized_now = now.astimezone(tz)
     results: list[ReminderWindow] = []
     for entry in sorted(times):
-        hour, minute = entry.split(":")
-        scheduled = datetime.combine(
-            localized_now.date(),
-            time(int(hour), int(minute)),
-            tzinfo=tz,
-        )
+        scheduled = datetime.combine(localized_now.date(), _parse_time(entry), tzinfo=tz)
         if scheduled < localized_now:
-            scheduled += timedelta(days=1)
+            scheduled = datetime.combine(
+                localized_now.date() + timedelta(days=1), _parse_time(entry), tzinfo=tz
+            )
         results.append(ReminderWindow(scheduled_at=scheduled))
     return results
+
+
+def dose_times(
+    *,
+    times: list[str],
+    timezone: str,
+    start: datetime,
+    end: datetime,
+    start_date: date | None = None,
+    end_date: date | None = None,
+) -> list[datetime]:
+    tz = zone(timezone)
+    day = start.astimezone(tz).date()
+    last_day = end.astimezone(tz).date()
+    if start_date and start_date > day:
+        day = start_date
+    if end_date and end_date < last_day:
+        last_day = end_date
+    slots = set()
+    while day <= last_day:
+        for entry in times:
+            try:
+                local_time = _parse_time(str(entry))
+            except ValueError:
+                continue
+            scheduled = datetime.combine(day, local_time, tzinfo=tz).astimezone(dt_timezone.utc)
+            if start <= scheduled < end:
+                slots.add(scheduled)
+        day += timedelta(days=1)
+    return sorted(slots)
+
+
+def plan_dose_slots(now: datetime | None = None, horizon_hours: int | None = None) -> int:
+    now = now or django_timezone.now()
+    horizon_hours = horizon_hours or settings.MEDICATION_PLAN_HORIZON_HOURS
+    end = now + timedelta(hours=horizon_hours)
+    MedicationDoseSlot.objects.filter(
+        status="pending", scheduled_for__gte=now, schedule__active=False
+    ).delete()
+    schedules = MedicationSchedule.objects.filter(active=True).filter(
+        Q(end_date__isnull=True) | Q(end_date__gte=(now - timedelta(days=1)).date())
+    )
+    batch: list[MedicationDoseSlot] = []
+    planned = 0
+    for schedule in schedules.values(
+        "id", "patient_id", "times", "timezone", "start_date", "end_date"
+    ).iterator(chunk_size=1000):
+        for scheduled_for in dose_times(
+            times=schedule["times"] or [],
+            timezone=schedule["timezone"],
+            start=now,
+            end=end,
+            start_date=schedule["start_date"],
+            end_date=schedule["end_date"],
+        ):
+            batch.append(
+                MedicationDoseSlot(
+                    patient_id=schedule["patient_id"],
+                    schedule_id=schedule["id"],
+                    scheduled_for=scheduled_for,
+                )
+            )
+        if len(batch) >= 2000:
+            planned += len(MedicationDoseSlot.objects.bulk_create(batch, ignore_conflicts=True))
+            batch = []
+    if batch:
+        planned += len(MedicationDoseSlot.objects.bulk_create(batch, ignore_conflicts=True))
+    return planned
+
+
+def replan_schedule(schedule: MedicationSchedule, now: datetime | None = None) -> None:
+    now = now or django_timezone.now()
+    MedicationDoseSlot.objects.filter(
+        schedule=schedule, status="pending", scheduled_for__gte=now
+    ).delete()
+    if not schedule.active:
+        return
+    MedicationDoseSlot.objects.bulk_create(
+        [
+            MedicationDoseSlot(
+                patient_id=schedule.patient_id,
+                schedule_id=schedule.id,
+                scheduled_for=scheduled_for,
+            )
+            for scheduled_for in dose_times(
+                times=schedule.times or [],
+                timezone=schedule.timezone,
+                start=now,
+                end=now + timedelta(hours=settings.MEDICATION_PLAN_HORIZON_HOURS),
+                start_date=schedule.start_date,
+                end_date=schedule.end_date,
+            )
+        ],
+        ignore_conflicts=True,
+    )
+
+
+class ReminderQueue:
+    def __init__(self, lookahead_seconds: float = 300.0) -> None:
+        self.lookahead = timedelta(seconds=lookahead_seconds)
+        self._heap: list[tuple[datetime, int]] = []
+        self._loaded_until: datetime | None = None
+        self._max_slot_id = 0
+        self._lock = threading.Lock()
+
+    def refill(self, now: datetime) -> None:
+        with self._lock:
+            if self._loaded_until is not None and now < self._loaded_until:
+                self._load(
+                    MedicationDoseSlot.objects.filter(
+                        id__gt=self._max_slot_id,
+                        status="pending",
+                        scheduled_for__lt=self._loaded_until,
+                    )
+                )
+                return
+            until = now + self.lookahead
+            max_slot_id = MedicationDoseSlot.objects.aggregate(max_id=Max("id"))["max_id"] or 0
+            self._heap = []
+            self._load(MedicationDoseSlot.objects.filter(status="pending", scheduled_for__lt=until))
+            self._max_slot_id = max(self._max_slot_id, max_slot_id)
+            self._loaded_until = until
+
+    def _load(self, slots) -> None:
+        for slot_id, scheduled_for in slots.order_by("id").values_list("id", "scheduled_for"):
+            heapq.heappush(self._heap, (scheduled_for, slot_id))
+            self._max_slot_id = max(self._max_slot_id, slot_id)
+
+    def pop_due(self, now: datetime, limit: int) -> list[int]:
+        due: list[int] = []
+        with self._lock:
+            while self._heap and len(due) < limit and self._heap[0][0] <= now:
+                due.append(heapq.heappop(self._heap)[1])
+        return due
+
+    def clear(self) -> None:
+        with self._lock:
+            self._heap = []
+            self._loaded_until = None
+            self._max_slot_id = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+reminder_queue = ReminderQueue(
+    lookahead_seconds=getattr(settings, "MEDICATION_REMINDER_LOOKAHEAD_SECONDS", 300)
+)
+
+
+def dispatch_due_reminders(now: datetime | None = None, batch_size: int | None = None) -> int:
+    now = now or django_timezone.now()
+    batch_size = batch_size or settings.MEDICATION_REMINDER_BATCH_SIZE
+    reminder_queue.refill(now)
+    dispatched = 0
+    while True:
+        slot_ids = reminder_queue.pop_due(now, batch_size)
+        if not slot_ids:
+            return dispatched
+        slots = list(
+            MedicationDoseSlot.objects.filter(id__in=slot_ids, status="pending")
+            .select_related("schedule", "patient")
+            .order_by("scheduled_for", "id")
+        )
+        if not slots:
+            continue
+        Notification.objects.bulk_create(
+            [
+                Notification(
+                    organization_id=slot.patient.organization_id,
+                    recipient_id=slot.patient.user_id,
+                    kind="medication",
+                    title=f"Time to take {slot.schedule.name}",
+                    body=slot.schedule.dosage or slot.schedule.instructions,
+                    url=f"/patient/medication-schedules/{slot.schedule_id}/",
+                    dedupe_key=f"medication:{slot.id}",
+                )
+                for slot in slots
+            ],
+            ignore_conflicts=True,
+        )
+        MedicationDoseSlot.objects.filter(
+            id__in=[slot.id for slot in slots], status="pending"
+        ).update(status="reminded", reminded_at=now)
+        dispatched += len(slots)
+
+
+def confirm_dose(
+    patient: PatientProfile, schedule: MedicationSchedule, status: str, scheduled_for: datetime
+) -> MedicationDoseEvent:
+    with transaction.atomic():
+        slots = MedicationDoseSlot.objects.filter(schedule=schedule, scheduled_for=scheduled_for)
+        list(slots.select_for_update().values_list("id", flat=True))
+        event, created = MedicationDoseEvent.objects.select_for_update().get_or_create(
+            schedule=schedule,
+            scheduled_for=scheduled_for,
+            defaults={"patient": patient, "status": status},
+        )
+        if not created:
+            change_dose_status(event, status)
+        slots.update(status=status)
+    return event
+
+
+def sweep_missed_doses(now: datetime | None = None) -> int:
+    now = now or django_timezone.now()
+    cutoff = now - timedelta(minutes=settings.MEDICATION_MISSED_GRACE_MINUTES)
+    overdue = MedicationDoseSlot.objects.filter(
+        status__in=["pending", "reminded"], scheduled_for__lt=cutoff
+    )
+    confirmed = MedicationDoseEvent.objects.filter(
+        schedule_id=OuterRef("schedule_id"), scheduled_for=OuterRef("scheduled_for")
+    )
+    overdue.filter(Exists(confirmed.filter(status="taken"))).update(status="taken")
+    overdue.filter(Exists(confirmed.filter(status="missed"))).update(status="missed")
+    unconfirmed = overdue.exclude(Exists(confirmed)).order_by("id")
+    swept = 0
+    while True:
+        with transaction.atomic():
+            missed = list(
+                unconfirmed.select_for_update(skip_locked=True).values_list(
+                    "id", "patient_id", "schedule_id", "scheduled_for"
+                )[: settings.MEDICATION_REMINDER_BATCH_SIZE]
+            )
+            if not missed:
+                return swept
+            MedicationDoseEvent.objects.bulk_create(
+                [
+                    MedicationDoseEvent(
+                        patient_id=patient_id,
+                        schedule_id=schedule_id,
+                        status="missed",
+                        scheduled_for=scheduled_for,
+                    )
+                    for _slot_id, patient_id, schedule_id, scheduled_for in missed
+                ]
+            )
+            swept += MedicationDoseSlot.objects.filter(
+                id__in=[slot_id for slot_id, *_rest in missed]
+            ).update(status="missed")
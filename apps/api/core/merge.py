@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+
+from django.db import models, transaction
+from django.db.models import OuterRef, Q, Subquery
+from django.utils import timezone
+
+from .models import (
+    AuditEvent,
+    Organization,
+    Patient,
+    PatientBlockingKey,
+    PatientDuplicateCandidate,
+    PatientSearchToken,
+)
+
+DERIVED_MODELS = (PatientSearchToken, PatientBlockingKey, PatientDuplicateCandidate)
+
+
+@dataclass
+class MergeResult:
+    target_id: int
+    source_ids: list[int]
+    dry_run: bool
+    counts: dict[str, int] = field(default_factory=dict)
+
+    def as_dict(self) -> dict:
+        return {
+            "id": self.target_id,
+            "merged_source_ids": self.source_ids,
+            "dry_run": self.dry_run,
+            "counts": self.counts,
+        }
+
+
+def patient_relations() -> list[tuple[type[models.Model], str]]:
+    relations = []
+    for relation in Patient._meta.related_objects:
+        if relation.related_model in DERIVED_MODELS or not relation.one_to_many:
+            continue
+        relations.append((relation.related_model, relation.field.name))
+    return sorted(relations, key=lambda item: (item[0].__name__, item[1]))
+
+
+def _label(model: type[models.Model], field_name: str) -> str:
+    if model is Patient:
+        return "Patient.merged_into"
+    return model.__name__ if field_name == "patient" else f"{model.__name__}.{field_name}"
+
+
+def merge_patients(
+    target: Patient,
+    sources: Sequence[Patient],
+    *,
+    actor=None,  # type: ignore[no-untyped-def]
+    dry_run: bool = False,
+) -> MergeResult:
+    source_ids = sorted({source.id for source in sources} - {target.id})
+    result = MergeResult(target_id=target.id, source_ids=source_ids, dry_run=dry_run)
+    relations = patient_relations()
+    if dry_run:
+        for model, field_name in relations:
+            result.counts[_label(model, field_name)] = model._default_manager.filter(
+                **{f"{field_name}__in": source_ids}
+            ).count()
+        return result
+
+    with transaction.atomic():
+        for model, field_name in relations:
+            result.counts[_label(model, field_name)] = model._default_manager.filter(
+                **{f"{field_name}__in": source_ids}
+            ).update(**{field_name: target})
+        Patient.objects.filter(id__in=source_ids).update(
+            merged_into=target, merged_at=timezone.now()
+        )
+        PatientSearchToken.objects.filter(patient_id__in=source_ids).delete()
+        PatientBlockingKey.objects.filter(patient_id__in=source_ids).delete()
+        pair = Q(patient_id__in=source_ids, candidate=target) | Q(
+            patient=target, candidate_id__in=source_ids
+        )
+        PatientDuplicateCandidate.objects.filter(pair).update(status="merged")
+        PatientDuplicateCandidate.objects.filter(
+            Q(patient_id__in=source_ids) | Q(candidate_id__in=source_ids), status="open"
+        ).delete()
+        AuditEvent.objects.create(
+            organization_id=target.organization_id,
+            actor=actor,
+            action="patient.merged",
+            target_type="Patient",
+            target_id=str(target.id),
+            metadata={
+                "source_id": source_ids[0] if len(source_ids) == 1 else None,
+                "source_ids": source_ids,
+                "counts": result.counts,
+            },
+        )
+    return result
+
+
+def resolve_patient(organization: Organization, patient_id: int) -> Patient | None:
+    return (
+        Patient.objects.filter(organization=organization, merged_into=None)
+        .filter(Q(id=patient_id) | Q(merged_from__id=patient_id))
+        .first()
+    )
+
+
+def collapse_merge_chains(patients=None) -> int:  # type: ignore[no-untyped-def]
+    patients = Patient.objects.all() if patients is None else patients
+    collapsed = 0
+    while True:
+        parent = Patient.objects.filter(id=OuterRef("merged_into_id")).values("merged_into_id")
+        updated = patients.filter(merged_into__merged_into__isnull=False).update(
+            merged_into=Subquery(parent[:1])
+        )
+        if not updated:
+            return collapsed
+        collapsed += updated
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from django.db import transaction
+from django.db.models import Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Conversation, ConversationReadState
+
+
+def last_read_message_id(conversation, user):
+    return Coalesce(
+        Subquery(
+            ConversationReadState.objects.filter(conversation=conversation, user=user).values(
+                "last_read_message_id"
+            )[:1]
+        ),
+        0,
+    )
+
+
+def mark_conversation_read(
+    conversation: Conversation, user, up_to_message_id: int
+) -> ConversationReadState:
+    with transaction.atomic():
+        ConversationReadState.objects.bulk_create(
+            [
+                ConversationReadState(
+                    organization_id=conversation.organization_id,
+                    conversation=conversation,
+                    user=user,
+                )
+            ],
+            ignore_conflicts=True,
+        )
+        state = ConversationReadState.objects.select_for_update().get(
+            conversation=conversation, user=user
+        )
+        if state.last_read_message_id < up_to_message_id:
+            state.last_read_message_id = up_to_message_id
+            state.read_at = timezone.now()
+            state.save(update_fields=["last_read_message_id", "read_at"])
+        return state
@@ -4,7 +4,9 @@ from django.http import JsonResponse
 
 from careos_api.observability import org_id_ctx, user_id_ctx
 
+from .audit import audit_batch
 from .models import Membership
+from .tenancy import resolve_membership
 
 
 class TenantMiddleware:
@@ -36,13 +38,13 @@ class TenantMiddleware:
         return self.get_response(request)
 
     def _resolve_membership(self, request) -> Membership | None:
-        org_id = request.headers.get("X-Org-ID")
-        memberships = Membership.objects.filter(
-            user=request.user, is_active=True
-        ).select_related("organization")
-        if org_id:
-            try:
-                return memberships.get(organization_id=org_id)
-            except Membership.DoesNotExist:
-                return None
-        return memberships.first()
+        return resolve_membership(request.user, request.headers.get("X-Org-ID"))
+
+
+class AuditBatchMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with audit_batch():
+            return self.get_response(request)
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Frozen copy of the tokenizer in core.search as of this migration.
+MIN_PREFIX_LENGTH = 2
+MAX_PREFIX_LENGTH = 12
+MIN_DIGIT_PREFIX_LENGTH = 3
+MAX_TERM_LENGTH = 64
+EXACT_IDENTIFIER_WEIGHT = 20
+EXACT_NAME_WEIGHT = 10
+EXACT_EMAIL_WORD_WEIGHT = 6
+NAME_PREFIX_WEIGHT = 4
+OTHER_PREFIX_WEIGHT = 2
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _words(value):
+    decomposed = unicodedata.normalize("NFKD", value or "")
+    text = "".join(char for char in decomposed if not unicodedata.combining(char)).lower()
+    return [word[:MAX_TERM_LENGTH] for word in _WORD.findall(text)]
+
+
+def _digits(value):
+    return "".join(char for char in value or "" if char.isdigit())[:MAX_TERM_LENGTH]
+
+
+def _add(terms, term, weight):
+    if term and weight > terms.get(term, 0):
+        terms[term] = weight
+
+
+def _add_prefixes(terms, word, minimum, weight):
+    for length in range(minimum, min(len(word), MAX_PREFIX_LENGTH + 1)):
+        _add(terms, word[:length], weight)
+
+
+def patient_search_terms(*, given_name, family_name, nhs_number, phone, email):
+    terms = {}
+    for word in _words(given_name) + _words(family_name):
+        _add(terms, word, EXACT_NAME_WEIGHT)
+        _add_prefixes(terms, word, MIN_PREFIX_LENGTH, NAME_PREFIX_WEIGHT)
+    for identifier in (_digits(nhs_number), _digits(phone)):
+        _add(terms, identifier, EXACT_IDENTIFIER_WEIGHT)
+        _add_prefixes(terms, identifier, MIN_DIGIT_PREFIX_LENGTH, OTHER_PREFIX_WEIGHT)
+    for word in _words(email):
+        _add(terms, word, EXACT_EMAIL_WORD_WEIGHT)
+        _add_prefixes(terms, word, MIN_PREFIX_LENGTH, OTHER_PREFIX_WEIGHT)
+    return terms
+
+
+def build_search_index(apps, schema_editor):
+    Patient = apps.get_model("core", "Patient")
+    PatientSearchToken = apps.get_model("core", "PatientSearchToken")
+    batch = []
+    for patient in Patient.objects.all().iterator(chunk_size=2000):
+        terms = patient_search_terms(
+            given_name=patient.given_name,
+            family_name=patient.family_name,
+            nhs_number=patient.nhs_number,
+            phone=patient.phone,
+            email=patient.email,
+        )
+        batch.extend(
+            PatientSearchToken(
+                organization_id=patient.organization_id,
+                patient_id=patient.id,
+                term=term,
+                weight=weight,
+            )
+            for term, weight in terms.items()
+        )
+        if len(batch) >= 5000:
+            PatientSearchToken.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        PatientSearchToken.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0031_appointments_tasks"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PatientSearchToken",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("term", models.CharField(max_length=64)),
+                ("weight", models.PositiveSmallIntegerField(default=1)),
+                (
+                    "organization",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="core.organization"
+                    ),
+                ),
+                (
+                    "patient",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="search_tokens",
+                        to="core.patient",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["organization", "term"], name="core_patient_search_term_idx"
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(build_search_index, reverse_code=migrations.RunPython.noop),
+    ]
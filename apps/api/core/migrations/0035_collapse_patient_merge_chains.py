@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def collapse_merge_chains(apps, schema_editor):
+    Patient = apps.get_model("core", "Patient")
+    while True:
+        parent = Patient.objects.filter(id=OuterRef("merged_into_id")).values("merged_into_id")
+        updated = Patient.objects.filter(merged_into__merged_into__isnull=False).update(
+            merged_into=Subquery(parent[:1])
+        )
+        if not updated:
+            return
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0034_patient_duplicates"),
+    ]
+
+    operations = [
+        migrations.RunPython(collapse_merge_chains, reverse_code=migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0035_collapse_patient_merge_chains"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MedicationDoseSlot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("scheduled_for", models.DateTimeField()),
+                ("status", models.CharField(default="pending", max_length=16)),
+                ("reminded_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "patient",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="core.patientprofile"
+                    ),
+                ),
+                (
+                    "schedule",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="dose_slots",
+                        to="core.medicationschedule",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=["schedule", "scheduled_for"], name="unique_medication_dose_slot"
+                    ),
+                ],
+                "indexes": [
+                    models.Index(fields=["status", "scheduled_for"], name="core_dose_slot_due_idx"),
+                ],
+            },
+        ),
+    ]
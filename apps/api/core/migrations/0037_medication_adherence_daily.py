@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+import django.db.models.deletion
+
+
+def build_adherence_rollups(apps, schema_editor):
+    MedicationDoseEvent = apps.get_model("core", "MedicationDoseEvent")
+    MedicationAdherenceDaily = apps.get_model("core", "MedicationAdherenceDaily")
+    rows = (
+        MedicationDoseEvent.objects.annotate(day=TruncDate("scheduled_for"))
+        .values("schedule_id", "patient_id", "patient__organization_id", "day")
+        .annotate(
+            taken=Count("id", filter=Q(status="taken")),
+            missed=Count("id", filter=Q(status="missed")),
+        )
+        .order_by()
+    )
+    MedicationAdherenceDaily.objects.bulk_create(
+        [
+            MedicationAdherenceDaily(
+                organization_id=row["patient__organization_id"],
+                patient_id=row["patient_id"],
+                schedule_id=row["schedule_id"],
+                day=row["day"],
+                taken=row["taken"],
+                missed=row["missed"],
+            )
+            for row in rows.iterator(chunk_size=2000)
+        ],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0036_medication_dose_slots"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MedicationAdherenceDaily",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("day", models.DateField()),
+                ("taken", models.PositiveIntegerField(default=0)),
+                ("missed", models.PositiveIntegerField(default=0)),
+                (
+                    "organization",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="core.organization"
+                    ),
+                ),
+                (
+                    "patient",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="core.patientprofile"
+                    ),
+                ),
+                (
+                    "schedule",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="adherence_days",
+                        to="core.medicationschedule",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=["schedule", "day"], name="unique_medication_adherence_day"
+                    ),
+                ],
+                "indexes": [
+                    models.Index(fields=["organization", "day"], name="core_adherence_org_day_idx"),
+                    models.Index(fields=["patient", "day"], name="core_adherence_patient_day_idx"),
+                ],
+            },
+        ),
+        migrations.RunPython(build_adherence_rollups, reverse_code=migrations.RunPython.noop),
+    ]
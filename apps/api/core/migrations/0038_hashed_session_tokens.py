@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def hash_existing_tokens(apps, schema_editor) -> None:
+    for model_name in ("PortalSession", "PatientToken"):
+        model = apps.get_model("core", model_name)
+        batch = []
+        for row in model.objects.only("id", "token_hash").iterator(chunk_size=1000):
+            row.token_hash = hashlib.sha256(row.token_hash.encode("utf-8")).hexdigest()
+            batch.append(row)
+            if len(batch) >= 1000:
+                model.objects.bulk_update(batch, ["token_hash"])
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, ["token_hash"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0037_medication_adherence_daily"),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name="portalsession",
+            old_name="token",
+            new_name="token_hash",
+        ),
+        migrations.RenameField(
+            model_name="patienttoken",
+            old_name="token",
+            new_name="token_hash",
+        ),
+        migrations.RunPython(hash_existing_tokens, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="portalsession",
+            index=models.Index(fields=["expires_at"], name="core_portal_session_expiry_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="patienttoken",
+            index=models.Index(fields=["expires_at"], name="core_patient_token_expiry_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="patientotp",
+            index=models.Index(fields=["expires_at"], name="core_patient_otp_expiry_idx"),
+        ),
+    ]
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0038_hashed_session_tokens"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboxMessage",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("task_name", models.CharField(max_length=255)),
+                ("args", models.JSONField(default=list)),
+                ("dedupe_key", models.CharField(blank=True, max_length=120, null=True)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("pending", "Pending"), ("sent", "Sent"), ("failed", "Failed")],
+                        default="pending",
+                        max_length=16,
+                    ),
+                ),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                ("available_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("sent_at", models.DateTimeField(blank=True, null=True)),
+                ("last_error", models.TextField(blank=True)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        condition=models.Q(("dedupe_key__isnull", False), ("status", "pending")),
+                        fields=["dedupe_key"],
+                        name="unique_pending_outbox_dedupe",
+                    ),
+                ],
+                "indexes": [
+                    models.Index(fields=["status", "available_at"], name="core_outbox_due_idx"),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from django.db import migrations, models
+import django.db.models.functions.comparison
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0040_email_delivery"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SlaSweep",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("swept_until", models.DateTimeField(blank=True, null=True)),
+                ("warning_minutes", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="workitem",
+            index=models.Index(
+                django.db.models.functions.comparison.Coalesce("sla_breach_at", "due_at"),
+                models.F("status"),
+                name="core_workitem_sla_idx",
+            ),
+        ),
+    ]
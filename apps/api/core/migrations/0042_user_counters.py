@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("core", "0041_sla_sweep"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserCounter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("unread_notifications", models.IntegerField(default=0)),
+                ("open_work_items", models.IntegerField(default=0)),
+                ("breached_slas", models.IntegerField(default=0)),
+                ("unread_messages", models.IntegerField(default=0)),
+                ("reconciled_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "organization",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="core.organization"
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="counters",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=["organization", "user"], name="unique_user_counter"
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+BATCH_SIZE = 500
+
+
+def backfill_read_states(apps, schema_editor) -> None:
+    Conversation = apps.get_model("core", "Conversation")
+    ConversationReadState = apps.get_model("core", "ConversationReadState")
+    MessageRead = apps.get_model("core", "MessageRead")
+    last_id = 0
+    while True:
+        conversation_ids = list(
+            Conversation.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", flat=True)[:BATCH_SIZE]
+        )
+        if not conversation_ids:
+            return
+        watermarks = (
+            MessageRead.objects.filter(message__conversation_id__in=conversation_ids)
+            .values("organization_id", "message__conversation_id", "reader_id")
+            .annotate(last_read_message_id=models.Max("message_id"), read_at=models.Max("read_at"))
+            .order_by()
+        )
+        ConversationReadState.objects.bulk_create(
+            [
+                ConversationReadState(
+                    organization_id=row["organization_id"],
+                    conversation_id=row["message__conversation_id"],
+                    user_id=row["reader_id"],
+                    last_read_message_id=row["last_read_message_id"],
+                    read_at=row["read_at"],
+                )
+                for row in watermarks
+            ],
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        last_id = conversation_ids[-1]
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("core", "0043_message_history_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ConversationReadState",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("last_read_message_id", models.BigIntegerField(default=0)),
+                ("read_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "conversation",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="read_states",
+                        to="core.conversation",
+                    ),
+                ),
+                (
+                    "organization",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="core.organization"
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="conversation_reads",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=["conversation", "user"], name="unique_conversation_read_state"
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_read_states, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0044_conversation_read_state"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="workitem",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Count, Max, Q
+from django.db.models.functions import TruncDate
+
+
+def dedupe_dose_events(apps, schema_editor):
+    MedicationDoseEvent = apps.get_model("core", "MedicationDoseEvent")
+    MedicationAdherenceDaily = apps.get_model("core", "MedicationAdherenceDaily")
+    duplicates = (
+        MedicationDoseEvent.objects.values("schedule_id", "scheduled_for")
+        .annotate(rows=Count("id"), keep_id=Max("id"))
+        .filter(rows__gt=1)
+        .order_by()
+    )
+    affected = set()
+    for row in duplicates.iterator(chunk_size=2000):
+        MedicationDoseEvent.objects.filter(
+            schedule_id=row["schedule_id"], scheduled_for=row["scheduled_for"]
+        ).exclude(id=row["keep_id"]).delete()
+        affected.add(row["schedule_id"])
+    if not affected:
+        return
+    days = (
+        MedicationDoseEvent.objects.filter(schedule_id__in=affected)
+        .annotate(day=TruncDate("scheduled_for"))
+        .values("schedule_id", "day")
+        .annotate(
+            taken=Count("id", filter=Q(status="taken")),
+            missed=Count("id", filter=Q(status="missed")),
+        )
+        .order_by()
+    )
+    for row in days.iterator(chunk_size=2000):
+        MedicationAdherenceDaily.objects.filter(
+            schedule_id=row["schedule_id"], day=row["day"]
+        ).update(taken=row["taken"], missed=row["missed"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0045_workitem_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="medicationdoseevent",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(dedupe_dose_events, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="medicationdoseevent",
+            constraint=models.UniqueConstraint(
+                fields=["schedule", "scheduled_for"], name="unique_medication_dose_event"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="medicationdoseevent",
+            index=models.Index(fields=["updated_at"], name="core_dose_event_updated_idx"),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0047_email_delivery_sending"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="workitem",
+            index=models.Index(fields=["updated_at"], name="core_workitem_updated_idx"),
+        ),
+    ]
@@ -12,16 +12,24 @@ from .orgs import (
 from .audit import AuditEvent
 from .portal import PortalInvite, PortalSession, PortalNotification
 from .privacy import ConsentRecord, DsarExport
-from .messaging import Conversation, Message, MessageRead
-from .notifications import Notification
+from .messaging import Conversation, ConversationReadState, Message, MessageRead
+from .notifications import EmailDelivery, Notification, UserCounter
+from .outbox import OutboxMessage
 from .exports import ExportJob
 from .patients import (
     Patient,
+    PatientSearchToken,
+    PatientBlockingKey,
+    PatientDuplicateCandidate,
+    PatientDuplicateScan,
+    PatientImportJob,
     PatientProfile,
     PatientOTP,
     PatientToken,
     MedicationSchedule,
     MedicationDoseEvent,
+    MedicationDoseSlot,
+    MedicationAdherenceDaily,
     CaregiverInvite,
     Feedback,
     PatientIdentifier,
@@ -30,7 +38,7 @@ from .patients import (
     CareCircleMember,
 )
 from .episodes import Episode, EpisodeEvent
-from .inbox import WorkItem
+from .inbox import SlaSweep, WorkItem
 from .scheduling import Appointment, Task
 from .forms import FormTemplate, FormResponse, Signature
 from .evidence import EvidencePack, EvidenceItem, EvidenceEvent, EpisodeEvidence
@@ -55,16 +63,27 @@ __all__ = [
     "ConsentRecord",
     "DsarExport",
     "Conversation",
+    "ConversationReadState",
     "Message",
     "MessageRead",
     "Notification",
+    "EmailDelivery",
+    "UserCounter",
+    "OutboxMessage",
     "ExportJob",
     "Patient",
+    "PatientSearchToken",
+    "PatientBlockingKey",
+    "PatientDuplicateCandidate",
+    "PatientDuplicateScan",
+    "PatientImportJob",
     "PatientProfile",
     "PatientOTP",
     "PatientToken",
     "MedicationSchedule",
     "MedicationDoseEvent",
+    "MedicationDoseSlot",
+    "MedicationAdherenceDaily",
     "CaregiverInvite",
     "Feedback",
     "PatientIdentifier",
@@ -74,6 +93,7 @@ __all__ = [
     "Episode",
     "EpisodeEvent",
     "WorkItem",
+    "SlaSweep",
     "Appointment",
     "Task",
     "FormTemplate",
@@ -1,12 +1,86 @@
 from __future__ import annotations
 
+from contextvars import ContextVar
+
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 
 from careos_api.observability import request_id_ctx
 
 from .base import TimestampedModel
 
+_ACTION_CLASSES = ("created", "deleted")
+
+
+def _coalesce_key(event: AuditEvent) -> tuple[str, str, str]:
+    verb = event.action.rsplit(".", 1)[-1]
+    action_class = verb if verb in _ACTION_CLASSES else "updated"
+    return (event.target_type, event.target_id, action_class)
+
+
+class _Committed:
+    fired = False
+
+    def __call__(self) -> None:
+        self.fired = True
+
+
+class AuditBatch:
+    def __init__(self) -> None:
+        self.connection = transaction.get_connection()
+        self.depth = len(self.connection.atomic_blocks)
+        self.entries: list[tuple[AuditEvent, bool, _Committed | None]] = []
+
+    def add(self, event: AuditEvent, generic: bool = False) -> None:
+        event.stamp_request_id()
+        marker = None
+        if len(self.connection.atomic_blocks) > self.depth:
+            marker = _Committed()
+            transaction.on_commit(marker)
+        self.entries.append((event, generic, marker))
+
+    def _live(self, marker: _Committed | None) -> bool:
+        return (
+            marker is None
+            or marker.fired
+            or any(func is marker for _sids, func, _robust in self.connection.run_on_commit)
+        )
+
+    def coalesced(self) -> list[AuditEvent]:
+        entries = [
+            (event, generic) for event, generic, marker in self.entries if self._live(marker)
+        ]
+        explicit = {_coalesce_key(event) for event, generic in entries if not generic}
+        seen: set[tuple[str, str, str]] = set()
+        events = []
+        for event, generic in entries:
+            if generic:
+                key = _coalesce_key(event)
+                if key in explicit or key in seen:
+                    continue
+                seen.add(key)
+            events.append(event)
+        return events
+
+
+active_audit_batch: ContextVar[AuditBatch | None] = ContextVar("active_audit_batch", default=None)
+
+
+class AuditEventManager(models.Manager):
+    def create(self, **kwargs):  # type: ignore[no-untyped-def]
+        batch = active_audit_batch.get()
+        if batch is None:
+            return super().create(**kwargs)
+        event = self.model(**kwargs)
+        batch.add(event)
+        return event
+
+    def bulk_create(self, objs, *args, **kwargs):  # type: ignore[no-untyped-def]
+        objs = list(objs)
+        for event in objs:
+            event.stamp_request_id()
+        return super().bulk_create(objs, *args, **kwargs)
+
 
 class AuditEvent(TimestampedModel):
     organization = models.ForeignKey("Organization", on_delete=models.CASCADE)
@@ -19,6 +93,8 @@ class AuditEvent(TimestampedModel):
     metadata = models.JSONField(default=dict, blank=True)
     request_id = models.CharField(max_length=64, blank=True, default="")
 
+    objects = AuditEventManager()
+
     class Meta:
         ordering = ("-created_at",)
         indexes = [
@@ -28,7 +104,10 @@ class AuditEvent(TimestampedModel):
     def __str__(self) -> str:
         return f"{self.action}:{self.target_type}:{self.target_id}"
 
-    def save(self, *args, **kwargs) -> None:  # type: ignore[override]
+    def stamp_request_id(self) -> None:
         if not self.request_id:
             self.request_id = request_id_ctx.get("-")
+
+    def save(self, *args, **kwargs) -> None:  # type: ignore[override]
+        self.stamp_request_id()
         super().save(*args, **kwargs)
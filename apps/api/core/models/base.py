@@ -1,10 +1,79 @@
 from __future__ import annotations
 
+from contextvars import ContextVar
+
 from django.db import models
+from django.dispatch import Signal
+from django.dispatch.dispatcher import _make_id
+
+
+class QuerySetUpdateSignal(Signal):
+    def __init__(self) -> None:
+        super().__init__()
+        self.watched_fields: dict[tuple, frozenset[str]] = {}
+
+    def connect(self, receiver, sender=None, weak=True, dispatch_uid=None, fields=None):  # type: ignore[no-untyped-def]
+        super().connect(receiver, sender=sender, weak=weak, dispatch_uid=dispatch_uid)
+        if fields is not None:
+            lookup_key = (dispatch_uid or _make_id(receiver), _make_id(sender))
+            self.watched_fields[lookup_key] = frozenset(fields)
+
+    def wants(self, sender, fields) -> bool:  # type: ignore[no-untyped-def]
+        fields = set(fields)
+        sender_keys = (_make_id(None), _make_id(sender))
+        with self.lock:
+            lookup_keys = [lookup_key for lookup_key, *_ in self.receivers]
+        return any(
+            lookup_key[1] in sender_keys
+            and (lookup_key not in self.watched_fields or self.watched_fields[lookup_key] & fields)
+            for lookup_key in lookup_keys
+        )
+
+
+post_bulk_create = Signal()
+post_queryset_update = QuerySetUpdateSignal()
+
+_in_bulk_update: ContextVar[bool] = ContextVar("in_bulk_update", default=False)
+
+
+class TimestampedQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):  # type: ignore[no-untyped-def]
+        created = super().bulk_create(objs, *args, **kwargs)
+        post_bulk_create.send(sender=self.model, instances=created, using=self.db)
+        return created
+
+    def bulk_update(self, objs, fields, *args, **kwargs):  # type: ignore[no-untyped-def]
+        objs = list(objs)
+        token = _in_bulk_update.set(True)
+        try:
+            updated = super().bulk_update(objs, fields, *args, **kwargs)
+        finally:
+            _in_bulk_update.reset(token)
+        if objs and post_queryset_update.wants(self.model, fields):
+            post_queryset_update.send(
+                sender=self.model,
+                pks=[obj.pk for obj in objs],
+                fields=sorted(fields),
+                using=self.db,
+            )
+        return updated
+
+    def update(self, **kwargs):  # type: ignore[no-untyped-def]
+        if _in_bulk_update.get() or not post_queryset_update.wants(self.model, kwargs):
+            return super().update(**kwargs)
+        pks = list(self.values_list("pk", flat=True))
+        updated = super().update(**kwargs)
+        if pks:
+            post_queryset_update.send(
+                sender=self.model, pks=pks, fields=sorted(kwargs), using=self.db
+            )
+        return updated
 
 
 class TimestampedModel(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = TimestampedQuerySet.as_manager()
+
     class Meta:
         abstract = True
@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from django.conf import settings
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Coalesce
 
 from ..state import WORK_ITEM_STATUSES
 from .base import TimestampedModel
@@ -34,11 +36,24 @@ class WorkItem(TimestampedModel):
         related_name="created_work_items",
     )
     completed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         indexes = [
             models.Index(fields=["organization", "status", "due_at"]),
+            models.Index(
+                Coalesce("sla_breach_at", "due_at"), F("status"), name="core_workitem_sla_idx"
+            ),
+            models.Index(fields=["updated_at"], name="core_workitem_updated_idx"),
         ]
 
     def __str__(self) -> str:
         return f"{self.episode_id}:{self.kind}:{self.status}"
+
+
+class SlaSweep(TimestampedModel):
+    swept_until = models.DateTimeField(null=True, blank=True)
+    warning_minutes = models.PositiveIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f"{self.swept_until}:{self.warning_minutes}"
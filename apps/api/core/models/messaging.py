@@ -29,6 +29,11 @@ class Message(TimestampedModel):
 
     class Meta:
         ordering = ("created_at", "id")
+        indexes = [
+            models.Index(
+                fields=["conversation", "created_at", "id"], name="core_message_history_idx"
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.conversation_id}:{self.id}"
@@ -47,3 +52,25 @@ class MessageRead(TimestampedModel):
 
     def __str__(self) -> str:
         return f"{self.message_id}:{self.reader_id}"
+
+
+class ConversationReadState(TimestampedModel):
+    organization = models.ForeignKey("Organization", on_delete=models.CASCADE)
+    conversation = models.ForeignKey(
+        Conversation, on_delete=models.CASCADE, related_name="read_states"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="conversation_reads"
+    )
+    last_read_message_id = models.BigIntegerField(default=0)
+    read_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["conversation", "user"], name="unique_conversation_read_state"
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.conversation_id}:{self.user_id}:{self.last_read_message_id}"
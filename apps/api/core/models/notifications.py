@@ -3,6 +3,7 @@ from __future__ import annotations
 from django.conf import settings
 from django.db import models
 from django.db.models import Q
+from django.utils import timezone
 
 from .base import TimestampedModel
 
@@ -34,3 +35,53 @@ class Notification(TimestampedModel):
 
     def __str__(self) -> str:
         return f"{self.organization_id}:{self.recipient_id}:{self.title}"
+
+
+EMAIL_DELIVERY_STATUSES = [
+    ("pending", "Pending"),
+    ("sending", "Sending"),
+    ("sent", "Sent"),
+    ("failed", "Failed"),
+]
+
+
+class EmailDelivery(TimestampedModel):
+    organization = models.ForeignKey("Organization", on_delete=models.CASCADE)
+    notification = models.ForeignKey(Notification, on_delete=models.SET_NULL, null=True, blank=True)
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+    status = models.CharField(max_length=16, choices=EMAIL_DELIVERY_STATUSES, default="pending")
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "available_at"], name="core_email_due_idx"),
+            models.Index(fields=["organization", "sent_at"], name="core_email_org_sent_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.organization_id}:{self.to_email}:{self.status}"
+
+
+class UserCounter(TimestampedModel):
+    organization = models.ForeignKey("Organization", on_delete=models.CASCADE)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="counters"
+    )
+    unread_notifications = models.IntegerField(default=0)
+    open_work_items = models.IntegerField(default=0)
+    breached_slas = models.IntegerField(default=0)
+    unread_messages = models.IntegerField(default=0)
+    reconciled_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["organization", "user"], name="unique_user_counter")
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.organization_id}:{self.user_id}"
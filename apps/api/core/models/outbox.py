@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+from .base import TimestampedModel
+
+OUTBOX_STATUSES = [
+    ("pending", "Pending"),
+    ("sent", "Sent"),
+    ("failed", "Failed"),
+]
+
+
+class OutboxMessage(TimestampedModel):
+    task_name = models.CharField(max_length=255)
+    args = models.JSONField(default=list)
+    dedupe_key = models.CharField(max_length=120, null=True, blank=True)
+    status = models.CharField(max_length=16, choices=OUTBOX_STATUSES, default="pending")
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dedupe_key"],
+                name="unique_pending_outbox_dedupe",
+                condition=Q(dedupe_key__isnull=False, status="pending"),
+            )
+        ]
+        indexes = [
+            models.Index(fields=["status", "available_at"], name="core_outbox_due_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.task_name}:{self.status}"
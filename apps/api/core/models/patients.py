@@ -44,6 +44,98 @@ class Patient(TimestampedModel):
         return f"{self.organization_id}:{self.given_name} {self.family_name}"
 
 
+class PatientSearchToken(TimestampedModel):
+    organization = models.ForeignKey("Organization", on_delete=models.CASCADE)
+    patient = models.ForeignKey(Patient, on_delete=models.CASCADE, related_name="search_tokens")
+    term = models.CharField(max_length=64)
+    weight = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["organization", "term"], name="core_patient_search_term_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.patient_id}:{self.term}"
+
+
+class PatientBlockingKey(TimestampedModel):
+    organization = models.ForeignKey("Organization", on_delete=models.CASCADE)
+    patient = models.ForeignKey(Patient, on_delete=models.CASCADE, related_name="blocking_keys")
+    key = models.CharField(max_length=128)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["organization", "key"], name="core_patient_block_key_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.patient_id}:{self.key}"
+
+
+class PatientDuplicateCandidate(TimestampedModel):
+    organization = models.ForeignKey("Organization", on_delete=models.CASCADE)
+    patient = models.ForeignKey(
+        Patient, on_delete=models.CASCADE, related_name="duplicate_candidates"
+    )
+    candidate = models.ForeignKey(
+        Patient, on_delete=models.CASCADE, related_name="duplicate_of_candidates"
+    )
+    score = models.FloatField(default=0.0)
+    reasons = models.JSONField(default=list, blank=True)
+    status = models.CharField(max_length=16, default="open")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["patient", "candidate"], name="unique_patient_duplicate_pair"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["organization", "status", "-score"],
+                name="core_patient_dup_score_idx",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.patient_id}~{self.candidate_id}:{self.score}"
+
+
+class PatientDuplicateScan(TimestampedModel):
+    organization = models.OneToOneField("Organization", on_delete=models.CASCADE)
+    last_updated_at = models.DateTimeField(null=True, blank=True)
+    last_patient_id = models.BigIntegerField(default=0)
+    scanned_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self) -> str:
+        return f"{self.organization_id}:{self.last_updated_at}"
+
+
+class PatientImportJob(TimestampedModel):
+    organization = models.ForeignKey("Organization", on_delete=models.CASCADE)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    source_format = models.CharField(max_length=16, default="csv")
+    conflict_policy = models.CharField(max_length=16, default="skip")
+    file_path = models.CharField(max_length=512, blank=True)
+    status = models.CharField(max_length=16, default="queued")
+    total_rows = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    updated_count = models.PositiveIntegerField(default=0)
+    skipped_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    rows_per_second = models.FloatField(default=0.0)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self) -> str:
+        return f"{self.organization_id}:{self.source_format}:{self.status}"
+
+
 class PatientProfile(TimestampedModel):
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     organization = models.ForeignKey("Organization", on_delete=models.CASCADE)
@@ -60,15 +152,21 @@ class PatientOTP(TimestampedModel):
     expires_at = models.DateTimeField()
     used = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [models.Index(fields=["expires_at"], name="core_patient_otp_expiry_idx")]
+
     def __str__(self) -> str:
         return f"{self.phone}:{self.expires_at.isoformat()}"
 
 
 class PatientToken(TimestampedModel):
     patient = models.ForeignKey(PatientProfile, on_delete=models.CASCADE)
-    token = models.CharField(max_length=64, unique=True)
+    token_hash = models.CharField(max_length=64, unique=True)
     expires_at = models.DateTimeField()
 
+    class Meta:
+        indexes = [models.Index(fields=["expires_at"], name="core_patient_token_expiry_idx")]
+
     def __str__(self) -> str:
         return f"{self.patient_id}:{self.expires_at.isoformat()}"
 
@@ -93,11 +191,70 @@ class MedicationDoseEvent(TimestampedModel):
     schedule = models.ForeignKey(MedicationSchedule, on_delete=models.CASCADE)
     status = models.CharField(max_length=16, choices=MEDICATION_STATUSES)
     scheduled_for = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["schedule", "scheduled_for"], name="unique_medication_dose_event"
+            )
+        ]
+        indexes = [
+            models.Index(fields=["updated_at"], name="core_dose_event_updated_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.patient_id}:{self.status}:{self.scheduled_for.isoformat()}"
 
 
+class MedicationDoseSlot(TimestampedModel):
+    patient = models.ForeignKey(PatientProfile, on_delete=models.CASCADE)
+    schedule = models.ForeignKey(
+        MedicationSchedule, on_delete=models.CASCADE, related_name="dose_slots"
+    )
+    scheduled_for = models.DateTimeField()
+    status = models.CharField(max_length=16, default="pending")
+    reminded_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["schedule", "scheduled_for"], name="unique_medication_dose_slot"
+            )
+        ]
+        indexes = [
+            models.Index(fields=["status", "scheduled_for"], name="core_dose_slot_due_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.schedule_id}:{self.status}:{self.scheduled_for.isoformat()}"
+
+
+class MedicationAdherenceDaily(TimestampedModel):
+    organization = models.ForeignKey("Organization", on_delete=models.CASCADE)
+    patient = models.ForeignKey(PatientProfile, on_delete=models.CASCADE)
+    schedule = models.ForeignKey(
+        MedicationSchedule, on_delete=models.CASCADE, related_name="adherence_days"
+    )
+    day = models.DateField()
+    taken = models.PositiveIntegerField(default=0)
+    missed = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["schedule", "day"], name="unique_medication_adherence_day"
+            )
+        ]
+        indexes = [
+            models.Index(fields=["organization", "day"], name="core_adherence_org_day_idx"),
+            models.Index(fields=["patient", "day"], name="core_adherence_patient_day_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.schedule_id}:{self.day.isoformat()}:{self.taken}/{self.missed}"
+
+
 class CaregiverInvite(TimestampedModel):
     patient = models.ForeignKey(PatientProfile, on_delete=models.CASCADE)
     contact = models.CharField(max_length=255)
@@ -23,9 +23,12 @@ class PortalSession(TimestampedModel):
     organization = models.ForeignKey("Organization", on_delete=models.CASCADE)
     patient = models.ForeignKey("Patient", on_delete=models.CASCADE)
     role = models.CharField(max_length=20)
-    token = models.CharField(max_length=64, unique=True)
+    token_hash = models.CharField(max_length=64, unique=True)
     expires_at = models.DateTimeField()
 
+    class Meta:
+        indexes = [models.Index(fields=["expires_at"], name="core_portal_session_expiry_idx")]
+
     def __str__(self) -> str:
         return f"{self.organization_id}:{self.patient_id}:{self.role}"
 
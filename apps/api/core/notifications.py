@@ -1,28 +1,42 @@
 from __future__ import annotations
 
-from datetime import timedelta
+from datetime import datetime, timedelta
 
 from django.conf import settings
-from django.db import models
-from django.core.mail import send_mail
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
-from .models import AuditEvent, Notification, WorkItem
+from .audit import record_audit_events
+from .counters import refresh_work_counters
+from .mailer import queue_notification_emails
+from .models import AuditEvent, Notification, SlaSweep, WorkItem
+from .realtime import publish_event
 
 
-def send_notification_email(notification: Notification) -> None:
-    recipient = notification.recipient
-    if not recipient or not recipient.email:
-        return
-    subject = f"[CareOS] {notification.title}"
-    body = notification.body or notification.title
-    send_mail(
-        subject=subject,
-        message=body,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[recipient.email],
-        fail_silently=True,
-    )
+def notification_payload(notification: Notification) -> dict:
+    return {
+        "id": notification.id,
+        "kind": notification.kind,
+        "title": notification.title,
+        "body": notification.body,
+        "url": notification.url,
+        "unread": notification.unread,
+        "read_at": notification.read_at.isoformat() if notification.read_at else None,
+        "created_at": notification.created_at.isoformat(),
+    }
+
+
+def publish_notifications(notifications) -> None:
+    for notification in notifications:
+        publish_event(
+            notification.organization_id,
+            [notification.recipient_id],
+            "notification",
+            notification_payload(notification),
+        )
 
 
 def create_notification(
@@ -57,46 +71,122 @@ def create_notification(
             target_id=str(notification.id),
             metadata=metadata or {},
         )
-        send_notification_email(notification)
+        queue_notification_emails([notification])
     return notification, created
 
 
-def check_sla_notifications(now=None) -> int:
-    now = now or timezone.now()
-    warning_minutes = getattr(settings, "SLA_WARNING_MINUTES", 60)
-    warning_threshold = now + timedelta(minutes=warning_minutes)
+def create_notifications(
+    entries: list[tuple[Notification, dict]], *, actor=None
+) -> list[Notification]:
+    notifications = Notification.objects.bulk_create(
+        [notification for notification, _metadata in entries]
+    )
+    users = get_user_model().objects.in_bulk(
+        {notification.recipient_id for notification in notifications}
+    )
+    record_audit_events(
+        [
+            AuditEvent(
+                organization_id=notification.organization_id,
+                actor=actor,
+                action="notification.created",
+                target_type="Notification",
+                target_id=str(notification.id),
+                metadata=metadata,
+            )
+            for notification, metadata in entries
+        ]
+    )
+    for notification in notifications:
+        notification.recipient = users.get(notification.recipient_id)
+    queue_notification_emails(notifications)
+    return notifications
+
 
-    items = WorkItem.objects.filter(
-        status__in=["open", "assigned"],
-        assigned_to__isnull=False,
-    ).filter(
-        (
-            models.Q(sla_breach_at__isnull=False, sla_breach_at__lte=warning_threshold)
-            | models.Q(sla_breach_at__isnull=True, due_at__isnull=False, due_at__lte=warning_threshold)
+def _sla_candidates(now: datetime, warning: timedelta, swept_until: datetime | None) -> list[dict]:
+    items = (
+        WorkItem.objects.filter(status__in=["open", "assigned"], assigned_to__isnull=False)
+        .annotate(breach_at=Coalesce("sla_breach_at", "due_at"))
+    )
+    if swept_until is None:
+        items = items.filter(breach_at__lte=now + warning)
+    else:
+        items = items.filter(
+            Q(breach_at__gt=swept_until + warning, breach_at__lte=now + warning)
+            | Q(breach_at__gt=swept_until, breach_at__lte=now)
+            | Q(updated_at__gt=swept_until, breach_at__lte=now + warning)
         )
+    return list(
+        items.values("id", "organization_id", "assigned_to_id", "episode_id", "kind", "breach_at")
     )
 
-    created_count = 0
-    for item in items.select_related("organization", "episode", "assigned_to"):
-        breach_at = item.sla_breach_at or item.due_at
-        if not breach_at:
-            continue
-        status = "breach" if breach_at <= now else "warning"
-        dedupe_key = f"sla:{status}:{item.id}"
-        title = "Work item SLA breached" if status == "breach" else "Work item SLA warning"
-        body = f"{item.kind} work item {item.id} is {status}."
-        url = f"/episodes/{item.episode_id}" if item.episode_id else "/inbox"
-        _notification, created = create_notification(
-            organization=item.organization,
-            recipient=item.assigned_to,
-            kind="sla",
-            title=title,
-            body=body,
-            url=url,
-            dedupe_key=dedupe_key,
-            actor=None,
-            metadata={"work_item_id": item.id, "status": status},
+
+def check_sla_notifications(now=None) -> int:
+    now = now or timezone.now()
+    warning_minutes = getattr(settings, "SLA_WARNING_MINUTES", 60)
+    warning = timedelta(minutes=warning_minutes)
+    with transaction.atomic():
+        sweep = SlaSweep.objects.select_for_update().order_by("id").first()
+        if sweep is None:
+            sweep = SlaSweep.objects.create()
+        swept_until = sweep.swept_until if sweep.warning_minutes == warning_minutes else None
+        candidates = {}
+        for item in _sla_candidates(now, warning, swept_until):
+            status = "breach" if item["breach_at"] <= now else "warning"
+            key = (item["organization_id"], item["assigned_to_id"], f"sla:{status}:{item['id']}")
+            candidates[key] = (item, status)
+        existing = set(
+            Notification.objects.filter(
+                dedupe_key__in=[dedupe_key for _org, _recipient, dedupe_key in candidates]
+            ).values_list("organization_id", "recipient_id", "dedupe_key")
+        )
+        pending = {key: value for key, value in candidates.items() if key not in existing}
+        Notification.objects.bulk_create(
+            [
+                Notification(
+                    organization_id=organization_id,
+                    recipient_id=recipient_id,
+                    kind="sla",
+                    title=(
+                        "Work item SLA breached" if status == "breach" else "Work item SLA warning"
+                    ),
+                    body=f"{item['kind']} work item {item['id']} is {status}.",
+                    url=f"/episodes/{item['episode_id']}" if item["episode_id"] else "/inbox",
+                    dedupe_key=dedupe_key,
+                )
+                for (organization_id, recipient_id, dedupe_key), (item, status) in pending.items()
+            ],
+            ignore_conflicts=True,
+        )
+        created = []
+        audit_events = []
+        for notification in Notification.objects.filter(
+            dedupe_key__in=[dedupe_key for _org, _recipient, dedupe_key in pending]
+        ).select_related("recipient"):
+            key = (notification.organization_id, notification.recipient_id, notification.dedupe_key)
+            if key not in pending:
+                continue
+            item, status = pending[key]
+            created.append(notification)
+            audit_events.append(
+                AuditEvent(
+                    organization_id=notification.organization_id,
+                    action="notification.created",
+                    target_type="Notification",
+                    target_id=str(notification.id),
+                    metadata={"work_item_id": item["id"], "status": status},
+                )
+            )
+        record_audit_events(audit_events)
+        queue_notification_emails(created)
+        publish_notifications(created)
+        refresh_work_counters(
+            (item["organization_id"], item["assigned_to_id"])
+            for item, status in candidates.values()
+            if status == "breach"
         )
-        if created:
-            created_count += 1
-    return created_count
+        if sweep.swept_until is None or now > sweep.swept_until:
+            sweep.swept_until = now
+        sweep.warning_minutes = warning_minutes
+        sweep.save(update_fields=["swept_until", "warning_minutes"])
+    return len(created)
@@ -38,6 +38,62 @@ def build_openapi_spec() -> dict:
                     },
                 }
             },
+            "/me/counters/": {
+                "get": {
+                    "summary": "Badge counters for the current user",
+                    "security": [{"cookieAuth": []}],
+                    "responses": {
+                        "200": {
+                            "description": "OK",
+                            "content": {
+                                "application/json": {
+                                    "schema": {
+                                        "type": "object",
+                                        "properties": {
+                                            "unread_notifications": {"type": "integer"},
+                                            "open_work_items": {"type": "integer"},
+                                            "breached_slas": {"type": "integer"},
+                                            "unread_messages": {"type": "integer"},
+                                        },
+                                    }
+                                }
+                            },
+                        }
+                    },
+                }
+            },
+            "/events/stream/": {
+                "get": {
+                    "summary": "Server-sent events for notifications, messages and AI reviews",
+                    "security": [{"cookieAuth": []}],
+                    "parameters": [
+                        {
+                            "name": "Last-Event-ID",
+                            "in": "header",
+                            "required": False,
+                            "schema": {"type": "string"},
+                        }
+                    ],
+                    "responses": {
+                        "200": {
+                            "description": "Event stream",
+                            "content": {"text/event-stream": {"schema": {"type": "string"}}},
+                        },
+                        "403": {"description": "Forbidden"},
+                        "429": {"description": "Too many open event streams"},
+                    },
+                }
+            },
+            "/notifications/read-all/": {
+                "post": {
+                    "summary": "Mark all notifications read",
+                    "security": [{"cookieAuth": []}],
+                    "responses": {
+                        "200": {"description": "OK"},
+                        "403": {"description": "Forbidden"},
+                    },
+                }
+            },
             "/orgs/current/": {
                 "get": {
                     "summary": "Current organization",
@@ -793,6 +849,15 @@ def build_openapi_spec() -> dict:
                     },
                 }
             },
+            "/portal/auth/logout/": {
+                "post": {
+                    "summary": "Revoke the current portal session",
+                    "responses": {
+                        "200": {"description": "OK"},
+                        "401": {"description": "Unauthorized"},
+                    },
+                }
+            },
             "/auth/admin/audit/": {
                 "post": {
                     "summary": "Admin auth audit event",
@@ -1075,10 +1140,12 @@ def build_openapi_spec() -> dict:
             },
             "/conversations/": {
                 "get": {
-                    "summary": "List conversations",
+                    "summary": "List conversations by last activity",
                     "security": [{"cookieAuth": []}],
                     "parameters": [
                         {"in": "query", "name": "episode_id", "schema": {"type": "integer"}},
+                        {"in": "query", "name": "cursor", "schema": {"type": "string"}},
+                        {"in": "query", "name": "page_size", "schema": {"type": "integer"}},
                     ],
                     "responses": {
                         "200": {
@@ -1130,7 +1197,9 @@ def build_openapi_spec() -> dict:
                             "name": "conversation_id",
                             "required": True,
                             "schema": {"type": "integer"},
-                        }
+                        },
+                        {"in": "query", "name": "cursor", "schema": {"type": "string"}},
+                        {"in": "query", "name": "page_size", "schema": {"type": "integer"}},
                     ],
                     "responses": {
                         "200": {
@@ -1148,6 +1217,50 @@ def build_openapi_spec() -> dict:
                     },
                 }
             },
+            "/conversations/{conversation_id}/read/": {
+                "post": {
+                    "summary": "Mark conversation read up to a message",
+                    "security": [{"cookieAuth": []}],
+                    "parameters": [
+                        {
+                            "in": "path",
+                            "name": "conversation_id",
+                            "required": True,
+                            "schema": {"type": "integer"},
+                        }
+                    ],
+                    "requestBody": {
+                        "content": {
+                            "application/json": {
+                                "schema": {
+                                    "type": "object",
+                                    "properties": {"message_id": {"type": "integer"}},
+                                }
+                            }
+                        }
+                    },
+                    "responses": {
+                        "200": {
+                            "description": "OK",
+                            "content": {
+                                "application/json": {
+                                    "schema": {
+                                        "type": "object",
+                                        "properties": {
+                                            "conversation_id": {"type": "integer"},
+                                            "last_read_message_id": {"type": "integer"},
+                                            "read_at": {"type": ["string", "null"]},
+                                        },
+                                    }
+                                }
+                            },
+                        },
+                        "400": {"description": "Bad request"},
+                        "403": {"description": "Forbidden"},
+                        "404": {"description": "Not found"},
+                    },
+                }
+            },
             "/conversations/{conversation_id}/messages/": {
                 "post": {
                     "summary": "Send message",
@@ -1422,6 +1535,35 @@ def build_openapi_spec() -> dict:
                     },
                 }
             },
+            "/episodes/bulk-transition/": {
+                "post": {
+                    "summary": "Transition many episodes to one state",
+                    "security": [{"cookieAuth": []}],
+                    "requestBody": {
+                        "content": {
+                            "application/json": {
+                                "schema": {
+                                    "type": "object",
+                                    "required": ["episode_ids", "to_state"],
+                                    "properties": {
+                                        "episode_ids": {
+                                            "type": "array",
+                                            "items": {"type": "integer"},
+                                        },
+                                        "to_state": {"type": "string"},
+                                        "note": {"type": "string"},
+                                    },
+                                }
+                            }
+                        }
+                    },
+                    "responses": {
+                        "200": {"description": "OK"},
+                        "400": {"description": "Bad request"},
+                        "403": {"description": "Forbidden"},
+                    },
+                }
+            },
             "/episodes/{episode_id}/transition/": {
                 "post": {
                     "summary": "Transition episode",
@@ -2079,9 +2221,21 @@ def build_openapi_spec() -> dict:
                     "summary": "List patients",
                     "security": [{"cookieAuth": []}],
                     "parameters": [
-                        {"in": "query", "name": "search", "schema": {"type": "string"}},
+                        {
+                            "in": "query",
+                            "name": "search",
+                            "description": "Matches word prefixes of names and email, and leading "
+                            "digits of NHS number and phone; not substrings within a word",
+                            "schema": {"type": "string"},
+                        },
                         {"in": "query", "name": "page", "schema": {"type": "integer"}},
                         {"in": "query", "name": "page_size", "schema": {"type": "integer"}},
+                        {
+                            "in": "query",
+                            "name": "include",
+                            "description": "Comma-separated: identifiers, addresses, contacts",
+                            "schema": {"type": "string"},
+                        },
                     ],
                     "responses": {
                         "200": {
@@ -2129,7 +2283,13 @@ def build_openapi_spec() -> dict:
                             "name": "patient_id",
                             "required": True,
                             "schema": {"type": "integer"},
-                        }
+                        },
+                        {
+                            "in": "query",
+                            "name": "include",
+                            "description": "Comma-separated: identifiers, addresses, contacts",
+                            "schema": {"type": "string"},
+                        },
                     ],
                     "responses": {
                         "200": {
@@ -2181,9 +2341,21 @@ def build_openapi_spec() -> dict:
                     "summary": "Search patients",
                     "security": [{"cookieAuth": []}],
                     "parameters": [
-                        {"in": "query", "name": "q", "schema": {"type": "string"}},
+                        {
+                            "in": "query",
+                            "name": "q",
+                            "description": "Matches word prefixes of names and email, and leading "
+                            "digits of NHS number and phone; not substrings within a word",
+                            "schema": {"type": "string"},
+                        },
                         {"in": "query", "name": "page", "schema": {"type": "integer"}},
                         {"in": "query", "name": "page_size", "schema": {"type": "integer"}},
+                        {
+                            "in": "query",
+                            "name": "include",
+                            "description": "Comma-separated: identifiers, addresses, contacts",
+                            "schema": {"type": "string"},
+                        },
                     ],
                     "responses": {
                         "200": {
@@ -2198,6 +2370,86 @@ def build_openapi_spec() -> dict:
                     },
                 }
             },
+            "/patients/imports/": {
+                "get": {
+                    "summary": "List patient import jobs",
+                    "security": [{"cookieAuth": []}],
+                    "responses": {
+                        "200": {"description": "OK"},
+                        "403": {"description": "Forbidden"},
+                    },
+                },
+                "post": {
+                    "summary": "Start a bulk patient import",
+                    "security": [{"cookieAuth": []}],
+                    "requestBody": {
+                        "required": True,
+                        "content": {
+                            "multipart/form-data": {
+                                "schema": {
+                                    "type": "object",
+                                    "properties": {
+                                        "file": {"type": "string", "format": "binary"},
+                                        "format": {"type": "string", "enum": ["csv", "ndjson"]},
+                                        "conflict": {"type": "string", "enum": ["skip", "update"]},
+                                    },
+                                    "required": ["file"],
+                                }
+                            }
+                        },
+                    },
+                    "responses": {
+                        "202": {"description": "Accepted"},
+                        "400": {"description": "Invalid input"},
+                        "403": {"description": "Forbidden"},
+                    },
+                },
+            },
+            "/patients/imports/{import_id}/": {
+                "get": {
+                    "summary": "Patient import job status",
+                    "security": [{"cookieAuth": []}],
+                    "parameters": [
+                        {"in": "path", "name": "import_id", "required": True, "schema": {"type": "integer"}}
+                    ],
+                    "responses": {
+                        "200": {"description": "OK"},
+                        "403": {"description": "Forbidden"},
+                        "404": {"description": "Not found"},
+                    },
+                }
+            },
+            "/patients/duplicates/": {
+                "get": {
+                    "summary": "List suggested duplicate patients",
+                    "security": [{"cookieAuth": []}],
+                    "parameters": [
+                        {"in": "query", "name": "status", "schema": {"type": "string", "default": "open"}},
+                        {"in": "query", "name": "patient_id", "schema": {"type": "integer"}},
+                        {"in": "query", "name": "min_score", "schema": {"type": "number"}},
+                        {"in": "query", "name": "cursor", "schema": {"type": "string"}},
+                        {"in": "query", "name": "page_size", "schema": {"type": "integer"}},
+                    ],
+                    "responses": {
+                        "200": {"description": "OK"},
+                        "403": {"description": "Forbidden"},
+                    },
+                }
+            },
+            "/patients/duplicates/{candidate_id}/dismiss/": {
+                "post": {
+                    "summary": "Dismiss a duplicate suggestion",
+                    "security": [{"cookieAuth": []}],
+                    "parameters": [
+                        {"in": "path", "name": "candidate_id", "required": True, "schema": {"type": "integer"}}
+                    ],
+                    "responses": {
+                        "200": {"description": "OK"},
+                        "403": {"description": "Forbidden"},
+                        "404": {"description": "Not found"},
+                    },
+                }
+            },
             "/patients/{patient_id}/episodes/": {
                 "get": {
                     "summary": "Patient episodes",
@@ -3251,13 +3503,39 @@ def build_openapi_spec() -> dict:
                     },
                     "required": ["id", "participants", "created_at"],
                 },
+                "ConversationSummary": {
+                    "type": "object",
+                    "properties": {
+                        "id": {"type": "integer"},
+                        "episode_id": {"type": ["integer", "null"]},
+                        "participants": {
+                            "type": "array",
+                            "items": {"$ref": "#/components/schemas/ConversationParticipant"},
+                        },
+                        "created_at": {"type": "string"},
+                        "last_activity_at": {"type": "string"},
+                        "last_message": {
+                            "type": ["object", "null"],
+                            "properties": {
+                                "id": {"type": "integer"},
+                                "sender_id": {"type": ["integer", "null"]},
+                                "body": {"type": "string"},
+                                "created_at": {"type": "string"},
+                            },
+                        },
+                        "unread_count": {"type": "integer"},
+                    },
+                    "required": ["id", "participants", "created_at", "unread_count"],
+                },
                 "ConversationListResponse": {
                     "type": "object",
                     "properties": {
                         "results": {
                             "type": "array",
-                            "items": {"$ref": "#/components/schemas/Conversation"},
-                        }
+                            "items": {"$ref": "#/components/schemas/ConversationSummary"},
+                        },
+                        "page_size": {"type": "integer"},
+                        "next_cursor": {"type": ["string", "null"]},
                     },
                     "required": ["results"],
                 },
@@ -3292,6 +3570,9 @@ def build_openapi_spec() -> dict:
                             "type": "array",
                             "items": {"$ref": "#/components/schemas/Message"},
                         },
+                        "last_read_message_id": {"type": "integer"},
+                        "page_size": {"type": "integer"},
+                        "next_cursor": {"type": ["string", "null"]},
                     },
                     "required": ["id", "participants", "messages"],
                 },
@@ -3900,13 +4181,22 @@ def build_openapi_spec() -> dict:
                 },
                 "PatientMergeRequest": {
                     "type": "object",
-                    "properties": {"source_id": {"type": "integer"}},
-                    "required": ["source_id"],
+                    "properties": {
+                        "source_id": {"type": "integer"},
+                        "source_ids": {"type": "array", "items": {"type": "integer"}},
+                        "dry_run": {"type": "boolean"},
+                    },
                 },
                 "PatientMergeResponse": {
                     "type": "object",
-                    "properties": {"id": {"type": "integer"}, "merged_source_id": {"type": "integer"}},
-                    "required": ["id", "merged_source_id"],
+                    "properties": {
+                        "id": {"type": "integer"},
+                        "merged_source_id": {"type": "integer"},
+                        "merged_source_ids": {"type": "array", "items": {"type": "integer"}},
+                        "dry_run": {"type": "boolean"},
+                        "counts": {"type": "object", "additionalProperties": {"type": "integer"}},
+                    },
+                    "required": ["id", "merged_source_ids", "counts"],
                 },
                 "EvidenceItem": {
                     "type": "object",
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from celery import current_app
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxMessage
+
+
+def enqueue(task, *args, dedupe_key: str | None = None) -> None:
+    OutboxMessage.objects.bulk_create(
+        [
+            OutboxMessage(
+                task_name=getattr(task, "name", task),
+                args=list(args),
+                dedupe_key=dedupe_key,
+            )
+        ],
+        ignore_conflicts=dedupe_key is not None,
+    )
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(2**attempts, settings.OUTBOX_MAX_BACKOFF_SECONDS))
+
+
+def _relay_batch(now: datetime, batch_size: int) -> int:
+    with transaction.atomic():
+        batch = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True)
+            .filter(status="pending", available_at__lte=now)
+            .order_by("id")[:batch_size]
+        )
+        sent_ids = []
+        failed = []
+        for message in batch:
+            try:
+                current_app.tasks[message.task_name].apply_async(
+                    args=message.args, task_id=f"outbox-{message.id}"
+                )
+            except Exception as exc:
+                message.attempts += 1
+                message.last_error = f"{type(exc).__name__}: {exc}"[:2000]
+                if message.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                    message.status = "failed"
+                else:
+                    message.available_at = now + _retry_delay(message.attempts)
+                failed.append(message)
+            else:
+                sent_ids.append(message.id)
+        OutboxMessage.objects.filter(id__in=sent_ids).update(status="sent", sent_at=now)
+        OutboxMessage.objects.bulk_update(
+            failed, ["attempts", "last_error", "status", "available_at"]
+        )
+    return len(batch)
+
+
+def relay_outbox(now: datetime | None = None, batch_size: int | None = None) -> int:
+    now = now or timezone.now()
+    batch_size = batch_size or settings.OUTBOX_RELAY_BATCH_SIZE
+    relayed = 0
+    while True:
+        count = _relay_batch(now, batch_size)
+        relayed += count
+        if count < batch_size:
+            return relayed
+
+
+def prune_outbox(now: datetime | None = None, batch_size: int | None = None) -> int:
+    now = now or timezone.now()
+    batch_size = batch_size or settings.OUTBOX_RELAY_BATCH_SIZE
+    sent = OutboxMessage.objects.filter(
+        status="sent", sent_at__lt=now - timedelta(hours=settings.OUTBOX_RETENTION_HOURS)
+    ).order_by("id")
+    pruned = 0
+    while True:
+        ids = list(sent.values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return pruned
+        pruned += OutboxMessage.objects.filter(id__in=ids).delete()[0]
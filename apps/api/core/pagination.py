@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q, QuerySet
+
+COUNT_MODES = {"exact", "cached", "estimate", "none"}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+@dataclass
+class Page:
+    items: list
+    page_size: int
+    page: int | None = None
+    count: int | None = None
+    next_cursor: str | None = None
+
+    def meta(self) -> dict[str, Any]:
+        meta: dict[str, Any] = {"page_size": self.page_size, "next_cursor": self.next_cursor}
+        if self.page is not None:
+            meta["page"] = self.page
+        if self.count is not None:
+            meta["count"] = self.count
+        return meta
+
+
+def _split(ordering_field: str) -> tuple[str, bool]:
+    if ordering_field.startswith("-"):
+        return ordering_field[1:], True
+    return ordering_field, False
+
+
+def encode_cursor(obj, ordering: tuple[str, ...]) -> str:
+    values = []
+    for ordering_field in ordering:
+        name, _descending = _split(ordering_field)
+        value = getattr(obj, name)
+        values.append(value.isoformat() if hasattr(value, "isoformat") else value)
+    raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, queryset: QuerySet, ordering: tuple[str, ...]) -> list:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as exc:
+        raise InvalidCursor("invalid cursor") from exc
+    if not isinstance(values, list) or len(values) != len(ordering):
+        raise InvalidCursor("invalid cursor")
+    decoded = []
+    for ordering_field, value in zip(ordering, values):
+        name, _descending = _split(ordering_field)
+        if name in queryset.query.annotations:
+            model_field = queryset.query.annotations[name].output_field
+        else:
+            model_field = queryset.model._meta.get_field(name)
+        try:
+            decoded.append(model_field.to_python(value))
+        except (ValidationError, TypeError) as exc:
+            raise InvalidCursor("invalid cursor") from exc
+    return decoded
+
+
+def keyset_filter(ordering: tuple[str, ...], values: list) -> Q:
+    condition = Q()
+    for index, ordering_field in enumerate(ordering):
+        name, descending = _split(ordering_field)
+        lookup = "lt" if descending else "gt"
+        clause = Q(**{f"{name}__{lookup}": values[index]})
+        for previous_field, previous_value in zip(ordering[:index], values[:index]):
+            clause &= Q(**{_split(previous_field)[0]: previous_value})
+        condition |= clause
+    return condition
+
+
+def _cache_key(queryset: QuerySet) -> str:
+    sql, params = queryset.query.sql_with_params()
+    digest = hashlib.sha256(f"{sql}|{params!r}".encode("utf-8")).hexdigest()
+    return f"pagination:count:{queryset.db}:{digest}"
+
+
+def cached_count(queryset: QuerySet) -> int:
+    key = _cache_key(queryset)
+    total = cache.get(key)
+    if total is None:
+        total = queryset.count()
+        cache.set(key, total, timeout=settings.PAGINATION_COUNT_CACHE_SECONDS)
+    return int(total)
+
+
+def estimated_count(queryset: QuerySet) -> int:
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return cached_count(queryset)
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_queryset(queryset: QuerySet, mode: str) -> int | None:
+    if mode == "exact":
+        return queryset.count()
+    if mode == "cached":
+        return cached_count(queryset)
+    if mode == "estimate":
+        return estimated_count(queryset)
+    return None
+
+
+def _page_size(request, default_page_size: int, max_page_size: int) -> int:
+    page_size_value = request.GET.get("limit") or request.GET.get(
+        "page_size", str(default_page_size)
+    )
+    try:
+        return min(max(int(page_size_value), 1), max_page_size)
+    except ValueError:
+        return default_page_size
+
+
+def paginate(
+    request,
+    queryset: QuerySet,
+    *,
+    ordering: tuple[str, ...],
+    default_page_size: int = 50,
+    max_page_size: int = 200,
+) -> Page:
+    page_size = _page_size(request, default_page_size, max_page_size)
+    queryset = queryset.order_by(*ordering)
+    cursor_token = request.GET.get("cursor")
+    count_mode = request.GET.get("count", "")
+    if count_mode not in COUNT_MODES:
+        count_mode = "none" if cursor_token is not None else "exact"
+
+    if cursor_token is not None:
+        window = queryset
+        if cursor_token:
+            values = decode_cursor(cursor_token, queryset, ordering)
+            window = queryset.filter(keyset_filter(ordering, values))
+        items = list(window[: page_size + 1])
+        page_number = None
+    else:
+        try:
+            page_number = max(int(request.GET.get("page", "1")), 1)
+        except ValueError:
+            page_number = 1
+        start = (page_number - 1) * page_size
+        items = list(queryset[start : start + page_size + 1])
+
+    has_more = len(items) > page_size
+    items = items[:page_size]
+    return Page(
+        items=items,
+        page_size=page_size,
+        page=page_number,
+        count=count_queryset(queryset, count_mode),
+        next_cursor=encode_cursor(items[-1], ordering) if has_more and items else None,
+    )
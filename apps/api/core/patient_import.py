@@ -0,0 +1,312 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import time
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from typing import IO
+
+from django.core.exceptions import ValidationError
+from django.db import DataError, IntegrityError, models, transaction
+from django.utils import timezone
+
+from .models import (
+    AuditEvent,
+    Patient,
+    PatientAddress,
+    PatientContactMethod,
+    PatientIdentifier,
+    PatientImportJob,
+)
+from .views.utils import (
+    clean_address,
+    clean_contact,
+    clean_identifier,
+    normalize_nhs_number,
+    parse_date,
+    validate_nhs_number,
+)
+
+IMPORT_FORMATS = {"csv", "ndjson"}
+CONFLICT_POLICIES = {"skip", "update"}
+MAX_STORED_ERRORS = 1000
+
+PATIENT_FIELDS = (
+    "given_name",
+    "family_name",
+    "date_of_birth",
+    "nhs_number",
+    "phone",
+    "email",
+    "address_line1",
+    "address_line2",
+    "city",
+    "region",
+    "postal_code",
+    "country",
+    "restricted",
+)
+PROFILE_MODELS = {
+    "identifiers": (PatientIdentifier, clean_identifier),
+    "addresses": (PatientAddress, clean_address),
+    "contacts": (PatientContactMethod, clean_contact),
+}
+
+
+class RowError(ValueError):
+    pass
+
+
+def iter_rows(stream: IO[bytes], source_format: str) -> Iterator[tuple[int, dict]]:
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if source_format == "csv":
+        for index, row in enumerate(csv.DictReader(text), start=2):
+            yield index, row
+        return
+    for index, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield index, {"__error__": "invalid JSON"}
+            continue
+        yield index, row if isinstance(row, dict) else {"__error__": "row must be an object"}
+
+
+def _profile_entries(value) -> list[dict]:  # type: ignore[no-untyped-def]
+    if value in (None, ""):
+        return []
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError as exc:
+            raise RowError("profile columns must be JSON lists") from exc
+    if not isinstance(value, list) or not all(isinstance(item, dict) for item in value):
+        raise RowError("profile columns must be JSON lists")
+    return value
+
+
+def _validate(model: type[models.Model], values: dict) -> None:
+    for name, value in values.items():
+        try:
+            model._meta.get_field(name).run_validators(value)
+        except ValidationError as exc:
+            raise RowError(f"{name}: {' '.join(exc.messages)}") from exc
+
+
+def clean_row(row: dict) -> tuple[dict, dict[str, list[dict]]]:
+    if "__error__" in row:
+        raise RowError(row["__error__"])
+    given_name = str(row.get("given_name") or "").strip()
+    family_name = str(row.get("family_name") or "").strip()
+    if not given_name or not family_name:
+        raise RowError("given_name and family_name are required")
+    date_of_birth = parse_date(row.get("date_of_birth") or None)
+    if row.get("date_of_birth") and date_of_birth is None:
+        raise RowError("date_of_birth must be ISO date")
+    nhs_number = normalize_nhs_number(row.get("nhs_number"))
+    if not validate_nhs_number(nhs_number):
+        raise RowError("nhs_number must be 10 digits")
+    values: dict[str, object] = {
+        "given_name": given_name,
+        "family_name": family_name,
+        "nhs_number": nhs_number,
+    }
+    if "date_of_birth" in row:
+        values["date_of_birth"] = date_of_birth
+    if "restricted" in row:
+        restricted = row["restricted"]
+        if isinstance(restricted, str):
+            restricted = restricted.strip().lower() in {"1", "true", "yes"}
+        values["restricted"] = bool(restricted)
+    for field in PATIENT_FIELDS:
+        if field not in values and field in row:
+            values[field] = str(row[field] or "").strip()
+    _validate(Patient, values)
+    profiles = {}
+    for name, (model, clean) in PROFILE_MODELS.items():
+        entries = [clean(entry) for entry in _profile_entries(row.get(name))]
+        profiles[name] = [entry for entry in entries if entry is not None]
+        for entry in profiles[name]:
+            _validate(model, entry)
+    return values, profiles
+
+
+class PatientImporter:
+    def __init__(self, job: PatientImportJob, batch_size: int = 1000) -> None:
+        self.job = job
+        self.organization = job.organization
+        self.batch_size = batch_size
+        self.seen_nhs_numbers: set[str] = set()
+        self.started = time.monotonic()
+
+    def run(self, rows: Iterable[tuple[int, dict]]) -> PatientImportJob:
+        job = self.job
+        job.status = "running"
+        job.started_at = timezone.now()
+        job.save(update_fields=["status", "started_at"])
+        batch: list[tuple[int, dict, dict]] = []
+        try:
+            for line_number, row in rows:
+                job.total_rows += 1
+                try:
+                    values, profiles = clean_row(row)
+                except RowError as exc:
+                    self._error(line_number, str(exc))
+                    continue
+                nhs_number = values["nhs_number"]
+                if nhs_number and nhs_number in self.seen_nhs_numbers:
+                    self._error(line_number, "duplicate nhs_number in import")
+                    continue
+                if nhs_number:
+                    self.seen_nhs_numbers.add(nhs_number)
+                batch.append((line_number, values, profiles))
+                if len(batch) >= self.batch_size:
+                    self._flush(batch)
+                    batch = []
+            if batch:
+                self._flush(batch)
+        except Exception:
+            job.status = "failed"
+            self._save_progress(finished=True)
+            raise
+        job.status = "done"
+        self._save_progress(finished=True)
+        AuditEvent.objects.create(
+            organization=self.organization,
+            actor=job.requested_by,
+            action="patient.import.completed",
+            target_type="PatientImportJob",
+            target_id=str(job.id),
+            metadata={
+                "total_rows": job.total_rows,
+                "created": job.created_count,
+                "updated": job.updated_count,
+                "skipped": job.skipped_count,
+                "errors": job.error_count,
+            },
+        )
+        return job
+
+    def _error(self, line_number: int, message: str) -> None:
+        self.job.error_count += 1
+        if len(self.job.errors) < MAX_STORED_ERRORS:
+            self.job.errors.append({"row": line_number, "error": message})
+
+    def _save_progress(self, finished: bool = False) -> None:
+        job = self.job
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        job.rows_per_second = round(job.total_rows / elapsed, 2)
+        fields = [
+            "status",
+            "total_rows",
+            "created_count",
+            "updated_count",
+            "skipped_count",
+            "error_count",
+            "errors",
+            "rows_per_second",
+        ]
+        if finished:
+            job.finished_at = timezone.now()
+            fields.append("finished_at")
+        job.save(update_fields=fields)
+
+    def _flush(self, batch: list[tuple[int, dict, dict]]) -> None:
+        with transaction.atomic():
+            existing = dict(
+                Patient.objects.filter(
+                    organization=self.organization,
+                    nhs_number__in=[
+                        values["nhs_number"] for _, values, _ in batch if values["nhs_number"]
+                    ],
+                ).values_list("nhs_number", "id")
+            )
+            new_rows = [entry for entry in batch if entry[1]["nhs_number"] not in existing]
+            conflicting = [entry for entry in batch if entry[1]["nhs_number"] in existing]
+            created = self._create(new_rows)
+            updated = self._update(conflicting, existing)
+            self._create_profiles(created + updated)
+        self._save_progress()
+
+    def _create(self, rows: list[tuple[int, dict, dict]]) -> list[tuple[Patient, dict]]:
+        if not rows:
+            return []
+        patients = [Patient(organization=self.organization, **values) for _, values, _ in rows]
+        try:
+            with transaction.atomic():
+                Patient.objects.bulk_create(patients)
+        except (IntegrityError, DataError):
+            return self._create_one_by_one(rows)
+        self.job.created_count += len(patients)
+        return [(patient, profiles) for patient, (_, _, profiles) in zip(patients, rows)]
+
+    def _create_one_by_one(self, rows: list[tuple[int, dict, dict]]) -> list[tuple[Patient, dict]]:
+        created = []
+        for line_number, values, profiles in rows:
+            try:
+                with transaction.atomic():
+                    patient = Patient.objects.create(organization=self.organization, **values)
+            except DataError:
+                self._error(line_number, "row rejected by the database")
+                continue
+            except IntegrityError:
+                if self.job.conflict_policy == "update":
+                    existing = Patient.objects.filter(
+                        organization=self.organization, nhs_number=values["nhs_number"]
+                    ).values_list("nhs_number", "id")
+                    created.extend(self._update([(line_number, values, profiles)], dict(existing)))
+                else:
+                    self.job.skipped_count += 1
+                continue
+            self.job.created_count += 1
+            created.append((patient, profiles))
+        return created
+
+    def _update(
+        self, rows: list[tuple[int, dict, dict]], existing: dict[str, int]
+    ) -> list[tuple[Patient, dict]]:
+        if not rows:
+            return []
+        if self.job.conflict_policy != "update":
+            self.job.skipped_count += len(rows)
+            return []
+        patients = []
+        by_columns: dict[tuple[str, ...], list[Patient]] = defaultdict(list)
+        now = timezone.now()
+        for _, values, _ in rows:
+            patient = Patient(id=existing[values["nhs_number"]], organization=self.organization)
+            for field, value in values.items():
+                setattr(patient, field, value)
+            patient.updated_at = now
+            patients.append(patient)
+            by_columns[tuple(values)].append(patient)
+        for columns, group in by_columns.items():
+            Patient.objects.bulk_update(group, [*columns, "updated_at"])
+        self.job.updated_count += len(patients)
+        replaced = [(patient, profiles) for patient, (_, _, profiles) in zip(patients, rows)]
+        for name, (model, _clean) in PROFILE_MODELS.items():
+            patient_ids = [patient.id for patient, profiles in replaced if profiles[name]]
+            if patient_ids:
+                model.objects.filter(patient_id__in=patient_ids).delete()
+        return replaced
+
+    def _create_profiles(self, patients: list[tuple[Patient, dict]]) -> None:
+        for name, (model, _clean) in PROFILE_MODELS.items():
+            model.objects.bulk_create(
+                [
+                    model(organization=self.organization, patient_id=patient.id, **entry)
+                    for patient, profiles in patients
+                    for entry in profiles[name]
+                ],
+                batch_size=self.batch_size,
+            )
+
+
+def run_patient_import(
+    job: PatientImportJob, stream: IO[bytes], batch_size: int = 1000
+) -> PatientImportJob:
+    return PatientImporter(job, batch_size=batch_size).run(iter_rows(stream, job.source_format))
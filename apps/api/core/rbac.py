@@ -32,6 +32,7 @@ PERMISSIONS = {
         "patient:read",
         "patient:write",
         "patient:merge",
+        "patient:import",
         "evidence:read",
         "evidence:write",
         "evidence:link",
@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass
+from functools import cache, partial
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger("core.realtime")
+
+
+@dataclass(frozen=True)
+class Event:
+    id: str
+    kind: str
+    data: dict
+
+    def encode(self) -> str:
+        return f"id: {self.id}\nevent: {self.kind}\ndata: {json.dumps(self.data)}\n\n"
+
+
+def stream_key(organization_id: int, user_id: int) -> str:
+    return f"{organization_id}:{user_id}"
+
+
+class MemoryBroker:
+    def __init__(self, buffer_size: int | None = None) -> None:
+        self.buffer_size = buffer_size or settings.REALTIME_BUFFER_SIZE
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self._streams: dict[str, deque[Event]] = defaultdict(
+            partial(deque, maxlen=self.buffer_size)
+        )
+        self._trimmed: dict[str, int] = {}
+        self._waiters: dict[str, set[tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = (
+            defaultdict(set)
+        )
+        self._connections: Counter[str] = Counter()
+
+    def publish(self, key: str, kind: str, data: dict) -> str:
+        with self._lock:
+            self._sequence += 1
+            stream = self._streams[key]
+            if len(stream) == stream.maxlen:
+                self._trimmed[key] = int(stream[0].id)
+            event = Event(id=str(self._sequence), kind=kind, data=data)
+            stream.append(event)
+            waiters = list(self._waiters[key])
+        for loop, waiter in waiters:
+            try:
+                loop.call_soon_threadsafe(waiter.set)
+            except RuntimeError:
+                pass
+        return event.id
+
+    def _after(self, key: str, last_id: str) -> list[Event]:
+        with self._lock:
+            return [event for event in self._streams.get(key, ()) if int(event.id) > int(last_id)]
+
+    async def latest_id(self, key: str) -> str:
+        with self._lock:
+            stream = self._streams.get(key)
+            return stream[-1].id if stream else str(self._sequence)
+
+    async def replayable(self, key: str, last_id: str) -> bool:
+        if not last_id.isdigit():
+            return False
+        with self._lock:
+            return int(last_id) >= self._trimmed.get(key, 0)
+
+    async def read(self, key: str, last_id: str, timeout: float) -> list[Event]:
+        events = self._after(key, last_id)
+        if events:
+            return events
+        entry = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._waiters[key].add(entry)
+        try:
+            events = self._after(key, last_id)
+            if events:
+                return events
+            try:
+                await asyncio.wait_for(entry[1].wait(), timeout)
+            except TimeoutError:
+                return []
+            return self._after(key, last_id)
+        finally:
+            with self._lock:
+                self._waiters[key].discard(entry)
+
+    async def acquire(self, key: str, limit: int) -> bool:
+        with self._lock:
+            if self._connections[key] >= limit:
+                return False
+            self._connections[key] += 1
+            return True
+
+    async def release(self, key: str) -> None:
+        with self._lock:
+            self._connections[key] -= 1
+            if self._connections[key] <= 0:
+                del self._connections[key]
+
+
+def _stream_id(value: str) -> tuple[int, int] | None:
+    milliseconds, _, sequence = value.partition("-")
+    if not milliseconds.isdigit() or not (sequence or "0").isdigit():
+        return None
+    return int(milliseconds), int(sequence or "0")
+
+
+class RedisBroker:
+    def __init__(self, url: str | None = None, buffer_size: int | None = None) -> None:
+        import redis
+
+        self.url = url or settings.REALTIME_REDIS_URL
+        self.buffer_size = buffer_size or settings.REALTIME_BUFFER_SIZE
+        self._client = redis.Redis.from_url(self.url, decode_responses=True)
+        self._async_clients: dict[asyncio.AbstractEventLoop, object] = {}
+
+    def _async_client(self):
+        import redis.asyncio
+
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = redis.asyncio.Redis.from_url(self.url, decode_responses=True)
+            self._async_clients[loop] = client
+        return client
+
+    def publish(self, key: str, kind: str, data: dict) -> str:
+        name = f"realtime:stream:{key}"
+        with self._client.pipeline() as pipe:
+            pipe.xadd(
+                name,
+                {"kind": kind, "data": json.dumps(data)},
+                maxlen=self.buffer_size,
+                approximate=True,
+            )
+            pipe.expire(name, settings.REALTIME_STREAM_TTL_SECONDS)
+            event_id, _ = pipe.execute()
+        return event_id
+
+    async def latest_id(self, key: str) -> str:
+        entries = await self._async_client().xrevrange(f"realtime:stream:{key}", count=1)
+        return entries[0][0] if entries else "0-0"
+
+    async def replayable(self, key: str, last_id: str) -> bool:
+        parsed = _stream_id(last_id)
+        if parsed is None:
+            return False
+        entries = await self._async_client().xrange(f"realtime:stream:{key}", count=1)
+        if not entries:
+            return True
+        oldest = _stream_id(entries[0][0])
+        return oldest is not None and parsed >= oldest
+
+    async def read(self, key: str, last_id: str, timeout: float) -> list[Event]:
+        response = await self._async_client().xread(
+            {f"realtime:stream:{key}": last_id},
+            count=self.buffer_size,
+            block=max(int(timeout * 1000), 1),
+        )
+        return [
+            Event(id=event_id, kind=fields["kind"], data=json.loads(fields["data"]))
+            for _name, entries in response
+            for event_id, fields in entries
+        ]
+
+    async def acquire(self, key: str, limit: int) -> bool:
+        name = f"realtime:connections:{key}"
+        client = self._async_client()
+        count = await client.incr(name)
+        await client.expire(name, int(settings.REALTIME_MAX_CONNECTION_SECONDS) + 60)
+        if count > limit:
+            await client.decr(name)
+            return False
+        return True
+
+    async def release(self, key: str) -> None:
+        await self._async_client().decr(f"realtime:connections:{key}")
+
+
+@cache
+def get_broker() -> MemoryBroker | RedisBroker:
+    if settings.REALTIME_BACKEND == "redis":
+        return RedisBroker()
+    return MemoryBroker()
+
+
+def _publish(keys: list[str], kind: str, data: dict) -> None:
+    broker = get_broker()
+    for key in keys:
+        try:
+            broker.publish(key, kind, data)
+        except Exception:
+            logger.exception("realtime publish failed", extra={"kind": kind})
+
+
+def publish_event(organization_id: int, user_ids, kind: str, data: dict) -> None:
+    keys = [stream_key(organization_id, user_id) for user_id in user_ids if user_id is not None]
+    if keys:
+        transaction.on_commit(partial(_publish, keys, kind, data))
+
+
+_closing: set[asyncio.Task] = set()
+
+
+class StreamLease:
+    def __init__(self, broker, key: str) -> None:
+        self.broker = broker
+        self.key = key
+        self.held = True
+
+    async def release(self) -> None:
+        if self.held:
+            self.held = False
+            await self.broker.release(self.key)
+
+    def close(self) -> None:
+        if not self.held:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            async_to_sync(self.release)()
+            return
+        task = loop.create_task(self.release())
+        _closing.add(task)
+        task.add_done_callback(_closing.discard)
+
+
+async def acquire_stream(broker, key: str) -> StreamLease | None:
+    if not await broker.acquire(key, settings.REALTIME_MAX_CONNECTIONS_PER_USER):
+        return None
+    return StreamLease(broker, key)
+
+
+async def event_stream(lease: StreamLease, last_id: str | None):
+    broker, key = lease.broker, lease.key
+    try:
+        yield f"retry: {settings.REALTIME_RETRY_MS}\n\n"
+        if last_id is None:
+            last_id = await broker.latest_id(key)
+        elif not await broker.replayable(key, last_id):
+            last_id = await broker.latest_id(key)
+            yield Event(id=last_id, kind="resync", data={}).encode()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.REALTIME_MAX_CONNECTION_SECONDS
+        while loop.time() < deadline:
+            events = await broker.read(
+                key, last_id, min(settings.REALTIME_HEARTBEAT_SECONDS, deadline - loop.time())
+            )
+            if not events:
+                yield ": heartbeat\n\n"
+                continue
+            for event in events:
+                yield event.encode()
+                last_id = event.id
+    finally:
+        await lease.release()
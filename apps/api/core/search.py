@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+from collections.abc import Iterable
+
+from django.db.models import Count, IntegerField, Q, QuerySet, Sum, Value
+
+from .models import Organization, Patient, PatientSearchToken
+
+MIN_PREFIX_LENGTH = 2
+MAX_PREFIX_LENGTH = 12
+MIN_DIGIT_PREFIX_LENGTH = 3
+MAX_TERM_LENGTH = 64
+
+EXACT_IDENTIFIER_WEIGHT = 20
+EXACT_NAME_WEIGHT = 10
+EXACT_EMAIL_WORD_WEIGHT = 6
+NAME_PREFIX_WEIGHT = 4
+OTHER_PREFIX_WEIGHT = 2
+
+SEARCH_ORDERING = ("-search_rank", "family_name", "given_name", "id")
+SEARCH_TEXT_FIELDS = ("given_name", "family_name", "email")
+SEARCH_DIGIT_FIELDS = ("nhs_number", "phone")
+
+_WORD = re.compile(r"[a-z0-9]+")
+_PHONE_PUNCTUATION = re.compile(r"[\s\-().]")
+_E164 = re.compile(r"\+\d{8,15}")
+
+
+def normalize_text(value: str | None) -> str:
+    decomposed = unicodedata.normalize("NFKD", value or "")
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def _words(value: str | None) -> list[str]:
+    return [word[:MAX_TERM_LENGTH] for word in _WORD.findall(normalize_text(value))]
+
+
+def _digits(value: str | None) -> str:
+    return "".join(char for char in value or "" if char.isdigit())[:MAX_TERM_LENGTH]
+
+
+def _add(terms: dict[str, int], term: str, weight: int) -> None:
+    if term and weight > terms.get(term, 0):
+        terms[term] = weight
+
+
+def _add_prefixes(terms: dict[str, int], word: str, minimum: int, weight: int) -> None:
+    for length in range(minimum, min(len(word), MAX_PREFIX_LENGTH + 1)):
+        _add(terms, word[:length], weight)
+
+
+def patient_search_terms(
+    *,
+    given_name: str | None,
+    family_name: str | None,
+    nhs_number: str | None,
+    phone: str | None,
+    email: str | None,
+) -> dict[str, int]:
+    terms: dict[str, int] = {}
+    for word in _words(given_name) + _words(family_name):
+        _add(terms, word, EXACT_NAME_WEIGHT)
+        _add_prefixes(terms, word, MIN_PREFIX_LENGTH, NAME_PREFIX_WEIGHT)
+    for identifier in (_digits(nhs_number), _digits(phone)):
+        _add(terms, identifier, EXACT_IDENTIFIER_WEIGHT)
+        _add_prefixes(terms, identifier, MIN_DIGIT_PREFIX_LENGTH, OTHER_PREFIX_WEIGHT)
+    for word in _words(email):
+        _add(terms, word, EXACT_EMAIL_WORD_WEIGHT)
+        _add_prefixes(terms, word, MIN_PREFIX_LENGTH, OTHER_PREFIX_WEIGHT)
+    return terms
+
+
+def index_patients(patients: Iterable[Patient]) -> None:
+    patients = [patient for patient in patients if patient.pk is not None]
+    if not patients:
+        return
+    PatientSearchToken.objects.filter(patient__in=patients).delete()
+    PatientSearchToken.objects.bulk_create(
+        [
+            PatientSearchToken(
+                organization_id=patient.organization_id,
+                patient_id=patient.pk,
+                term=term,
+                weight=weight,
+            )
+            for patient in patients
+            for term, weight in patient_search_terms(
+                given_name=patient.given_name,
+                family_name=patient.family_name,
+                nhs_number=patient.nhs_number,
+                phone=patient.phone,
+                email=patient.email,
+            ).items()
+        ],
+        batch_size=1000,
+    )
+
+
+def query_terms(query: str) -> list[str]:
+    terms = []
+    for word in _words(query):
+        minimum = MIN_DIGIT_PREFIX_LENGTH if word.isdigit() else MIN_PREFIX_LENGTH
+        if len(word) >= minimum:
+            terms.append(word)
+    return sorted(set(terms))
+
+
+def _contains(term: str) -> Q:
+    fields = SEARCH_DIGIT_FIELDS if term.isdigit() else SEARCH_TEXT_FIELDS
+    condition = Q()
+    for field in fields:
+        condition |= Q(**{f"{field}__icontains": term})
+    return condition
+
+
+def search_patients(organization: Organization, queryset: QuerySet, query: str) -> QuerySet:
+    compact = _PHONE_PUNCTUATION.sub("", query.strip())
+    if (compact.isdigit() and len(compact) == 10) or _E164.fullmatch(compact):
+        digits = compact.lstrip("+")
+        exact_identifier = PatientSearchToken.objects.filter(
+            organization=organization, term=digits, weight=EXACT_IDENTIFIER_WEIGHT
+        ).values("patient_id")
+        return queryset.filter(Q(nhs_number=digits) | Q(id__in=exact_identifier)).annotate(
+            search_rank=Value(EXACT_IDENTIFIER_WEIGHT, output_field=IntegerField())
+        )
+    terms = query_terms(query)
+    if not terms:
+        return queryset.annotate(search_rank=Value(0, output_field=IntegerField()))
+    for term in terms:
+        if len(term) > MAX_PREFIX_LENGTH:
+            queryset = queryset.filter(_contains(term))
+    indexed = {term[:MAX_PREFIX_LENGTH] for term in terms}
+    return (
+        queryset.filter(search_tokens__organization=organization, search_tokens__term__in=indexed)
+        .annotate(
+            search_rank=Sum("search_tokens__weight"),
+            search_hits=Count("search_tokens__term", distinct=True),
+        )
+        .filter(search_hits=len(indexed))
+    )
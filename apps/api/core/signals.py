@@ -1,30 +1,81 @@
 from __future__ import annotations
 
+from collections import Counter
+from functools import partial
+
 from django.contrib.auth.signals import user_logged_in, user_logged_out
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
-from .audit import record_audit_event
+from .adherence import record_dose_events
+from .audit import record_audit_event, record_audit_events
+from .consent import invalidate_consent
+from .counters import bump_counters, refresh_counters, refresh_work_counters
+from .duplicates import SCANNED_FIELDS, mark_patients_changed
+from .medication import replan_schedule
 from .models import (
+    AIReviewRequest,
     AuditEvent,
+    ConsentRecord,
+    ConversationReadState,
     EvidenceEvent,
     EvidenceItem,
     OrgInvite,
     OrganizationSubscription,
     Episode,
     EpisodeEvent,
+    MedicationDoseEvent,
+    MedicationSchedule,
     Membership,
+    Message,
+    Notification,
     Organization,
+    Patient,
+    PatientProfile,
+    PatientToken,
+    PortalSession,
     Site,
     Team,
     WorkItem,
 )
+from .models.base import post_bulk_create, post_queryset_update
+from .notifications import publish_notifications
+from .realtime import publish_event
+from .search import index_patients
+from .tenancy import membership_cache
+from .tokens import invalidate_patient_tokens, invalidate_token_pks
+
+PATIENT_SEARCH_FIELDS = {"given_name", "family_name", "nhs_number", "phone", "email"}
+WORK_COUNTED_ATTNAMES = ("assigned_to_id", "status", "due_at", "sla_breach_at")
+WORK_COUNTED_FIELDS = {"assigned_to", *WORK_COUNTED_ATTNAMES}
+
+
+AUDITED_MODELS = (
+    Organization,
+    Site,
+    Team,
+    Membership,
+    Episode,
+    EpisodeEvent,
+    EvidenceItem,
+    EvidenceEvent,
+    OrgInvite,
+    OrganizationSubscription,
+    WorkItem,
+)
 
 
 def _target_identity(instance) -> tuple[str, str]:
     return (instance.__class__.__name__, str(instance.pk))
 
 
+def _organization_id(instance) -> int:
+    if isinstance(instance, Organization):
+        return instance.pk
+    return instance.organization_id
+
+
 @receiver(post_save, sender=Organization)
 @receiver(post_save, sender=Site)
 @receiver(post_save, sender=Team)
@@ -48,6 +99,318 @@ def audit_on_write(sender, instance, created, **kwargs):  # type: ignore[no-unty
         action=f"{sender.__name__}.{action}",
         target_type=target_type,
         target_id=target_id,
+        generic=True,
+    )
+
+
+def audit_on_bulk_create(sender, instances, **kwargs):  # type: ignore[no-untyped-def]
+    record_audit_events(
+        [
+            AuditEvent(
+                organization_id=_organization_id(instance),
+                action=f"{sender.__name__}.created",
+                target_type=sender.__name__,
+                target_id=str(instance.pk),
+            )
+            for instance in instances
+            if instance.pk is not None
+        ],
+        generic=True,
+    )
+
+
+def audit_on_queryset_update(sender, pks, fields, **kwargs):  # type: ignore[no-untyped-def]
+    if sender is Organization:
+        rows = [(pk, pk) for pk in pks]
+    else:
+        rows = sender.objects.filter(pk__in=pks).values_list("pk", "organization_id")
+    record_audit_events(
+        [
+            AuditEvent(
+                organization_id=organization_id,
+                action=f"{sender.__name__}.updated",
+                target_type=sender.__name__,
+                target_id=str(pk),
+                metadata={"fields": fields},
+            )
+            for pk, organization_id in rows
+        ],
+        generic=True,
+    )
+
+
+for _model in AUDITED_MODELS:
+    post_bulk_create.connect(audit_on_bulk_create, sender=_model)
+    post_queryset_update.connect(audit_on_queryset_update, sender=_model)
+
+
+@receiver(post_save, sender=Membership)
+@receiver(post_delete, sender=Membership)
+def invalidate_membership_cache(sender, instance, **kwargs):  # type: ignore[no-untyped-def]
+    membership_cache.invalidate_user(instance.user_id)
+
+
+@receiver(post_queryset_update, sender=Membership)
+def invalidate_membership_cache_on_update(sender, pks, fields, **kwargs):  # type: ignore[no-untyped-def]
+    membership_cache.invalidate_users(
+        Membership.objects.filter(pk__in=pks).values_list("user_id", flat=True)
+    )
+
+
+@receiver(post_save, sender=Organization)
+@receiver(post_delete, sender=Organization)
+def invalidate_organization_memberships(sender, instance, **kwargs):  # type: ignore[no-untyped-def]
+    membership_cache.invalidate_organization(instance.pk)
+
+
+@receiver(post_save, sender=Patient)
+def index_patient_on_save(sender, instance, update_fields=None, **kwargs):  # type: ignore[no-untyped-def]
+    if update_fields is not None and not PATIENT_SEARCH_FIELDS & set(update_fields):
+        return
+    index_patients([instance])
+
+
+@receiver(post_bulk_create, sender=Patient)
+def index_patients_on_bulk_create(sender, instances, **kwargs):  # type: ignore[no-untyped-def]
+    index_patients(instances)
+
+
+@receiver(post_queryset_update, sender=Patient, fields=PATIENT_SEARCH_FIELDS)
+def index_patients_on_update(sender, pks, fields, **kwargs):  # type: ignore[no-untyped-def]
+    if PATIENT_SEARCH_FIELDS & set(fields):
+        index_patients(Patient.objects.filter(pk__in=pks))
+
+
+@receiver(post_queryset_update, sender=Patient, fields=SCANNED_FIELDS)
+def rescan_duplicates_on_update(sender, pks, fields, **kwargs):  # type: ignore[no-untyped-def]
+    if SCANNED_FIELDS & set(fields):
+        mark_patients_changed(pks)
+
+
+@receiver(post_save, sender=ConsentRecord)
+@receiver(post_delete, sender=ConsentRecord)
+def invalidate_consent_on_write(sender, instance, **kwargs):  # type: ignore[no-untyped-def]
+    invalidate_consent([(instance.patient_id, instance.scope)])
+
+
+@receiver(post_bulk_create, sender=ConsentRecord)
+def invalidate_consent_on_bulk_create(sender, instances, **kwargs):  # type: ignore[no-untyped-def]
+    invalidate_consent((instance.patient_id, instance.scope) for instance in instances)
+
+
+@receiver(post_queryset_update, sender=ConsentRecord)
+def invalidate_consent_on_update(sender, pks, fields, **kwargs):  # type: ignore[no-untyped-def]
+    invalidate_consent(
+        ConsentRecord.objects.filter(pk__in=pks).values_list("patient_id", "scope")
+    )
+
+
+@receiver(post_save, sender=PortalSession)
+@receiver(post_save, sender=PatientToken)
+def invalidate_token_on_save(sender, instance, created, **kwargs):  # type: ignore[no-untyped-def]
+    if not created:
+        invalidate_token_pks(sender, [instance.pk])
+
+
+@receiver(post_queryset_update, sender=PortalSession)
+@receiver(post_queryset_update, sender=PatientToken)
+def invalidate_tokens_on_update(sender, pks, fields, **kwargs):  # type: ignore[no-untyped-def]
+    if set(fields) != {"expires_at"}:
+        invalidate_token_pks(sender, pks)
+
+
+@receiver(post_save, sender=Patient)
+def invalidate_portal_sessions_on_patient_save(sender, instance, created, **kwargs):  # type: ignore[no-untyped-def]
+    if not created:
+        invalidate_patient_tokens(PortalSession, [instance.pk])
+
+
+@receiver(post_queryset_update, sender=Patient)
+def invalidate_portal_sessions_on_patient_update(sender, pks, **kwargs):  # type: ignore[no-untyped-def]
+    invalidate_patient_tokens(PortalSession, pks)
+
+
+@receiver(post_save, sender=PatientProfile)
+def invalidate_patient_tokens_on_profile_save(sender, instance, created, **kwargs):  # type: ignore[no-untyped-def]
+    if not created:
+        invalidate_patient_tokens(PatientToken, [instance.pk])
+
+
+@receiver(post_queryset_update, sender=PatientProfile)
+def invalidate_patient_tokens_on_profile_update(sender, pks, **kwargs):  # type: ignore[no-untyped-def]
+    invalidate_patient_tokens(PatientToken, pks)
+
+
+@receiver(post_save, sender=MedicationSchedule)
+def replan_schedule_on_save(sender, instance, **kwargs):  # type: ignore[no-untyped-def]
+    replan_schedule(instance)
+
+
+@receiver(post_save, sender=MedicationDoseEvent)
+def rollup_dose_event_on_save(sender, instance, created, **kwargs):  # type: ignore[no-untyped-def]
+    if created:
+        record_dose_events([instance])
+
+
+@receiver(post_bulk_create, sender=MedicationDoseEvent)
+def rollup_dose_events_on_bulk_create(sender, instances, **kwargs):  # type: ignore[no-untyped-def]
+    record_dose_events(instances)
+
+
+@receiver(post_save, sender=Notification)
+def count_notification_on_save(sender, instance, created, update_fields=None, **kwargs):  # type: ignore[no-untyped-def]
+    key = (instance.organization_id, instance.recipient_id)
+    if created:
+        bump_counters("unread_notifications", Counter({key: 1 if instance.unread else 0}))
+    elif update_fields is None or "unread" in update_fields:
+        refresh_counters([key], ["unread_notifications"])
+
+
+@receiver(post_bulk_create, sender=Notification)
+def count_notifications_on_bulk_create(sender, instances, **kwargs):  # type: ignore[no-untyped-def]
+    bump_counters(
+        "unread_notifications",
+        Counter(
+            (instance.organization_id, instance.recipient_id)
+            for instance in instances
+            if instance.pk and instance.unread
+        ),
+    )
+    refresh_counters(
+        {
+            (instance.organization_id, instance.recipient_id)
+            for instance in instances
+            if not instance.pk
+        },
+        ["unread_notifications"],
+    )
+
+
+@receiver(pre_save, sender=WorkItem)
+def remember_work_item_assignee(sender, instance, update_fields=None, **kwargs):  # type: ignore[no-untyped-def]
+    instance._previous_work_state = None
+    if instance.pk is None or (
+        update_fields is not None and not WORK_COUNTED_FIELDS & set(update_fields)
+    ):
+        return
+    instance._previous_work_state = (
+        WorkItem.objects.filter(pk=instance.pk).values_list(*WORK_COUNTED_ATTNAMES).first()
+    )
+
+
+@receiver(post_save, sender=WorkItem)
+def count_work_item_on_save(sender, instance, created, update_fields=None, **kwargs):  # type: ignore[no-untyped-def]
+    previous = getattr(instance, "_previous_work_state", None)
+    current = tuple(getattr(instance, attname) for attname in WORK_COUNTED_ATTNAMES)
+    if not created and (previous is None or previous == current):
+        return
+    keys = {(instance.organization_id, instance.assigned_to_id)}
+    if previous is not None:
+        keys.add((instance.organization_id, previous[0]))
+    transaction.on_commit(partial(refresh_work_counters, keys))
+
+
+@receiver(post_queryset_update, sender=WorkItem, fields=WORK_COUNTED_FIELDS)
+def count_work_items_on_update(sender, pks, fields, **kwargs):  # type: ignore[no-untyped-def]
+    if not WORK_COUNTED_FIELDS & set(fields):
+        return
+    refresh_work_counters(
+        WorkItem.objects.filter(pk__in=pks).values_list("organization_id", "assigned_to_id")
+    )
+
+
+@receiver(post_save, sender=Message)
+def count_message_on_save(sender, instance, created, **kwargs):  # type: ignore[no-untyped-def]
+    if not created:
+        return
+    recipients = instance.conversation.participants.exclude(id=instance.sender_id)
+    bump_counters(
+        "unread_messages",
+        Counter(
+            (instance.organization_id, user_id)
+            for user_id in recipients.values_list("id", flat=True)
+        ),
+    )
+
+
+@receiver(pre_save, sender=ConversationReadState)
+def remember_read_watermark(sender, instance, **kwargs):  # type: ignore[no-untyped-def]
+    instance._previous_read_message_id = (
+        ConversationReadState.objects.filter(pk=instance.pk)
+        .values_list("last_read_message_id", flat=True)
+        .first()
+        if instance.pk
+        else 0
+    )
+
+
+@receiver(post_save, sender=ConversationReadState)
+def count_read_state_on_save(sender, instance, **kwargs):  # type: ignore[no-untyped-def]
+    previous = getattr(instance, "_previous_read_message_id", None) or 0
+    if instance.last_read_message_id <= previous:
+        return
+    read = (
+        Message.objects.filter(
+            conversation_id=instance.conversation_id,
+            id__gt=previous,
+            id__lte=instance.last_read_message_id,
+        )
+        .exclude(sender_id=instance.user_id)
+        .count()
+    )
+    bump_counters("unread_messages", Counter({(instance.organization_id, instance.user_id): -read}))
+
+
+@receiver(post_queryset_update, sender=ConversationReadState, fields=["last_read_message_id"])
+def count_read_states_on_update(sender, pks, fields, **kwargs):  # type: ignore[no-untyped-def]
+    if "last_read_message_id" not in fields:
+        return
+    refresh_counters(
+        ConversationReadState.objects.filter(pk__in=pks).values_list("organization_id", "user_id"),
+        ["unread_messages"],
+    )
+
+
+@receiver(post_save, sender=Notification)
+def publish_notification_on_save(sender, instance, created, **kwargs):  # type: ignore[no-untyped-def]
+    if created:
+        publish_notifications([instance])
+
+
+@receiver(post_bulk_create, sender=Notification)
+def publish_notifications_on_bulk_create(sender, instances, **kwargs):  # type: ignore[no-untyped-def]
+    publish_notifications(instance for instance in instances if instance.pk)
+
+
+@receiver(post_save, sender=Message)
+def publish_message_on_save(sender, instance, created, **kwargs):  # type: ignore[no-untyped-def]
+    if not created:
+        return
+    publish_event(
+        instance.organization_id,
+        instance.conversation.participants.exclude(id=instance.sender_id).values_list(
+            "id", flat=True
+        ),
+        "message",
+        {
+            "id": instance.id,
+            "conversation_id": instance.conversation_id,
+            "sender_id": instance.sender_id,
+            "body": instance.body,
+            "created_at": instance.created_at.isoformat(),
+        },
+    )
+
+
+@receiver(post_save, sender=AIReviewRequest)
+def publish_ai_review_on_save(sender, instance, update_fields=None, **kwargs):  # type: ignore[no-untyped-def]
+    if update_fields is not None and "status" not in update_fields:
+        return
+    publish_event(
+        instance.organization_id,
+        [instance.created_by_id],
+        "ai_review",
+        {"id": instance.id, "status": instance.status, "error": instance.error},
     )
 
 
@@ -1,11 +1,23 @@
 from __future__ import annotations
 
+from datetime import timedelta
+
 from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
 
+from .adherence import rebuild_adherence_rollups
 from .ai_review import run_review
-from .models import AIReviewRequest, AuditEvent
+from .models import AIReviewRequest, AuditEvent, PatientImportJob
 from .notifications import check_sla_notifications
 from .compliance import run_due_report_jobs
+from .counters import reconcile_counters
+from .duplicates import scan_for_duplicates
+from .mailer import deliver_queued_emails
+from .medication import dispatch_due_reminders, plan_dose_slots, sweep_missed_doses
+from .outbox import prune_outbox, relay_outbox
+from .patient_import import run_patient_import
+from .tokens import sweep_expired_tokens
 from .views.privacy import purge_retention
 
 
@@ -62,3 +74,62 @@ def purge_retention_task() -> dict:
 @shared_task
 def run_report_jobs_task() -> int:
     return run_due_report_jobs()
+
+
+@shared_task
+def plan_medication_doses_task() -> int:
+    return plan_dose_slots()
+
+
+@shared_task
+def dispatch_medication_reminders_task() -> int:
+    return dispatch_due_reminders()
+
+
+@shared_task
+def sweep_missed_doses_task() -> int:
+    return sweep_missed_doses()
+
+
+@shared_task
+def rebuild_adherence_rollups_task() -> int:
+    changed_since = timezone.now() - timedelta(days=settings.ADHERENCE_REBUILD_DAYS)
+    return rebuild_adherence_rollups(since=changed_since.date(), changed_since=changed_since)
+
+
+@shared_task
+def scan_patient_duplicates_task() -> int:
+    return scan_for_duplicates()
+
+
+@shared_task
+def reconcile_counters_task() -> int:
+    return reconcile_counters()
+
+
+@shared_task
+def deliver_queued_emails_task() -> int:
+    return deliver_queued_emails()
+
+
+@shared_task
+def relay_outbox_task() -> int:
+    relayed = relay_outbox()
+    prune_outbox()
+    return relayed
+
+
+@shared_task
+def sweep_expired_tokens_task() -> dict:
+    return sweep_expired_tokens()
+
+
+@shared_task
+def run_patient_import_task(job_id: int) -> None:
+    job = PatientImportJob.objects.filter(id=job_id, status="queued").select_related(
+        "organization", "requested_by"
+    ).first()
+    if not job:
+        return
+    with open(job.file_path, "rb") as stream:
+        run_patient_import(job, stream, batch_size=settings.PATIENT_IMPORT_BATCH_SIZE)
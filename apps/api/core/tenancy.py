@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import dataclass, replace
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from .models import Membership, Organization
+
+_MEMBERSHIP_FIELDS = (
+    "id",
+    "created_at",
+    "user_id",
+    "organization_id",
+    "role",
+    "is_active",
+    "deactivated_at",
+)
+_ORGANIZATION_FIELDS = ("id", "created_at", "name", "slug")
+
+
+@dataclass(frozen=True)
+class MembershipCacheStats:
+    hits: int
+    misses: int
+    invalidations: int
+    size: int
+
+
+@dataclass(frozen=True)
+class _CachedMembership:
+    membership_values: tuple
+    organization_values: tuple
+    generation: int
+    expires_at: float
+    revalidate_at: float
+
+    def build(self) -> Membership:
+        membership = Membership.from_db(
+            DEFAULT_DB_ALIAS, list(_MEMBERSHIP_FIELDS), list(self.membership_values)
+        )
+        membership.organization = Organization.from_db(
+            DEFAULT_DB_ALIAS, list(_ORGANIZATION_FIELDS), list(self.organization_values)
+        )
+        return membership
+
+
+def _generation_key(user_id: int) -> str:
+    return f"tenancy:membership-generation:{user_id}"
+
+
+class MembershipCache:
+    def __init__(
+        self,
+        ttl_seconds: float = 30.0,
+        max_entries: int = 10_000,
+        generation_check_seconds: float = 1.0,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.generation_check_seconds = generation_check_seconds
+        self._entries: OrderedDict[tuple[int, str], _CachedMembership] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, user_id: int, org_header: str) -> Membership | None:
+        key = (user_id, org_header)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > now:
+                self._entries.move_to_end(key)
+            else:
+                if entry is not None:
+                    del self._entries[key]
+                entry = None
+        if entry is not None and entry.revalidate_at <= now:
+            entry = self._revalidate(key, entry, now)
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return entry.build()
+
+    def set(self, user_id: int, org_header: str, membership: Membership, generation: int) -> None:
+        organization = membership.organization
+        now = time.monotonic()
+        entry = _CachedMembership(
+            membership_values=tuple(getattr(membership, field) for field in _MEMBERSHIP_FIELDS),
+            organization_values=tuple(
+                getattr(organization, field) for field in _ORGANIZATION_FIELDS
+            ),
+            generation=generation,
+            expires_at=now + self.ttl_seconds,
+            revalidate_at=now + self.generation_check_seconds,
+        )
+        with self._lock:
+            self._entries[(user_id, org_header)] = entry
+            self._entries.move_to_end((user_id, org_header))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: int) -> None:
+        self.invalidate_users([user_id])
+
+    def invalidate_users(self, user_ids: Iterable[int]) -> None:
+        user_ids = set(user_ids)
+        if not user_ids:
+            return
+        for user_id in user_ids:
+            self._bump_generation(user_id)
+        with self._lock:
+            for key in [key for key in self._entries if key[0] in user_ids]:
+                del self._entries[key]
+            self.invalidations += 1
+
+    def invalidate_organization(self, organization_id: int) -> None:
+        with self._lock:
+            stale = [
+                key
+                for key, entry in self._entries.items()
+                if entry.membership_values[3] == organization_id
+            ]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += 1
+        user_ids = Membership.objects.filter(organization_id=organization_id).values_list(
+            "user_id", flat=True
+        )
+        for user_id in set(user_ids):
+            self._bump_generation(user_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.invalidations = 0
+
+    def stats(self) -> MembershipCacheStats:
+        with self._lock:
+            return MembershipCacheStats(
+                hits=self.hits,
+                misses=self.misses,
+                invalidations=self.invalidations,
+                size=len(self._entries),
+            )
+
+    def _revalidate(
+        self, key: tuple[int, str], entry: _CachedMembership, now: float
+    ) -> _CachedMembership | None:
+        # Other processes invalidate through the shared generation counter. It
+        # is read at most once per generation_check_seconds per entry, so hits
+        # inside that window never leave the process.
+        current: _CachedMembership | None = None
+        if entry.generation == self.generation(key[0]):
+            current = replace(entry, revalidate_at=now + self.generation_check_seconds)
+        with self._lock:
+            if current is None:
+                self._entries.pop(key, None)
+            elif key in self._entries:
+                self._entries[key] = current
+        return current
+
+    def generation(self, user_id: int) -> int:
+        return int(cache.get(_generation_key(user_id), 0))
+
+    def _bump_generation(self, user_id: int) -> None:
+        key = _generation_key(user_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+membership_cache = MembershipCache(
+    ttl_seconds=getattr(settings, "TENANT_MEMBERSHIP_CACHE_TTL_SECONDS", 30),
+    max_entries=getattr(settings, "TENANT_MEMBERSHIP_CACHE_MAX_ENTRIES", 10_000),
+    generation_check_seconds=getattr(settings, "TENANT_MEMBERSHIP_GENERATION_CHECK_SECONDS", 1.0),
+)
+
+
+def resolve_membership(user, org_header: str | None) -> Membership | None:
+    org_header = org_header or ""
+    enabled = membership_cache.ttl_seconds > 0 and settings.SHARED_CACHE_ENABLED
+    generation = 0
+    if enabled:
+        cached = membership_cache.get(user.id, org_header)
+        if cached is not None:
+            return cached
+        generation = membership_cache.generation(user.id)
+    memberships = Membership.objects.filter(user=user, is_active=True).select_related(
+        "organization"
+    )
+    if org_header:
+        try:
+            membership = memberships.get(organization_id=org_header)
+        except (Membership.DoesNotExist, ValueError):
+            return None
+    else:
+        membership = memberships.first()
+        if membership is None:
+            return None
+    if enabled:
+        membership_cache.set(user.id, org_header, membership, generation)
+    return membership
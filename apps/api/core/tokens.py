@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import hashlib
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, models, transaction
+from django.utils import timezone
+
+from .models import PatientOTP, PatientToken, PortalSession
+
+
+def hash_token(value: str) -> str:
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+def new_token() -> tuple[str, str]:
+    value = secrets.token_hex(32)
+    return value, hash_token(value)
+
+
+def bearer_token(request) -> str | None:
+    auth_header = request.headers.get("Authorization", "")
+    if not auth_header.startswith("Bearer "):
+        return None
+    return auth_header.replace("Bearer ", "").strip() or None
+
+
+@dataclass(frozen=True)
+class TokenCacheStats:
+    hits: int
+    misses: int
+    invalidations: int
+    size: int
+
+
+def _field_names(model: type[models.Model]) -> list[str]:
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def _field_values(instance: models.Model) -> tuple:
+    return tuple(getattr(instance, name) for name in _field_names(type(instance)))
+
+
+@dataclass(frozen=True)
+class _CachedToken:
+    values: tuple
+    related: tuple[tuple[str, tuple], ...]
+    expires_at: float
+
+    def build(self, model: type[models.Model]) -> models.Model:
+        instance = model.from_db(DEFAULT_DB_ALIAS, _field_names(model), list(self.values))
+        for name, values in self.related:
+            related_model = model._meta.get_field(name).related_model
+            setattr(
+                instance,
+                name,
+                related_model.from_db(DEFAULT_DB_ALIAS, _field_names(related_model), list(values)),
+            )
+        return instance
+
+
+def _revoked_key(token_hash: str) -> str:
+    return f"tokens:revoked:{token_hash}"
+
+
+class TokenCache:
+    def __init__(self, ttl_seconds: float = 60.0, max_entries: int = 10_000) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, str], _CachedToken] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and settings.SHARED_CACHE_ENABLED
+
+    def get(self, model: type[models.Model], token_hash: str) -> models.Model | None:
+        key = (model._meta.label, token_hash)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > now:
+                self._entries.move_to_end(key)
+            else:
+                if entry is not None:
+                    del self._entries[key]
+                entry = None
+        if entry is None or cache.get(_revoked_key(token_hash)):
+            with self._lock:
+                self._entries.pop(key, None)
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return entry.build(model)
+
+    def set(self, token_hash: str, instance: models.Model, related: Iterable[str] = ()) -> None:
+        key = (instance._meta.label, token_hash)
+        entry = _CachedToken(
+            values=_field_values(instance),
+            related=tuple((name, _field_values(getattr(instance, name))) for name in related),
+            expires_at=time.monotonic() + self.ttl_seconds,
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, label: str, token_hashes: Iterable[str]) -> None:
+        token_hashes = list(token_hashes)
+        if token_hashes:
+            transaction.on_commit(partial(self._revoke, label, token_hashes))
+
+    def _revoke(self, label: str, token_hashes: list[str]) -> None:
+        cache.set_many(
+            {_revoked_key(token_hash): True for token_hash in token_hashes},
+            timeout=max(int(self.ttl_seconds), 1),
+        )
+        with self._lock:
+            for token_hash in token_hashes:
+                self._entries.pop((label, token_hash), None)
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.invalidations = 0
+
+    def stats(self) -> TokenCacheStats:
+        with self._lock:
+            return TokenCacheStats(
+                hits=self.hits,
+                misses=self.misses,
+                invalidations=self.invalidations,
+                size=len(self._entries),
+            )
+
+
+token_cache = TokenCache(
+    ttl_seconds=getattr(settings, "SESSION_CACHE_TTL_SECONDS", 60),
+    max_entries=getattr(settings, "SESSION_CACHE_MAX_ENTRIES", 10_000),
+)
+
+
+def _lifetime(model: type[models.Model]) -> timedelta:
+    if model is PortalSession:
+        return timedelta(hours=settings.PORTAL_SESSION_HOURS)
+    return timedelta(days=settings.PATIENT_TOKEN_DAYS)
+
+
+def issue_expiry(model: type[models.Model], now: datetime | None = None) -> datetime:
+    return (now or timezone.now()) + _lifetime(model)
+
+
+def _slide_expiry(instance: models.Model, now: datetime) -> bool:
+    expires_at = issue_expiry(type(instance), now)
+    coalesce = timedelta(minutes=settings.SESSION_EXPIRY_COALESCE_MINUTES)
+    if expires_at - instance.expires_at < coalesce:
+        return False
+    type(instance).objects.filter(pk=instance.pk).update(expires_at=expires_at)
+    instance.expires_at = expires_at
+    return True
+
+
+def authenticate(
+    model: type[models.Model], value: str | None, *related: str
+) -> models.Model | None:
+    if not value:
+        return None
+    token_hash = hash_token(value)
+    label = model._meta.label
+    enabled = token_cache.enabled
+    instance = token_cache.get(model, token_hash) if enabled else None
+    cached = instance is not None
+    if instance is None:
+        instance = model.objects.select_related(*related).filter(token_hash=token_hash).first()
+        if instance is None:
+            return None
+    now = timezone.now()
+    if instance.expires_at < now:
+        token_cache.invalidate(label, [token_hash])
+        return None
+    slid = _slide_expiry(instance, now)
+    if enabled and (slid or not cached):
+        token_cache.set(token_hash, instance, related)
+    return instance
+
+
+def revoke_tokens(queryset: models.QuerySet) -> int:
+    token_hashes = list(queryset.values_list("token_hash", flat=True))
+    deleted, _ = queryset.model.objects.filter(token_hash__in=token_hashes).delete()
+    token_cache.invalidate(queryset.model._meta.label, token_hashes)
+    return deleted
+
+
+def invalidate_token_pks(model: type[models.Model], pks: Iterable[int]) -> None:
+    token_cache.invalidate(
+        model._meta.label,
+        model.objects.filter(pk__in=list(pks)).values_list("token_hash", flat=True),
+    )
+
+
+def invalidate_patient_tokens(model: type[models.Model], patient_ids: Iterable[int]) -> None:
+    if not token_cache.enabled:
+        return
+    token_cache.invalidate(
+        model._meta.label,
+        model.objects.filter(patient_id__in=list(patient_ids)).values_list("token_hash", flat=True),
+    )
+
+
+def sweep_expired_tokens(now: datetime | None = None, batch_size: int | None = None) -> dict:
+    now = now or timezone.now()
+    batch_size = batch_size or settings.SESSION_SWEEP_BATCH_SIZE
+    swept = {}
+    for model in (PortalSession, PatientToken, PatientOTP):
+        expired = model.objects.filter(expires_at__lt=now).order_by("id")
+        total = 0
+        while True:
+            ids = list(expired.values_list("id", flat=True)[:batch_size])
+            if not ids:
+                break
+            deleted, _ = model.objects.filter(id__in=ids).delete()
+            total += deleted
+        swept[model.__name__] = total
+    return swept
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from functools import partial
+
+from django.db import transaction
+from django.utils import timezone
+
+from .audit import record_audit_events
+from .models import AuditEvent, Episode, EpisodeEvent, Notification, Organization, WorkItem
+from .notifications import create_notifications
+from .rbac import Role
+from .state import EPISODE_TRANSITIONS
+
+TERMINAL_EPISODE_STATES = {"resolved", "closed", "cancelled"}
+BULK_TRANSITION_LIMIT = 500
+
+
+@dataclass
+class BulkTransitionResult:
+    to_state: str
+    transitioned: list[int] = field(default_factory=list)
+    errors: list[dict] = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        return {
+            "to_state": self.to_state,
+            "transitioned": self.transitioned,
+            "errors": self.errors,
+        }
+
+
+def transition_denied(
+    role: str, user_id: int, episode: Episode, to_state: str
+) -> tuple[int, str] | None:
+    if role == Role.STAFF:
+        if to_state == "cancelled":
+            return 403, "Not authorized."
+        if episode.status != "triage" and episode.assigned_to_id != user_id:
+            return 403, "Not authorized."
+    if role != Role.ADMIN and to_state == "cancelled":
+        return 403, "Not authorized."
+    if to_state != "cancelled" and to_state not in EPISODE_TRANSITIONS.get(episode.status, set()):
+        return 400, "Invalid transition."
+    return None
+
+
+def transition_payload(from_state: str, to_state: str, note: str) -> dict:
+    return {
+        "from_state": from_state,
+        "to_state": to_state,
+        "from_status": from_state,
+        "to_status": to_state,
+        "note": note,
+    }
+
+
+def bulk_transition_episodes(
+    *,
+    organization: Organization,
+    actor,
+    role: str,
+    episode_ids: Iterable[int],
+    to_state: str,
+    note: str = "",
+) -> BulkTransitionResult:
+    episode_ids = list(dict.fromkeys(episode_ids))
+    result = BulkTransitionResult(to_state=to_state)
+    now = timezone.now()
+    with transaction.atomic():
+        episodes = {
+            episode.id: episode
+            for episode in Episode.objects.select_for_update().filter(
+                organization=organization, id__in=episode_ids
+            )
+        }
+        eligible: list[tuple[Episode, str]] = []
+        for episode_id in episode_ids:
+            episode = episodes.get(episode_id)
+            if episode is None:
+                result.errors.append({"id": episode_id, "detail": "Not found."})
+                continue
+            denied = transition_denied(role, actor.id, episode, to_state)
+            if denied:
+                result.errors.append({"id": episode_id, "detail": denied[1]})
+                continue
+            eligible.append((episode, episode.status))
+        if not eligible:
+            return result
+        ids = [episode.id for episode, _from_state in eligible]
+        Episode.objects.filter(id__in=ids).update(status=to_state, updated_at=now)
+        EpisodeEvent.objects.bulk_create(
+            [
+                EpisodeEvent(
+                    organization=organization,
+                    episode=episode,
+                    created_by=actor,
+                    event_type="episode.transition",
+                    from_state=from_state,
+                    to_state=to_state,
+                    note=note,
+                    payload_json=transition_payload(from_state, to_state, note),
+                )
+                for episode, from_state in eligible
+            ]
+        )
+        audit_events = []
+        if to_state in TERMINAL_EPISODE_STATES:
+            open_items = list(
+                WorkItem.objects.filter(
+                    organization=organization,
+                    episode_id__in=ids,
+                    status__in=["open", "assigned"],
+                ).values_list("id", "episode_id")
+            )
+            WorkItem.objects.filter(id__in=[item_id for item_id, _ in open_items]).update(
+                status="completed", completed_at=now
+            )
+            audit_events += [
+                AuditEvent(
+                    organization=organization,
+                    actor=actor,
+                    action="work_item.auto_completed",
+                    target_type="WorkItem",
+                    target_id=str(item_id),
+                    metadata={"episode_id": episode_id},
+                )
+                for item_id, episode_id in open_items
+            ]
+        audit_events += [
+            AuditEvent(
+                organization=organization,
+                actor=actor,
+                action="episode.transition",
+                target_type="Episode",
+                target_id=str(episode.id),
+                metadata={
+                    "from_state": from_state,
+                    "to_state": to_state,
+                    "from_status": from_state,
+                    "to_status": to_state,
+                    "bulk": True,
+                },
+            )
+            for episode, from_state in eligible
+        ]
+        record_audit_events(audit_events)
+        notifications = []
+        for episode, _from_state in eligible:
+            recipient_ids = {episode.assigned_to_id, episode.created_by_id} - {None}
+            notifications += [
+                (
+                    Notification(
+                        organization=organization,
+                        recipient_id=recipient_id,
+                        kind="episode.transition",
+                        title="Episode updated",
+                        body=f"Episode {episode.id} moved to {to_state}.",
+                        url=f"/episodes/{episode.id}",
+                    ),
+                    {"episode_id": episode.id, "to_state": to_state},
+                )
+                for recipient_id in sorted(recipient_ids)
+            ]
+        if notifications:
+            transaction.on_commit(partial(create_notifications, notifications, actor=actor))
+    result.transitioned = ids
+    return result
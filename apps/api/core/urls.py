@@ -9,6 +9,7 @@ from .views import audit as audit_views
 from .views import auth as auth_views
 from .views import appointments as appointment_views
 from .views import episodes as episode_views
+from .views import events as event_views
 from .views import evidence_items as evidence_item_views
 from .views import evidence_packs as evidence_pack_views
 from .views import forms as form_views
@@ -16,6 +17,7 @@ from .views import health as health_views
 from .views import inbox as inbox_views
 from .views import integrations as integration_views
 from .views import me as me_views
+from .views import medication as medication_views
 from .views import messaging as messaging_views
 from .views import notifications as notification_views
 from .views import observability as observability_views
@@ -33,6 +35,7 @@ urlpatterns = [
     path("healthz/", health_views.healthz),
     path("readyz/", health_views.readyz),
     path("me/", me_views.me),
+    path("me/counters/", me_views.me_counters),
     path("orgs/current/", csrf_exempt(me_views.current_org)),
     path("orgs/members/", org_views.org_members_list),
     path("orgs/invites/", csrf_exempt(org_views.org_invites)),
@@ -67,7 +70,12 @@ urlpatterns = [
         "integrations/api-keys/<int:key_id>/revoke/",
         csrf_exempt(integration_views.integration_api_key_revoke),
     ),
+    path("events/stream/", event_views.events_stream),
     path("notifications/", notification_views.notifications_list),
+    path(
+        "notifications/read-all/",
+        csrf_exempt(notification_views.notifications_mark_all_read),
+    ),
     path(
         "notifications/<int:notification_id>/read/",
         csrf_exempt(notification_views.notification_mark_read),
@@ -77,6 +85,7 @@ urlpatterns = [
     path("exports/<int:export_id>/download/", admin_views.export_download),
     path("portal/auth/accept-invite/", csrf_exempt(portal_views.portal_accept_invite)),
     path("portal/auth/login/", csrf_exempt(portal_views.portal_login)),
+    path("portal/auth/logout/", csrf_exempt(portal_views.portal_logout)),
     path("portal/me/", portal_views.portal_me),
     path("portal/episodes/", portal_views.portal_episodes),
     path("portal/episodes/<int:episode_id>/", portal_views.portal_episode_detail),
@@ -97,6 +106,10 @@ urlpatterns = [
     ),
     path("conversations/", csrf_exempt(messaging_views.conversations_list)),
     path("conversations/<int:conversation_id>/", messaging_views.conversation_detail),
+    path(
+        "conversations/<int:conversation_id>/read/",
+        csrf_exempt(messaging_views.conversation_mark_read),
+    ),
     path(
         "conversations/<int:conversation_id>/messages/",
         csrf_exempt(messaging_views.conversation_messages),
@@ -124,6 +137,13 @@ urlpatterns = [
     path("tasks/<int:task_id>/complete/", csrf_exempt(task_views.task_complete)),
     path("patients/", csrf_exempt(patient_views.patients_list)),
     path("patients/search/", patient_views.patient_search),
+    path("patients/imports/", csrf_exempt(patient_views.patient_imports)),
+    path("patients/imports/<int:import_id>/", patient_views.patient_import_detail),
+    path("patients/duplicates/", patient_views.patient_duplicates),
+    path(
+        "patients/duplicates/<int:candidate_id>/dismiss/",
+        csrf_exempt(patient_views.patient_duplicate_dismiss),
+    ),
     path("patients/<int:patient_id>/", patient_views.patient_detail),
     path("patients/<int:patient_id>/episodes/", patient_views.patient_episodes),
     path(
@@ -144,6 +164,10 @@ urlpatterns = [
     ),
     path("patients/<int:patient_id>/merge/", csrf_exempt(patient_views.patient_merge)),
     path("episodes/", csrf_exempt(episode_views.episodes_list)),
+    path(
+        "episodes/bulk-transition/",
+        csrf_exempt(episode_views.episodes_bulk_transition),
+    ),
     path("episodes/<int:episode_id>/", episode_views.episode_detail),
     path(
         "episodes/<int:episode_id>/transition/",
@@ -177,6 +201,7 @@ urlpatterns = [
     path("evidence-packs/<int:pack_id>/", evidence_pack_views.evidence_pack_detail),
     path("patient/auth/request-otp/", csrf_exempt(patient_views.patient_request_otp)),
     path("patient/auth/verify-otp/", csrf_exempt(patient_views.patient_verify_otp)),
+    path("patient/auth/logout/", csrf_exempt(patient_views.patient_logout)),
     path(
         "patient/medication-schedules/",
         csrf_exempt(patient_views.patient_schedules_list),
@@ -189,7 +214,17 @@ urlpatterns = [
         "patient/medication-schedules/<int:schedule_id>/confirm/",
         csrf_exempt(patient_views.patient_schedule_confirm),
     ),
+    path("patient/adherence/", patient_views.patient_adherence),
     path("patient/feedback/", csrf_exempt(patient_views.patient_feedback)),
+    path("medication/adherence/", medication_views.org_adherence),
+    path(
+        "medication/adherence/patients/<int:profile_id>/",
+        medication_views.profile_adherence,
+    ),
+    path(
+        "medication/adherence/schedules/<int:schedule_id>/",
+        medication_views.schedule_adherence,
+    ),
     path("patient/caregivers/", csrf_exempt(patient_views.patient_caregivers)),
     path("ai/", ai_views.ai_list),
     path("ai/triage/suggest/", csrf_exempt(ai_views.ai_triage_suggest)),
@@ -2,11 +2,13 @@ from __future__ import annotations
 
 import json
 
+from django.db import transaction
 from django.http import JsonResponse
 from django.utils import timezone
 
 from ..billing import check_ai_review_quota
 from ..models import AIReviewItem, AIReviewRequest, AuditEvent
+from ..outbox import enqueue
 from ..rbac import Role, has_permission
 from ..tasks import process_ai_review_request
 
@@ -37,21 +39,22 @@ def ai_review_create(request):
             },
             status=402,
         )
-    review = AIReviewRequest.objects.create(
-        organization=membership.organization,
-        input_type=input_type,
-        payload=payload.get("payload", {}),
-        status="pending",
-        created_by=request.user,
-    )
-    AuditEvent.objects.create(
-        organization=membership.organization,
-        actor=request.user,
-        action="ai.review.created",
-        target_type="AIReviewRequest",
-        target_id=str(review.id),
-    )
-    process_ai_review_request.delay(review.id)
+    with transaction.atomic():
+        review = AIReviewRequest.objects.create(
+            organization=membership.organization,
+            input_type=input_type,
+            payload=payload.get("payload", {}),
+            status="pending",
+            created_by=request.user,
+        )
+        AuditEvent.objects.create(
+            organization=membership.organization,
+            actor=request.user,
+            action="ai.review.created",
+            target_type="AIReviewRequest",
+            target_id=str(review.id),
+        )
+        enqueue(process_ai_review_request, review.id, dedupe_key=f"ai-review:{review.id}")
     return JsonResponse(
         {
             "id": review.id,
@@ -8,6 +8,7 @@ from django.http import JsonResponse
 from django.utils import timezone
 
 from ..models import Appointment, AuditEvent, Episode, EpisodeEvent, Patient, WorkItem
+from ..pagination import InvalidCursor, paginate
 from ..rbac import has_permission
 from ..state import APPOINTMENT_TRANSITIONS
 from .utils import parse_datetime
@@ -113,20 +114,11 @@ def appointments_list(request):
             )
         appointments = appointments.filter(scheduled_at__gte=after_dt)
     try:
-        page = max(int(request.GET.get("page", "1")), 1)
-    except ValueError:
-        page = 1
-    try:
-        page_size = min(max(int(request.GET.get("page_size", "50")), 1), 200)
-    except ValueError:
-        page_size = 50
-    total = appointments.count()
-    start = (page - 1) * page_size
-    appointments = appointments[start : start + page_size]
-    payload = [_appointment_payload(item) for item in appointments]
-    return JsonResponse(
-        {"results": payload, "count": total, "page": page, "page_size": page_size}
-    )
+        page = paginate(request, appointments, ordering=("-scheduled_at", "-id"))
+    except InvalidCursor:
+        return JsonResponse({"detail": "invalid cursor"}, status=400)
+    payload = [_appointment_payload(item) for item in page.items]
+    return JsonResponse({"results": payload, **page.meta()})
 
 
 def appointment_transition(request, appointment_id: int):
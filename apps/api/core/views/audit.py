@@ -3,6 +3,7 @@ from __future__ import annotations
 from django.http import JsonResponse
 
 from ..models import AuditEvent
+from ..pagination import InvalidCursor, paginate
 from ..rbac import has_permission
 from .utils import parse_datetime
 
@@ -39,21 +40,9 @@ def audit_events(request):
             return JsonResponse({"detail": "end must be ISO datetime"}, status=400)
         events = events.filter(created_at__lte=end_dt)
     try:
-        page = max(int(request.GET.get("page", "1")), 1)
-    except ValueError:
-        page = 1
-    limit = request.GET.get("limit")
-    if limit:
-        page_size_value = limit
-    else:
-        page_size_value = request.GET.get("page_size", "50")
-    try:
-        page_size = min(max(int(page_size_value), 1), 200)
-    except ValueError:
-        page_size = 50
-    total = events.count()
-    start_index = (page - 1) * page_size
-    events = events.order_by("-created_at", "-id")[start_index : start_index + page_size]
+        page = paginate(request, events, ordering=("-created_at", "-id"))
+    except InvalidCursor:
+        return JsonResponse({"detail": "invalid cursor"}, status=400)
     payload = [
         {
             "id": event.id,
@@ -65,8 +54,6 @@ def audit_events(request):
             "request_id": event.request_id,
             "created_at": event.created_at.isoformat(),
         }
-        for event in events
+        for event in page.items
     ]
-    return JsonResponse(
-        {"results": payload, "count": total, "page": page, "page_size": page_size}
-    )
+    return JsonResponse({"results": payload, **page.meta()})
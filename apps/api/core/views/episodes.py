@@ -5,31 +5,27 @@ from datetime import timedelta
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import models
 from django.http import JsonResponse
 from django.utils import timezone
 
-from ..models import AuditEvent, ConsentRecord, Episode, EpisodeEvent, Patient, WorkItem
+from ..audit import audit_batched, record_audit_events
+from ..consent import (
+    EPISODES_READ,
+    consent_allows,
+    patients_with_active_consent,
+    requires_consent,
+)
+from ..models import AuditEvent, Episode, EpisodeEvent, Patient, WorkItem
 from ..notifications import create_notification
+from ..pagination import InvalidCursor, paginate
 from ..rbac import Role, has_permission
-from ..state import EPISODE_TRANSITIONS
-
-
-def _requires_episode_consent(patient: Patient | None) -> bool:
-    return bool(patient and patient.restricted)
-
-
-def _has_active_consent(org_id: int, patient: Patient | None, scope: str) -> bool:
-    if not patient:
-        return True
-    now = timezone.now()
-    return ConsentRecord.objects.filter(
-        organization_id=org_id,
-        patient=patient,
-        scope=scope,
-        granted=True,
-        revoked_at__isnull=True,
-    ).filter(models.Q(expires_at__isnull=True) | models.Q(expires_at__gte=now)).exists()
+from ..transitions import (
+    BULK_TRANSITION_LIMIT,
+    TERMINAL_EPISODE_STATES,
+    bulk_transition_episodes,
+    transition_denied,
+    transition_payload,
+)
 
 
 def episodes_list(request):
@@ -116,8 +112,10 @@ def episodes_list(request):
     permission = has_permission(membership.role, "episode:read")
     if not permission.allowed:
         return JsonResponse({"detail": "Not authorized."}, status=403)
-    episodes = Episode.objects.filter(organization=membership.organization).order_by(
-        "-created_at"
+    episodes = (
+        Episode.objects.filter(organization=membership.organization)
+        .select_related("patient")
+        .order_by("-created_at")
     )
     status_filter = request.GET.get("status")
     if status_filter:
@@ -132,23 +130,17 @@ def episodes_list(request):
     if search_filter:
         episodes = episodes.filter(title__icontains=search_filter)
     try:
-        page = max(int(request.GET.get("page", "1")), 1)
-    except ValueError:
-        page = 1
-    limit = request.GET.get("limit")
-    if limit:
-        page_size_value = limit
-    else:
-        page_size_value = request.GET.get("page_size", "50")
-    try:
-        page_size = min(max(int(page_size_value), 1), 200)
-    except ValueError:
-        page_size = 50
-    total = episodes.count()
-    start_index = (page - 1) * page_size
-    episodes = episodes[start_index : start_index + page_size]
-    payload = [
-        {
+        page = paginate(request, episodes, ordering=("-created_at", "-id"))
+    except InvalidCursor:
+        return JsonResponse({"detail": "invalid cursor"}, status=400)
+    consented = patients_with_active_consent(
+        membership.organization_id,
+        {episode.patient_id for episode in page.items if requires_consent(episode.patient)},
+        EPISODES_READ,
+    )
+    payload = []
+    for episode in page.items:
+        item = {
             "id": episode.id,
             "title": episode.title,
             "description": episode.description,
@@ -159,11 +151,10 @@ def episodes_list(request):
             "created_by": episode.created_by_id,
             "patient_id": episode.patient_id,
         }
-        for episode in episodes
-    ]
-    return JsonResponse(
-        {"results": payload, "count": total, "page": page, "page_size": page_size}
-    )
+        if requires_consent(episode.patient) and episode.patient_id not in consented:
+            item.update(title="", description="", consent_required=True)
+        payload.append(item)
+    return JsonResponse({"results": payload, **page.meta()})
 
 
 def episode_detail(request, episode_id: int):
@@ -176,9 +167,7 @@ def episode_detail(request, episode_id: int):
     ).first()
     if not episode:
         return JsonResponse({"detail": "Not found."}, status=404)
-    if _requires_episode_consent(episode.patient) and not _has_active_consent(
-        membership.organization_id, episode.patient, "episodes.read"
-    ):
+    if not consent_allows(episode.patient, EPISODES_READ):
         return JsonResponse({"detail": "Consent required."}, status=403)
     AuditEvent.objects.create(
         organization=membership.organization,
@@ -211,24 +200,15 @@ def episode_timeline(request, episode_id: int):
     ).first()
     if not episode:
         return JsonResponse({"detail": "Not found."}, status=404)
-    if _requires_episode_consent(episode.patient) and not _has_active_consent(
-        membership.organization_id, episode.patient, "episodes.read"
-    ):
+    if not consent_allows(episode.patient, EPISODES_READ):
         return JsonResponse({"detail": "Consent required."}, status=403)
     events = EpisodeEvent.objects.filter(
         organization=membership.organization, episode=episode
     ).order_by("created_at", "id")
     try:
-        page = max(int(request.GET.get("page", "1")), 1)
-    except ValueError:
-        page = 1
-    try:
-        page_size = min(max(int(request.GET.get("page_size", "50")), 1), 200)
-    except ValueError:
-        page_size = 50
-    total = events.count()
-    start_index = (page - 1) * page_size
-    events = events[start_index : start_index + page_size]
+        page = paginate(request, events, ordering=("created_at", "id"))
+    except InvalidCursor:
+        return JsonResponse({"detail": "invalid cursor"}, status=400)
     payload = [
         {
             "id": event.id,
@@ -242,13 +222,12 @@ def episode_timeline(request, episode_id: int):
             "created_by": event.created_by_id,
             "created_at": event.created_at.isoformat(),
         }
-        for event in events
+        for event in page.items
     ]
-    return JsonResponse(
-        {"results": payload, "count": total, "page": page, "page_size": page_size}
-    )
+    return JsonResponse({"results": payload, **page.meta()})
 
 
+@audit_batched
 def episode_transition(request, episode_id: int):
     membership = request.membership  # type: ignore[attr-defined]
     permission = has_permission(membership.role, "episode:write")
@@ -263,28 +242,15 @@ def episode_transition(request, episode_id: int):
     to_state = str(payload.get("to_state") or payload.get("to_status") or "").strip()
     if not to_state:
         return JsonResponse({"detail": "to_state is required."}, status=400)
-    if membership.role == Role.STAFF:
-        if to_state == "cancelled":
-            return JsonResponse({"detail": "Not authorized."}, status=403)
-        if episode.status != "triage" and episode.assigned_to_id != request.user.id:
-            return JsonResponse({"detail": "Not authorized."}, status=403)
-    if membership.role != Role.ADMIN and to_state == "cancelled":
-        return JsonResponse({"detail": "Not authorized."}, status=403)
-    if to_state != "cancelled":
-        allowed = EPISODE_TRANSITIONS.get(episode.status, set())
-        if to_state not in allowed:
-            return JsonResponse({"detail": "Invalid transition."}, status=400)
+    denied = transition_denied(membership.role, request.user.id, episode, to_state)
+    if denied:
+        status, detail = denied
+        return JsonResponse({"detail": detail}, status=status)
     from_state = episode.status
     episode.status = to_state
     episode.save(update_fields=["status", "updated_at"])
     note = str(payload.get("note", ""))
-    payload_json = payload.get("payload_json") or {
-        "from_state": from_state,
-        "to_state": to_state,
-        "from_status": from_state,
-        "to_status": to_state,
-        "note": note,
-    }
+    payload_json = payload.get("payload_json") or transition_payload(from_state, to_state, note)
     EpisodeEvent.objects.create(
         organization=membership.organization,
         episode=episode,
@@ -295,25 +261,29 @@ def episode_transition(request, episode_id: int):
         note=note,
         payload_json=payload_json,
     )
-    if to_state in {"resolved", "closed", "cancelled"}:
+    if to_state in TERMINAL_EPISODE_STATES:
         open_items = WorkItem.objects.filter(
             organization=membership.organization,
             episode=episode,
             status__in=["open", "assigned"],
         )
-        now = timezone.now()
-        for item in open_items:
-            item.status = "completed"
-            item.completed_at = now
-            item.save(update_fields=["status", "completed_at"])
-            AuditEvent.objects.create(
-                organization=membership.organization,
-                actor=request.user,
-                action="work_item.auto_completed",
-                target_type="WorkItem",
-                target_id=str(item.id),
-                metadata={"episode_id": episode.id},
-            )
+        item_ids = list(open_items.values_list("id", flat=True))
+        WorkItem.objects.filter(id__in=item_ids).update(
+            status="completed", completed_at=timezone.now()
+        )
+        record_audit_events(
+            [
+                AuditEvent(
+                    organization=membership.organization,
+                    actor=request.user,
+                    action="work_item.auto_completed",
+                    target_type="WorkItem",
+                    target_id=str(item_id),
+                    metadata={"episode_id": episode.id},
+                )
+                for item_id in item_ids
+            ]
+        )
     AuditEvent.objects.create(
         organization=membership.organization,
         actor=request.user,
@@ -346,3 +316,37 @@ def episode_transition(request, episode_id: int):
             metadata={"episode_id": episode.id, "to_state": to_state},
         )
     return JsonResponse({"id": episode.id, "status": episode.status})
+
+
+@audit_batched
+def episodes_bulk_transition(request):
+    if request.method != "POST":
+        return JsonResponse({"detail": "Method not allowed."}, status=405)
+    membership = request.membership  # type: ignore[attr-defined]
+    permission = has_permission(membership.role, "episode:write")
+    if not permission.allowed:
+        return JsonResponse({"detail": "Not authorized."}, status=403)
+    payload = json.loads(request.body or "{}")
+    to_state = str(payload.get("to_state") or payload.get("to_status") or "").strip()
+    if not to_state:
+        return JsonResponse({"detail": "to_state is required."}, status=400)
+    episode_ids = payload.get("episode_ids")
+    if not isinstance(episode_ids, list) or not episode_ids:
+        return JsonResponse({"detail": "episode_ids must be a non-empty list."}, status=400)
+    try:
+        episode_ids = [int(value) for value in episode_ids]
+    except (TypeError, ValueError):
+        return JsonResponse({"detail": "episode_ids must be integers."}, status=400)
+    if len(episode_ids) > BULK_TRANSITION_LIMIT:
+        return JsonResponse(
+            {"detail": f"At most {BULK_TRANSITION_LIMIT} episodes per request."}, status=400
+        )
+    result = bulk_transition_episodes(
+        organization=membership.organization,
+        actor=request.user,
+        role=membership.role,
+        episode_ids=episode_ids,
+        to_state=to_state,
+        note=str(payload.get("note", "")),
+    )
+    return JsonResponse(result.as_dict())
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from django.http import JsonResponse, StreamingHttpResponse
+
+from ..rbac import has_permission
+from ..realtime import StreamLease, acquire_stream, event_stream, get_broker, stream_key
+
+
+class _EventStreamResponse(StreamingHttpResponse):
+    def __init__(self, lease: StreamLease, last_id: str | None) -> None:
+        super().__init__(event_stream(lease, last_id), content_type="text/event-stream")
+        self.lease = lease
+
+    def close(self) -> None:
+        self.lease.close()
+        super().close()
+
+
+async def events_stream(request):
+    membership = request.membership  # type: ignore[attr-defined]
+    permission = has_permission(membership.role, "notification:read")
+    if not permission.allowed:
+        return JsonResponse({"detail": "Not authorized."}, status=403)
+    lease = await acquire_stream(
+        get_broker(), stream_key(membership.organization_id, request.user.id)
+    )
+    if lease is None:
+        return JsonResponse({"detail": "Too many open event streams."}, status=429)
+    last_id = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+    response = _EventStreamResponse(lease, last_id)
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
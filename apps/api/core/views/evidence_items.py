@@ -6,6 +6,7 @@ from pathlib import Path
 from django.conf import settings
 from django.http import FileResponse, JsonResponse
 
+from ..audit import audit_batched
 from ..billing import check_evidence_storage_limit
 from ..models import (
     AuditEvent,
@@ -15,6 +16,7 @@ from ..models import (
     EvidenceItem,
     Patient,
 )
+from ..pagination import InvalidCursor, paginate
 from ..rbac import has_permission
 from ..storage import EvidenceStorage
 from .utils import parse_date, parse_tags
@@ -64,6 +66,7 @@ def _evidence_file_response(request, item: EvidenceItem):
     )
 
 
+@audit_batched
 def _create_evidence_from_request(request, episode: Episode | None) -> EvidenceItem | JsonResponse:
     membership = request.membership  # type: ignore[attr-defined]
     upload = request.FILES.get("file")
@@ -182,22 +185,12 @@ def evidence_list(request):
     tags_filter = parse_tags(request.GET.get("tags"))
     if tags_filter:
         items = items.filter(tags__contains=tags_filter)
-    items = items.order_by("-created_at")
     try:
-        page = max(int(request.GET.get("page", "1")), 1)
-    except ValueError:
-        page = 1
-    try:
-        page_size = min(max(int(request.GET.get("page_size", "50")), 1), 200)
-    except ValueError:
-        page_size = 50
-    total = items.count()
-    start_index = (page - 1) * page_size
-    page_items = items[start_index : start_index + page_size]
-    payload = [_evidence_payload(item) for item in page_items]
-    return JsonResponse(
-        {"results": payload, "count": total, "page": page, "page_size": page_size}
-    )
+        page = paginate(request, items, ordering=("-created_at", "-id"))
+    except InvalidCursor:
+        return JsonResponse({"detail": "invalid cursor"}, status=400)
+    payload = [_evidence_payload(item) for item in page.items]
+    return JsonResponse({"results": payload, **page.meta()})
 
 
 def evidence_detail(request, evidence_id: int):
@@ -231,16 +224,9 @@ def evidence_events(request, evidence_id: int):
         organization=membership.organization, evidence=item
     ).order_by("created_at", "id")
     try:
-        page = max(int(request.GET.get("page", "1")), 1)
-    except ValueError:
-        page = 1
-    try:
-        page_size = min(max(int(request.GET.get("page_size", "50")), 1), 200)
-    except ValueError:
-        page_size = 50
-    total = events.count()
-    start_index = (page - 1) * page_size
-    events = events[start_index : start_index + page_size]
+        page = paginate(request, events, ordering=("created_at", "id"))
+    except InvalidCursor:
+        return JsonResponse({"detail": "invalid cursor"}, status=400)
     payload = [
         {
             "id": event.id,
@@ -249,11 +235,9 @@ def evidence_events(request, evidence_id: int):
             "created_by": event.created_by_id,
             "created_at": event.created_at.isoformat(),
         }
-        for event in events
+        for event in page.items
     ]
-    return JsonResponse(
-        {"results": payload, "count": total, "page": page, "page_size": page_size}
-    )
+    return JsonResponse({"results": payload, **page.meta()})
 
 
 def evidence_link(request, evidence_id: int):
@@ -9,6 +9,7 @@ from django.utils import timezone
 
 from ..models import AuditEvent, Membership, WorkItem
 from ..notifications import create_notification
+from ..pagination import InvalidCursor, paginate
 from ..rbac import Role, has_permission
 from .utils import parse_datetime
 
@@ -59,21 +60,9 @@ def work_items_list(request):
             )
         )
     try:
-        page = max(int(request.GET.get("page", "1")), 1)
-    except ValueError:
-        page = 1
-    limit = request.GET.get("limit")
-    if limit:
-        page_size_value = limit
-    else:
-        page_size_value = request.GET.get("page_size", "50")
-    try:
-        page_size = min(max(int(page_size_value), 1), 200)
-    except ValueError:
-        page_size = 50
-    total = items.count()
-    start_index = (page - 1) * page_size
-    items = items[start_index : start_index + page_size]
+        page = paginate(request, items, ordering=("-created_at", "-id"))
+    except InvalidCursor:
+        return JsonResponse({"detail": "invalid cursor"}, status=400)
     payload = [
         {
             "id": item.id,
@@ -96,11 +85,9 @@ def work_items_list(request):
                 or (item.due_at and item.due_at <= now and item.status != "completed")
             ),
         }
-        for item in items
+        for item in page.items
     ]
-    return JsonResponse(
-        {"results": payload, "count": total, "page": page, "page_size": page_size}
-    )
+    return JsonResponse({"results": payload, **page.meta()})
 
 
 def work_item_assign(request, item_id: int):
@@ -4,6 +4,7 @@ import json
 
 from django.http import JsonResponse
 
+from ..counters import user_counters
 from ..models import AuditEvent
 from ..rbac import has_permission
 
@@ -21,6 +22,11 @@ def me(request):
     )
 
 
+def me_counters(request):
+    membership = request.membership  # type: ignore[attr-defined]
+    return JsonResponse(user_counters(membership.organization_id, request.user.id))
+
+
 def current_org(request):
     organization = request.organization  # type: ignore[attr-defined]
     if request.method in {"PATCH", "POST"}:
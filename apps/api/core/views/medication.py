@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from django.http import JsonResponse
+
+from ..adherence import adherence_breakdown, adherence_summary, empty_windows
+from ..models import MedicationAdherenceDaily, MedicationSchedule, PatientProfile
+from ..rbac import has_permission
+
+
+def org_adherence(request):
+    membership = request.membership  # type: ignore[attr-defined]
+    permission = has_permission(membership.role, "patient:read")
+    if not permission.allowed:
+        return JsonResponse({"detail": "Not authorized."}, status=403)
+    rollups = MedicationAdherenceDaily.objects.filter(organization=membership.organization)
+    return JsonResponse({"windows": adherence_summary(rollups)})
+
+
+def profile_adherence(request, profile_id: int):
+    membership = request.membership  # type: ignore[attr-defined]
+    permission = has_permission(membership.role, "patient:read")
+    if not permission.allowed:
+        return JsonResponse({"detail": "Not authorized."}, status=403)
+    profile = PatientProfile.objects.filter(
+        organization=membership.organization, id=profile_id
+    ).first()
+    if not profile:
+        return JsonResponse({"detail": "Not found."}, status=404)
+    return JsonResponse(patient_adherence_payload(profile))
+
+
+def schedule_adherence(request, schedule_id: int):
+    membership = request.membership  # type: ignore[attr-defined]
+    permission = has_permission(membership.role, "patient:read")
+    if not permission.allowed:
+        return JsonResponse({"detail": "Not authorized."}, status=403)
+    schedule = MedicationSchedule.objects.filter(
+        patient__organization=membership.organization, id=schedule_id
+    ).first()
+    if not schedule:
+        return JsonResponse({"detail": "Not found."}, status=404)
+    rollups = MedicationAdherenceDaily.objects.filter(schedule=schedule)
+    return JsonResponse(
+        {
+            "schedule_id": schedule.id,
+            "name": schedule.name,
+            "windows": adherence_summary(rollups),
+        }
+    )
+
+
+def patient_adherence_payload(profile: PatientProfile) -> dict:
+    rollups = MedicationAdherenceDaily.objects.filter(patient=profile)
+    by_schedule = adherence_breakdown(rollups, "schedule_id")
+    schedules = MedicationSchedule.objects.filter(patient=profile).order_by("id")
+    return {
+        "patient_id": profile.id,
+        "windows": adherence_summary(rollups),
+        "schedules": [
+            {
+                "schedule_id": schedule.id,
+                "name": schedule.name,
+                "windows": by_schedule.get(schedule.id) or empty_windows(),
+            }
+            for schedule in schedules
+        ],
+    }
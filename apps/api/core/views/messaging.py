@@ -2,11 +2,17 @@ from __future__ import annotations
 
 import json
 
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.http import JsonResponse
 
-from ..models import AuditEvent, Conversation, Episode, Membership, Message, MessageRead
+from ..messaging import last_read_message_id, mark_conversation_read
+from ..models import AuditEvent, Conversation, Episode, Membership, Message
+from ..pagination import InvalidCursor, paginate
 from ..rbac import has_permission
 
+MESSAGE_PREVIEW_LENGTH = 200
+
 
 def conversations_list(request):
     membership = request.membership  # type: ignore[attr-defined]
@@ -56,25 +62,67 @@ def conversations_list(request):
     permission = has_permission(membership.role, "message:read")
     if not permission.allowed:
         return JsonResponse({"detail": "Not authorized."}, status=403)
-    conversations = Conversation.objects.filter(
-        organization=membership.organization, participants=request.user
+    latest = Message.objects.filter(conversation=OuterRef("pk")).order_by("-created_at", "-id")
+    unread = (
+        Message.objects.filter(
+            conversation=OuterRef("pk"), id__gt=OuterRef("last_read_message_id")
+        )
+        .exclude(sender=request.user)
+        .order_by()
+        .values("conversation")
+        .annotate(total=Count("id"))
+        .values("total")
+    )
+    conversations = (
+        Conversation.objects.filter(
+            organization=membership.organization, participants=request.user
+        )
+        .annotate(last_read_message_id=last_read_message_id(OuterRef("pk"), request.user))
+        .annotate(
+            last_message_id=Subquery(latest.values("id")[:1]),
+            last_activity_at=Coalesce(Subquery(latest.values("created_at")[:1]), "created_at"),
+            unread_count=Coalesce(Subquery(unread), 0),
+        )
+        .prefetch_related("participants")
     )
     episode_filter = request.GET.get("episode_id")
     if episode_filter:
         conversations = conversations.filter(episode_id=episode_filter)
-    payload = [
-        {
-            "id": conversation.id,
-            "episode_id": conversation.episode_id,
-            "participants": [
-                {"id": user.id, "email": user.email, "username": user.username}
-                for user in conversation.participants.all()
-            ],
-            "created_at": conversation.created_at.isoformat(),
-        }
-        for conversation in conversations.order_by("-created_at")
+    try:
+        page = paginate(request, conversations, ordering=("-last_activity_at", "-id"))
+    except InvalidCursor:
+        return JsonResponse({"detail": "invalid cursor"}, status=400)
+    last_message_ids = [
+        conversation.last_message_id for conversation in page.items if conversation.last_message_id
     ]
-    return JsonResponse({"results": payload})
+    last_messages = Message.objects.only("id", "sender_id", "body", "created_at").in_bulk(
+        last_message_ids
+    )
+    payload = []
+    for conversation in page.items:
+        last_message = last_messages.get(conversation.last_message_id)
+        payload.append(
+            {
+                "id": conversation.id,
+                "episode_id": conversation.episode_id,
+                "participants": [
+                    {"id": user.id, "email": user.email, "username": user.username}
+                    for user in conversation.participants.all()
+                ],
+                "created_at": conversation.created_at.isoformat(),
+                "last_activity_at": conversation.last_activity_at.isoformat(),
+                "last_message": {
+                    "id": last_message.id,
+                    "sender_id": last_message.sender_id,
+                    "body": last_message.body[:MESSAGE_PREVIEW_LENGTH],
+                    "created_at": last_message.created_at.isoformat(),
+                }
+                if last_message
+                else None,
+                "unread_count": conversation.unread_count,
+            }
+        )
+    return JsonResponse({"results": payload, **page.meta()})
 
 
 def conversation_detail(request, conversation_id: int):
@@ -82,16 +130,25 @@ def conversation_detail(request, conversation_id: int):
     permission = has_permission(membership.role, "message:read")
     if not permission.allowed:
         return JsonResponse({"detail": "Not authorized."}, status=403)
-    conversation = Conversation.objects.filter(
-        organization=membership.organization,
-        id=conversation_id,
-        participants=request.user,
-    ).first()
+    conversation = (
+        Conversation.objects.filter(
+            organization=membership.organization,
+            id=conversation_id,
+            participants=request.user,
+        )
+        .annotate(last_read_message_id=last_read_message_id(OuterRef("pk"), request.user))
+        .prefetch_related("participants")
+        .first()
+    )
     if not conversation:
         return JsonResponse({"detail": "Not found."}, status=404)
     messages = Message.objects.filter(
         organization=membership.organization, conversation=conversation
-    ).order_by("created_at", "id")
+    )
+    try:
+        page = paginate(request, messages, ordering=("created_at", "id"))
+    except InvalidCursor:
+        return JsonResponse({"detail": "invalid cursor"}, status=400)
     payload = {
         "id": conversation.id,
         "episode_id": conversation.episode_id,
@@ -105,12 +162,12 @@ def conversation_detail(request, conversation_id: int):
                 "sender_id": message.sender_id,
                 "body": message.body,
                 "created_at": message.created_at.isoformat(),
-                "read": MessageRead.objects.filter(
-                    message=message, reader=request.user
-                ).exists(),
+                "read": message.id <= conversation.last_read_message_id,
             }
-            for message in messages
+            for message in page.items
         ],
+        "last_read_message_id": conversation.last_read_message_id,
+        **page.meta(),
     }
     return JsonResponse(payload)
 
@@ -168,9 +225,41 @@ def message_mark_read(request, message_id: int):
         id=request.user.id
     ).exists():
         return JsonResponse({"detail": "Not found."}, status=404)
-    read, _ = MessageRead.objects.get_or_create(
+    state = mark_conversation_read(message.conversation, request.user, message.id)
+    return JsonResponse({"id": message.id, "read_at": state.read_at.isoformat()})
+
+
+def conversation_mark_read(request, conversation_id: int):
+    if request.method != "POST":
+        return JsonResponse({"detail": "Method not allowed."}, status=405)
+    membership = request.membership  # type: ignore[attr-defined]
+    permission = has_permission(membership.role, "message:read")
+    if not permission.allowed:
+        return JsonResponse({"detail": "Not authorized."}, status=403)
+    conversation = Conversation.objects.filter(
         organization=membership.organization,
-        message=message,
-        reader=request.user,
+        id=conversation_id,
+        participants=request.user,
+    ).first()
+    if not conversation:
+        return JsonResponse({"detail": "Not found."}, status=404)
+    payload = json.loads(request.body or "{}")
+    messages = Message.objects.filter(conversation=conversation)
+    if payload.get("message_id") is not None:
+        try:
+            messages = messages.filter(id=int(payload["message_id"]))
+        except (TypeError, ValueError):
+            return JsonResponse({"detail": "message_id must be an integer"}, status=400)
+    up_to = messages.order_by("-id").values_list("id", flat=True).first()
+    if up_to is None:
+        if payload.get("message_id") is not None:
+            return JsonResponse({"detail": "message not found"}, status=404)
+        up_to = 0
+    state = mark_conversation_read(conversation, request.user, up_to)
+    return JsonResponse(
+        {
+            "conversation_id": conversation.id,
+            "last_read_message_id": state.last_read_message_id,
+            "read_at": state.read_at.isoformat() if state.read_at else None,
+        }
     )
-    return JsonResponse({"id": message.id, "read_at": read.read_at.isoformat()})
@@ -3,7 +3,10 @@ from __future__ import annotations
 from django.http import JsonResponse
 from django.utils import timezone
 
+from ..counters import mark_all_notifications_read
 from ..models import AuditEvent, Notification
+from ..notifications import notification_payload
+from ..pagination import InvalidCursor, paginate
 from ..rbac import has_permission
 
 
@@ -19,39 +22,11 @@ def notifications_list(request):
     if unread_filter in {"1", "true", "True"}:
         notifications = notifications.filter(unread=True)
     try:
-        page = max(int(request.GET.get("page", "1")), 1)
-    except ValueError:
-        page = 1
-    limit = request.GET.get("limit")
-    if limit:
-        page_size_value = limit
-    else:
-        page_size_value = request.GET.get("page_size", "50")
-    try:
-        page_size = min(max(int(page_size_value), 1), 200)
-    except ValueError:
-        page_size = 50
-    total = notifications.count()
-    start_index = (page - 1) * page_size
-    notifications = notifications[start_index : start_index + page_size]
-    payload = [
-        {
-            "id": notification.id,
-            "kind": notification.kind,
-            "title": notification.title,
-            "body": notification.body,
-            "url": notification.url,
-            "unread": notification.unread,
-            "read_at": notification.read_at.isoformat()
-            if notification.read_at
-            else None,
-            "created_at": notification.created_at.isoformat(),
-        }
-        for notification in notifications
-    ]
-    return JsonResponse(
-        {"results": payload, "count": total, "page": page, "page_size": page_size}
-    )
+        page = paginate(request, notifications, ordering=("-created_at", "-id"))
+    except InvalidCursor:
+        return JsonResponse({"detail": "invalid cursor"}, status=400)
+    payload = [notification_payload(notification) for notification in page.items]
+    return JsonResponse({"results": payload, **page.meta()})
 
 
 def notification_mark_read(request, notification_id: int):
@@ -86,3 +61,23 @@ def notification_mark_read(request, notification_id: int):
             else None,
         }
     )
+
+
+def notifications_mark_all_read(request):
+    if request.method != "POST":
+        return JsonResponse({"detail": "Method not allowed."}, status=405)
+    membership = request.membership  # type: ignore[attr-defined]
+    permission = has_permission(membership.role, "notification:write")
+    if not permission.allowed:
+        return JsonResponse({"detail": "Not authorized."}, status=403)
+    updated = mark_all_notifications_read(membership.organization_id, request.user.id)
+    if updated:
+        AuditEvent.objects.create(
+            organization=membership.organization,
+            actor=request.user,
+            action="notification.read_all",
+            target_type="User",
+            target_id=str(request.user.id),
+            metadata={"count": updated},
+        )
+    return JsonResponse({"updated": updated})
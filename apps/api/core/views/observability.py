@@ -1,16 +1,45 @@
 from __future__ import annotations
 
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 
 from careos_api.observability import metrics
 
+from ..tenancy import membership_cache
+from ..tokens import token_cache
+
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _wants_prometheus(request) -> bool:
+    if request.GET.get("format") == "prometheus":
+        return True
+    accept = request.headers.get("Accept", "")
+    return "text/plain" in accept or "application/openmetrics-text" in accept
+
 
 def metrics_snapshot(request):
+    if _wants_prometheus(request):
+        return HttpResponse(metrics.render_prometheus(), content_type=PROMETHEUS_CONTENT_TYPE)
     snapshot = metrics.snapshot()
+    cache_stats = membership_cache.stats()
+    token_stats = token_cache.stats()
     return JsonResponse(
         {
             "total_requests": snapshot.total_requests,
             "last_duration_ms": snapshot.last_duration_ms,
+            "membership_cache": {
+                "hits": cache_stats.hits,
+                "misses": cache_stats.misses,
+                "invalidations": cache_stats.invalidations,
+                "size": cache_stats.size,
+            },
+            "token_cache": {
+                "hits": token_stats.hits,
+                "misses": token_stats.misses,
+                "invalidations": token_stats.invalidations,
+                "size": token_stats.size,
+            },
         }
     )
 
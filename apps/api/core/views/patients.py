@@ -4,10 +4,12 @@ import json
 import os
 import secrets
 from datetime import datetime, timedelta
+from pathlib import Path
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from django.http import JsonResponse
 from django.utils import timezone
 
@@ -19,21 +21,46 @@ from ..models import (
     Episode,
     EpisodeEvent,
     Feedback,
-    MedicationDoseEvent,
     MedicationSchedule,
     Organization,
     Patient,
     PatientAddress,
     PatientContactMethod,
+    PatientDuplicateCandidate,
     PatientIdentifier,
+    PatientImportJob,
     PatientOTP,
     PatientProfile,
     PatientToken,
     WorkItem,
 )
+from ..consent import EPISODES_READ, consent_allows
+from ..medication import confirm_dose
+from ..merge import merge_patients, resolve_patient
+from ..outbox import enqueue
+from ..pagination import InvalidCursor, paginate
+from ..patient_import import CONFLICT_POLICIES, IMPORT_FORMATS
 from ..rbac import has_permission
+from ..search import SEARCH_ORDERING, search_patients
 from ..security import rate_limit_or_429
-from .utils import normalize_nhs_number, parse_date, parse_datetime, validate_nhs_number
+from ..tasks import run_patient_import_task
+from ..tokens import (
+    authenticate,
+    bearer_token,
+    issue_expiry,
+    new_token,
+    revoke_tokens,
+)
+from .medication import patient_adherence_payload
+from .utils import (
+    clean_address,
+    clean_contact,
+    clean_identifier,
+    normalize_nhs_number,
+    parse_date,
+    parse_datetime,
+    validate_nhs_number,
+)
 
 
 def patients_list(request):
@@ -77,10 +104,8 @@ def patients_list(request):
             addresses=payload.get("addresses"),
             contacts=payload.get("contacts"),
         )
-        return JsonResponse(
-            _patient_payload(patient, include_profiles=True),
-            status=201,
-        )
+        prefetch_related_objects([patient], *_profile_prefetches(PROFILE_INCLUDES))
+        return JsonResponse(_patient_payload(patient, PROFILE_INCLUDES), status=201)
 
     permission = has_permission(membership.role, "patient:read")
     if not permission.allowed:
@@ -88,35 +113,25 @@ def patients_list(request):
     patients = Patient.objects.filter(
         organization=membership.organization, merged_into=None
     )
+    include = _parse_include(request)
+    patients = patients.prefetch_related(*_profile_prefetches(include))
+    ordering: tuple[str, ...] = ("family_name", "given_name", "id")
     search = request.GET.get("search", "").strip()
     if search:
-        patients = patients.filter(
-            models.Q(given_name__icontains=search)
-            | models.Q(family_name__icontains=search)
-            | models.Q(nhs_number__icontains=search)
-            | models.Q(phone__icontains=search)
-            | models.Q(email__icontains=search)
-        )
+        patients = search_patients(membership.organization, patients, search)
+        ordering = SEARCH_ORDERING
     try:
-        page = max(int(request.GET.get("page", "1")), 1)
-    except ValueError:
-        page = 1
-    try:
-        page_size = min(max(int(request.GET.get("page_size", "20")), 1), 100)
-    except ValueError:
-        page_size = 20
-    total = patients.count()
-    start = (page - 1) * page_size
-    patients = patients.order_by("family_name", "given_name")[
-        start : start + page_size
-    ]
-    payload = [
-        _patient_payload(patient)
-        for patient in patients
-    ]
-    return JsonResponse(
-        {"results": payload, "count": total, "page": page, "page_size": page_size}
-    )
+        page = paginate(
+            request,
+            patients,
+            ordering=ordering,
+            default_page_size=20,
+            max_page_size=100,
+        )
+    except InvalidCursor:
+        return JsonResponse({"detail": "invalid cursor"}, status=400)
+    payload = [_patient_payload(patient, include) for patient in page.items]
+    return JsonResponse({"results": payload, **page.meta()})
 
 
 def patient_detail(request, patient_id: int):
@@ -129,9 +144,12 @@ def patient_detail(request, patient_id: int):
         permission = has_permission(membership.role, "patient:read")
         if not permission.allowed:
             return JsonResponse({"detail": "Not authorized."}, status=403)
-    patient = Patient.objects.filter(
-        organization=membership.organization, id=patient_id, merged_into=None
-    ).first()
+    if request.method == "PATCH":
+        patient = Patient.objects.filter(
+            organization=membership.organization, id=patient_id, merged_into=None
+        ).first()
+    else:
+        patient = resolve_patient(membership.organization, patient_id)
     if not patient:
         return JsonResponse({"detail": "Not found."}, status=404)
     if request.method == "PATCH":
@@ -175,9 +193,13 @@ def patient_detail(request, patient_id: int):
             addresses=payload.get("addresses"),
             contacts=payload.get("contacts"),
         )
-        return JsonResponse(_patient_payload(patient, include_profiles=True))
 
-    return JsonResponse(_patient_payload(patient, include_profiles=True))
+    include = _parse_include(request, default=PROFILE_INCLUDES)
+    prefetch_related_objects([patient], *_profile_prefetches(include))
+    payload = _patient_payload(patient, include)
+    if patient.id != patient_id:
+        payload["resolved_from_id"] = patient_id
+    return JsonResponse(payload)
 
 
 def patient_search(request):
@@ -189,31 +211,180 @@ def patient_search(request):
     patients = Patient.objects.filter(
         organization=membership.organization, merged_into=None
     )
+    include = _parse_include(request)
+    patients = patients.prefetch_related(*_profile_prefetches(include))
+    ordering: tuple[str, ...] = ("family_name", "given_name", "id")
     if query:
-        patients = patients.filter(
-            models.Q(given_name__icontains=query)
-            | models.Q(family_name__icontains=query)
-            | models.Q(nhs_number__icontains=query)
-            | models.Q(phone__icontains=query)
-            | models.Q(email__icontains=query)
-        )
+        patients = search_patients(membership.organization, patients, query)
+        ordering = SEARCH_ORDERING
     try:
-        page = max(int(request.GET.get("page", "1")), 1)
-    except ValueError:
-        page = 1
+        page = paginate(
+            request,
+            patients,
+            ordering=ordering,
+            default_page_size=20,
+            max_page_size=100,
+        )
+    except InvalidCursor:
+        return JsonResponse({"detail": "invalid cursor"}, status=400)
+    payload = [_patient_payload(patient, include) for patient in page.items]
+    return JsonResponse({"results": payload, **page.meta()})
+
+
+def patient_imports(request):
+    membership = request.membership  # type: ignore[attr-defined]
+    permission = has_permission(membership.role, "patient:import")
+    if not permission.allowed:
+        return JsonResponse({"detail": "Not authorized."}, status=403)
+    if request.method == "POST":
+        upload = request.FILES.get("file")
+        if not upload:
+            return JsonResponse({"detail": "file is required"}, status=400)
+        source_format = str(request.POST.get("format", "")).strip().lower()
+        if not source_format:
+            source_format = "ndjson" if upload.name.endswith((".ndjson", ".jsonl")) else "csv"
+        if source_format not in IMPORT_FORMATS:
+            return JsonResponse({"detail": "format must be csv or ndjson"}, status=400)
+        conflict_policy = str(request.POST.get("conflict", "skip")).strip().lower()
+        if conflict_policy not in CONFLICT_POLICIES:
+            return JsonResponse({"detail": "conflict must be skip or update"}, status=400)
+        job = PatientImportJob.objects.create(
+            organization=membership.organization,
+            requested_by=request.user,
+            source_format=source_format,
+            conflict_policy=conflict_policy,
+        )
+        storage_dir = Path(settings.IMPORT_STORAGE_DIR)
+        storage_dir.mkdir(parents=True, exist_ok=True)
+        path = storage_dir / f"import_{job.id}.{source_format}"
+        with path.open("wb") as handle:
+            for chunk in upload.chunks():
+                handle.write(chunk)
+        job.file_path = str(path)
+        job.save(update_fields=["file_path"])
+        AuditEvent.objects.create(
+            organization=membership.organization,
+            actor=request.user,
+            action="patient.import.requested",
+            target_type="PatientImportJob",
+            target_id=str(job.id),
+            metadata={"format": source_format, "conflict": conflict_policy},
+        )
+        enqueue(run_patient_import_task, job.id, dedupe_key=f"patient-import:{job.id}")
+        return JsonResponse(_import_job_payload(job), status=202)
+
+    jobs = PatientImportJob.objects.filter(organization=membership.organization)
     try:
-        page_size = min(max(int(request.GET.get("page_size", "20")), 1), 100)
-    except ValueError:
-        page_size = 20
-    total = patients.count()
-    start = (page - 1) * page_size
-    patients = patients.order_by("family_name", "given_name")[
-        start : start + page_size
-    ]
-    payload = [_patient_payload(patient) for patient in patients]
+        page = paginate(request, jobs, ordering=("-created_at", "-id"))
+    except InvalidCursor:
+        return JsonResponse({"detail": "invalid cursor"}, status=400)
     return JsonResponse(
-        {"results": payload, "count": total, "page": page, "page_size": page_size}
+        {"results": [_import_job_payload(job) for job in page.items], **page.meta()}
+    )
+
+
+def patient_import_detail(request, import_id: int):
+    membership = request.membership  # type: ignore[attr-defined]
+    permission = has_permission(membership.role, "patient:import")
+    if not permission.allowed:
+        return JsonResponse({"detail": "Not authorized."}, status=403)
+    job = PatientImportJob.objects.filter(
+        organization=membership.organization, id=import_id
+    ).first()
+    if not job:
+        return JsonResponse({"detail": "Not found."}, status=404)
+    return JsonResponse(_import_job_payload(job, include_errors=True))
+
+
+def patient_duplicates(request):
+    membership = request.membership  # type: ignore[attr-defined]
+    permission = has_permission(membership.role, "patient:merge")
+    if not permission.allowed:
+        return JsonResponse({"detail": "Not authorized."}, status=403)
+    status = request.GET.get("status", "open").strip() or "open"
+    candidates = PatientDuplicateCandidate.objects.filter(
+        organization=membership.organization,
+        status=status,
+        patient__merged_into=None,
+        candidate__merged_into=None,
+    ).select_related("patient", "candidate")
+    patient_id = request.GET.get("patient_id")
+    if patient_id:
+        if not patient_id.isdigit():
+            return JsonResponse({"detail": "patient_id must be an integer"}, status=400)
+        candidates = candidates.filter(
+            models.Q(patient_id=patient_id) | models.Q(candidate_id=patient_id)
+        )
+    min_score = request.GET.get("min_score")
+    if min_score:
+        try:
+            candidates = candidates.filter(score__gte=float(min_score))
+        except ValueError:
+            return JsonResponse({"detail": "min_score must be a number"}, status=400)
+    try:
+        page = paginate(request, candidates, ordering=("-score", "id"))
+    except InvalidCursor:
+        return JsonResponse({"detail": "invalid cursor"}, status=400)
+    payload = [_duplicate_payload(candidate) for candidate in page.items]
+    return JsonResponse({"results": payload, **page.meta()})
+
+
+def patient_duplicate_dismiss(request, candidate_id: int):
+    membership = request.membership  # type: ignore[attr-defined]
+    permission = has_permission(membership.role, "patient:merge")
+    if not permission.allowed:
+        return JsonResponse({"detail": "Not authorized."}, status=403)
+    if request.method != "POST":
+        return JsonResponse({"detail": "Method not allowed."}, status=405)
+    candidate = PatientDuplicateCandidate.objects.filter(
+        organization=membership.organization, id=candidate_id
+    ).select_related("patient", "candidate").first()
+    if not candidate:
+        return JsonResponse({"detail": "Not found."}, status=404)
+    candidate.status = "dismissed"
+    candidate.save(update_fields=["status", "updated_at"])
+    AuditEvent.objects.create(
+        organization=membership.organization,
+        actor=request.user,
+        action="patient.duplicate.dismissed",
+        target_type="PatientDuplicateCandidate",
+        target_id=str(candidate.id),
+        metadata={"patient_id": candidate.patient_id, "candidate_id": candidate.candidate_id},
     )
+    return JsonResponse(_duplicate_payload(candidate))
+
+
+def _duplicate_payload(candidate: PatientDuplicateCandidate) -> dict:
+    return {
+        "id": candidate.id,
+        "score": candidate.score,
+        "reasons": candidate.reasons,
+        "status": candidate.status,
+        "patient": _patient_payload(candidate.patient),
+        "candidate": _patient_payload(candidate.candidate),
+        "updated_at": candidate.updated_at.isoformat(),
+    }
+
+
+def _import_job_payload(job: PatientImportJob, include_errors: bool = False) -> dict:
+    payload = {
+        "id": job.id,
+        "status": job.status,
+        "format": job.source_format,
+        "conflict": job.conflict_policy,
+        "total_rows": job.total_rows,
+        "created": job.created_count,
+        "updated": job.updated_count,
+        "skipped": job.skipped_count,
+        "errors": job.error_count,
+        "rows_per_second": job.rows_per_second,
+        "created_at": job.created_at.isoformat(),
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+    if include_errors:
+        payload["row_errors"] = job.errors
+    return payload
 
 
 def patient_episodes(request, patient_id: int):
@@ -221,14 +392,10 @@ def patient_episodes(request, patient_id: int):
     permission = has_permission(membership.role, "patient:read")
     if not permission.allowed:
         return JsonResponse({"detail": "Not authorized."}, status=403)
-    patient = Patient.objects.filter(
-        organization=membership.organization, id=patient_id, merged_into=None
-    ).first()
+    patient = resolve_patient(membership.organization, patient_id)
     if not patient:
         return JsonResponse({"detail": "Not found."}, status=404)
-    if _requires_episode_consent(patient) and not _has_active_consent(
-        patient, "episodes.read"
-    ):
+    if not consent_allows(patient, EPISODES_READ):
         return JsonResponse({"detail": "Consent required."}, status=403)
     episodes = Episode.objects.filter(
         organization=membership.organization, patient=patient
@@ -246,7 +413,30 @@ def patient_episodes(request, patient_id: int):
     return JsonResponse({"results": payload})
 
 
-def _patient_payload(patient: Patient, include_profiles: bool = False) -> dict:
+PROFILE_INCLUDES = ("identifiers", "addresses", "contacts")
+
+
+def _parse_include(request, default: tuple[str, ...] = ()) -> tuple[str, ...]:
+    raw_value = request.GET.get("include")
+    if raw_value is None:
+        return default
+    requested = {item.strip() for item in raw_value.split(",")}
+    return tuple(name for name in PROFILE_INCLUDES if name in requested)
+
+
+def _profile_prefetches(include: tuple[str, ...]) -> list[Prefetch]:
+    models_by_include = {
+        "identifiers": PatientIdentifier,
+        "addresses": PatientAddress,
+        "contacts": PatientContactMethod,
+    }
+    return [
+        Prefetch(name, queryset=models_by_include[name].objects.order_by("id"))
+        for name in include
+    ]
+
+
+def _patient_payload(patient: Patient, include: tuple[str, ...] = ()) -> dict:
     payload = {
         "id": patient.id,
         "given_name": patient.given_name,
@@ -267,45 +457,94 @@ def _patient_payload(patient: Patient, include_profiles: bool = False) -> dict:
         "created_at": patient.created_at.isoformat(),
         "updated_at": patient.updated_at.isoformat(),
     }
-    if not include_profiles:
-        return payload
-    payload["identifiers"] = [
-        {
-            "id": item.id,
-            "kind": item.kind,
-            "value": item.value,
-            "system": item.system,
-            "is_primary": item.is_primary,
-        }
-        for item in PatientIdentifier.objects.filter(patient=patient).order_by("id")
-    ]
-    payload["addresses"] = [
-        {
-            "id": item.id,
-            "address_type": item.address_type,
-            "line1": item.line1,
-            "line2": item.line2,
-            "city": item.city,
-            "region": item.region,
-            "postal_code": item.postal_code,
-            "country": item.country,
-            "is_primary": item.is_primary,
-        }
-        for item in PatientAddress.objects.filter(patient=patient).order_by("id")
-    ]
-    payload["contacts"] = [
-        {
-            "id": item.id,
-            "kind": item.kind,
-            "value": item.value,
-            "notes": item.notes,
-            "is_primary": item.is_primary,
-        }
-        for item in PatientContactMethod.objects.filter(patient=patient).order_by("id")
-    ]
+    if "identifiers" in include:
+        payload["identifiers"] = [
+            {
+                "id": item.id,
+                "kind": item.kind,
+                "value": item.value,
+                "system": item.system,
+                "is_primary": item.is_primary,
+            }
+            for item in patient.identifiers.all()
+        ]
+    if "addresses" in include:
+        payload["addresses"] = [
+            {
+                "id": item.id,
+                "address_type": item.address_type,
+                "line1": item.line1,
+                "line2": item.line2,
+                "city": item.city,
+                "region": item.region,
+                "postal_code": item.postal_code,
+                "country": item.country,
+                "is_primary": item.is_primary,
+            }
+            for item in patient.addresses.all()
+        ]
+    if "contacts" in include:
+        payload["contacts"] = [
+            {
+                "id": item.id,
+                "kind": item.kind,
+                "value": item.value,
+                "notes": item.notes,
+                "is_primary": item.is_primary,
+            }
+            for item in patient.contacts.all()
+        ]
     return payload
 
 
+def _sync_profile_rows(patient: Patient, model, entries, clean) -> None:  # type: ignore[no-untyped-def]
+    existing = {row.id: row for row in model.objects.filter(patient=patient).order_by("id")}
+    fields: list[str] = []
+    by_values: dict[tuple, list] = {}
+    keep: set[int] = set()
+    to_update = []
+    to_create = []
+    for entry in entries or []:
+        values = clean(entry)
+        if values is None:
+            continue
+        fields = list(values)
+        if not by_values:
+            for row in existing.values():
+                key = tuple(getattr(row, field) for field in fields)
+                by_values.setdefault(key, []).append(row)
+        try:
+            row = existing.get(int(entry.get("id") or 0))
+        except (TypeError, ValueError):
+            row = None
+        if row is None or row.id in keep:
+            candidates = [
+                candidate
+                for candidate in by_values.get(tuple(values.values()), [])
+                if candidate.id not in keep
+            ]
+            row = candidates[0] if candidates else None
+        if row is None:
+            to_create.append(
+                model(organization=patient.organization, patient=patient, **values)
+            )
+            continue
+        keep.add(row.id)
+        changed = [field for field in fields if getattr(row, field) != values[field]]
+        if changed:
+            for field in changed:
+                setattr(row, field, values[field])
+            to_update.append(row)
+    stale = set(existing) - keep
+    if stale:
+        model.objects.filter(id__in=stale).delete()
+    if to_update:
+        model.objects.bulk_update(to_update, fields)
+    if to_create:
+        model.objects.bulk_create(to_create)
+
+
+@transaction.atomic
 def _replace_patient_profiles(
     patient: Patient,
     identifiers=None,
@@ -313,68 +552,11 @@ def _replace_patient_profiles(
     contacts=None,
 ) -> None:
     if identifiers is not None:
-        PatientIdentifier.objects.filter(patient=patient).delete()
-        for entry in identifiers or []:
-            kind = str(entry.get("kind", "")).strip()
-            value = str(entry.get("value", "")).strip()
-            if not kind or not value:
-                continue
-            PatientIdentifier.objects.create(
-                organization=patient.organization,
-                patient=patient,
-                kind=kind,
-                value=value,
-                system=str(entry.get("system", "")).strip(),
-                is_primary=bool(entry.get("is_primary", False)),
-            )
+        _sync_profile_rows(patient, PatientIdentifier, identifiers, clean_identifier)
     if addresses is not None:
-        PatientAddress.objects.filter(patient=patient).delete()
-        for entry in addresses or []:
-            line1 = str(entry.get("line1", "")).strip()
-            if not line1:
-                continue
-            PatientAddress.objects.create(
-                organization=patient.organization,
-                patient=patient,
-                address_type=str(entry.get("address_type", "home")).strip() or "home",
-                line1=line1,
-                line2=str(entry.get("line2", "")).strip(),
-                city=str(entry.get("city", "")).strip(),
-                region=str(entry.get("region", "")).strip(),
-                postal_code=str(entry.get("postal_code", "")).strip(),
-                country=str(entry.get("country", "")).strip(),
-                is_primary=bool(entry.get("is_primary", False)),
-            )
+        _sync_profile_rows(patient, PatientAddress, addresses, clean_address)
     if contacts is not None:
-        PatientContactMethod.objects.filter(patient=patient).delete()
-        for entry in contacts or []:
-            kind = str(entry.get("kind", "")).strip()
-            value = str(entry.get("value", "")).strip()
-            if not kind or not value:
-                continue
-            PatientContactMethod.objects.create(
-                organization=patient.organization,
-                patient=patient,
-                kind=kind,
-                value=value,
-                notes=str(entry.get("notes", "")).strip(),
-                is_primary=bool(entry.get("is_primary", False)),
-            )
-
-
-def _requires_episode_consent(patient: Patient) -> bool:
-    return bool(patient.restricted)
-
-
-def _has_active_consent(patient: Patient, scope: str) -> bool:
-    now = timezone.now()
-    return ConsentRecord.objects.filter(
-        organization=patient.organization,
-        patient=patient,
-        scope=scope,
-        granted=True,
-        revoked_at__isnull=True,
-    ).filter(models.Q(expires_at__isnull=True) | models.Q(expires_at__gte=now)).exists()
+        _sync_profile_rows(patient, PatientContactMethod, contacts, clean_contact)
 
 
 def patient_care_circle(request, patient_id: int):
@@ -593,46 +775,40 @@ def patient_merge(request, patient_id: int):
     if not target:
         return JsonResponse({"detail": "Not found."}, status=404)
     payload = json.loads(request.body or "{}")
-    source_id = payload.get("source_id")
-    if not source_id:
+    raw_ids = payload.get("source_ids")
+    if raw_ids is None:
+        raw_ids = [payload["source_id"]] if payload.get("source_id") else []
+    try:
+        source_ids = {int(source_id) for source_id in raw_ids}
+    except (TypeError, ValueError):
+        return JsonResponse({"detail": "source_ids must be integers"}, status=400)
+    if not source_ids:
         return JsonResponse({"detail": "source_id is required"}, status=400)
-    if int(source_id) == target.id:
+    if target.id in source_ids:
         return JsonResponse({"detail": "source_id must differ from target"}, status=400)
-    source = Patient.objects.filter(
-        organization=membership.organization, id=source_id, merged_into=None
-    ).first()
-    if not source:
-        return JsonResponse({"detail": "source not found"}, status=404)
-    source.merged_into = target
-    source.merged_at = timezone.now()
-    source.save(update_fields=["merged_into", "merged_at"])
-    Episode.objects.filter(organization=membership.organization, patient=source).update(
-        patient=target
+    sources = list(
+        Patient.objects.filter(
+            organization=membership.organization, id__in=source_ids, merged_into=None
+        )
     )
-    AuditEvent.objects.create(
-        organization=membership.organization,
-        actor=request.user,
-        action="patient.merged",
-        target_type="Patient",
-        target_id=str(target.id),
-        metadata={"source_id": source.id},
+    if len(sources) != len(source_ids):
+        return JsonResponse({"detail": "source not found"}, status=404)
+    result = merge_patients(
+        target, sources, actor=request.user, dry_run=bool(payload.get("dry_run"))
     )
-    return JsonResponse({"id": target.id, "merged_source_id": source.id})
+    response = result.as_dict()
+    if len(sources) == 1:
+        response["merged_source_id"] = sources[0].id
+    return JsonResponse(response)
 
 
 def _get_patient_token(request):
-    auth_header = request.headers.get("Authorization", "")
-    if not auth_header.startswith("Bearer "):
-        return None
-    token_value = auth_header.replace("Bearer ", "").strip()
-    return PatientToken.objects.select_related("patient").filter(
-        token=token_value
-    ).first()
+    return authenticate(PatientToken, bearer_token(request), "patient")
 
 
 def _require_patient(request):
     token = _get_patient_token(request)
-    if not token or token.expires_at < timezone.now():
+    if not token:
         return None
     return token.patient
 
@@ -709,11 +885,11 @@ def patient_verify_otp(request):
     if patient.phone != phone:
         patient.phone = phone
         patient.save(update_fields=["phone"])
-    token_value = secrets.token_hex(32)
+    token_value, token_hash = new_token()
     token = PatientToken.objects.create(
         patient=patient,
-        token=token_value,
-        expires_at=timezone.now() + timedelta(days=7),
+        token_hash=token_hash,
+        expires_at=issue_expiry(PatientToken),
     )
     AuditEvent.objects.create(
         organization=patient.organization,
@@ -723,7 +899,24 @@ def patient_verify_otp(request):
         target_id=str(token.id),
         metadata={"phone": phone},
     )
-    return JsonResponse({"token": token.token, "patient_id": patient.id})
+    return JsonResponse({"token": token_value, "patient_id": patient.id})
+
+
+def patient_logout(request):
+    if request.method != "POST":
+        return JsonResponse({"detail": "Method not allowed."}, status=405)
+    token = _get_patient_token(request)
+    if not token:
+        return JsonResponse({"detail": "Unauthorized"}, status=401)
+    revoke_tokens(PatientToken.objects.filter(pk=token.pk))
+    AuditEvent.objects.create(
+        organization_id=token.patient.organization_id,
+        actor=None,
+        action="patient.logout",
+        target_type="PatientToken",
+        target_id=str(token.id),
+    )
+    return JsonResponse({"status": "logged_out"})
 
 
 def patient_schedules_list(request):
@@ -838,15 +1031,17 @@ def patient_schedule_confirm(request, schedule_id: int):
         return JsonResponse(
             {"detail": "scheduled_for must be ISO timestamp"}, status=400
         )
-    event = MedicationDoseEvent.objects.create(
-        patient=patient,
-        schedule=schedule,
-        status=status,
-        scheduled_for=scheduled_for,
-    )
+    event = confirm_dose(patient, schedule, status, scheduled_for)
     return JsonResponse({"id": event.id, "status": event.status})
 
 
+def patient_adherence(request):
+    patient = _require_patient(request)
+    if not patient:
+        return JsonResponse({"detail": "Unauthorized"}, status=401)
+    return JsonResponse(patient_adherence_payload(patient))
+
+
 def patient_feedback(request):
     patient = _require_patient(request)
     if not patient:
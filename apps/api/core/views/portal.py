@@ -1,9 +1,7 @@
 from __future__ import annotations
 
 import json
-import secrets
 import hashlib
-from datetime import timedelta
 
 from django.http import JsonResponse
 from django.utils import timezone
@@ -18,23 +16,14 @@ from ..models import (
     PortalNotification,
     PortalSession,
 )
+from ..pagination import InvalidCursor, paginate
 from .utils import parse_datetime
 from ..security import rate_limit_or_429
+from ..tokens import authenticate, bearer_token, issue_expiry, new_token, revoke_tokens
 
 
 def _get_portal_session(request) -> PortalSession | None:
-    auth_header = request.headers.get("Authorization", "")
-    if not auth_header.startswith("Bearer "):
-        return None
-    token_value = auth_header.replace("Bearer ", "").strip()
-    session = PortalSession.objects.filter(token=token_value).select_related(
-        "patient", "organization"
-    ).first()
-    if not session:
-        return None
-    if session.expires_at < timezone.now():
-        return None
-    return session
+    return authenticate(PortalSession, bearer_token(request), "patient", "organization")
 
 
 def portal_accept_invite(request):
@@ -61,13 +50,13 @@ def portal_accept_invite(request):
     if not invite.accepted_at:
         invite.accepted_at = timezone.now()
         invite.save(update_fields=["accepted_at"])
-    session_token = secrets.token_hex(32)
+    session_token, token_hash = new_token()
     session = PortalSession.objects.create(
         organization=invite.organization,
         patient=invite.patient,
         role=invite.role,
-        token=session_token,
-        expires_at=timezone.now() + timedelta(hours=24),
+        token_hash=token_hash,
+        expires_at=issue_expiry(PortalSession),
     )
     AuditEvent.objects.create(
         organization=invite.organization,
@@ -78,7 +67,7 @@ def portal_accept_invite(request):
     )
     return JsonResponse(
         {
-            "token": session.token,
+            "token": session_token,
             "role": session.role,
             "patient_id": session.patient_id,
             "organization_id": session.organization_id,
@@ -111,13 +100,13 @@ def portal_login(request):
         return JsonResponse({"detail": "No invite found"}, status=404)
     if invite.expires_at < timezone.now():
         return JsonResponse({"detail": "Invite expired"}, status=400)
-    session_token = secrets.token_hex(32)
+    session_token, token_hash = new_token()
     session = PortalSession.objects.create(
         organization=invite.organization,
         patient=invite.patient,
         role=invite.role,
-        token=session_token,
-        expires_at=timezone.now() + timedelta(hours=24),
+        token_hash=token_hash,
+        expires_at=issue_expiry(PortalSession),
     )
     AuditEvent.objects.create(
         organization=invite.organization,
@@ -128,7 +117,7 @@ def portal_login(request):
     )
     return JsonResponse(
         {
-            "token": session.token,
+            "token": session_token,
             "role": session.role,
             "patient_id": session.patient_id,
             "organization_id": session.organization_id,
@@ -137,6 +126,23 @@ def portal_login(request):
     )
 
 
+def portal_logout(request):
+    if request.method != "POST":
+        return JsonResponse({"detail": "Method not allowed."}, status=405)
+    session = _get_portal_session(request)
+    if not session:
+        return JsonResponse({"detail": "Unauthorized"}, status=401)
+    revoke_tokens(PortalSession.objects.filter(pk=session.pk))
+    AuditEvent.objects.create(
+        organization=session.organization,
+        actor=None,
+        action="portal.logout",
+        target_type="PortalSession",
+        target_id=str(session.id),
+    )
+    return JsonResponse({"status": "logged_out"})
+
+
 def portal_me(request):
     session = _get_portal_session(request)
     if not session:
@@ -223,16 +229,9 @@ def portal_notifications(request):
     if unread_only in {"1", "true", "True"}:
         notifications = notifications.filter(unread=True)
     try:
-        page = max(int(request.GET.get("page", "1")), 1)
-    except ValueError:
-        page = 1
-    try:
-        page_size = min(max(int(request.GET.get("page_size", "50")), 1), 200)
-    except ValueError:
-        page_size = 50
-    total = notifications.count()
-    start_index = (page - 1) * page_size
-    notifications = notifications[start_index : start_index + page_size]
+        page = paginate(request, notifications, ordering=("-created_at", "-id"))
+    except InvalidCursor:
+        return JsonResponse({"detail": "invalid cursor"}, status=400)
     payload = [
         {
             "id": item.id,
@@ -244,11 +243,9 @@ def portal_notifications(request):
             "read_at": item.read_at.isoformat() if item.read_at else None,
             "created_at": item.created_at.isoformat(),
         }
-        for item in notifications
+        for item in page.items
     ]
-    return JsonResponse(
-        {"results": payload, "count": total, "page": page, "page_size": page_size}
-    )
+    return JsonResponse({"results": payload, **page.meta()})
 
 
 def portal_notification_mark_read(request, notification_id: int):
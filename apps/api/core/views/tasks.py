@@ -8,6 +8,7 @@ from django.http import JsonResponse
 from django.utils import timezone
 
 from ..models import AuditEvent, Episode, EpisodeEvent, Task, WorkItem
+from ..pagination import InvalidCursor, paginate
 from ..rbac import Role, has_permission
 from ..state import TASK_TRANSITIONS
 from .utils import parse_datetime
@@ -104,20 +105,11 @@ def tasks_list(request):
             return JsonResponse({"detail": "due_before must be ISO datetime"}, status=400)
         tasks = tasks.filter(due_at__lte=due_before_dt)
     try:
-        page = max(int(request.GET.get("page", "1")), 1)
-    except ValueError:
-        page = 1
-    try:
-        page_size = min(max(int(request.GET.get("page_size", "50")), 1), 200)
-    except ValueError:
-        page_size = 50
-    total = tasks.count()
-    start = (page - 1) * page_size
-    tasks = tasks[start : start + page_size]
-    payload = [_task_payload(item) for item in tasks]
-    return JsonResponse(
-        {"results": payload, "count": total, "page": page, "page_size": page_size}
-    )
+        page = paginate(request, tasks, ordering=("-created_at", "-id"))
+    except InvalidCursor:
+        return JsonResponse({"detail": "invalid cursor"}, status=400)
+    payload = [_task_payload(item) for item in page.items]
+    return JsonResponse({"results": payload, **page.meta()})
 
 
 def task_assign(request, task_id: int):
@@ -30,6 +30,48 @@ def validate_nhs_number(value: str | None) -> bool:
     return value.isdigit() and len(value) == 10
 
 
+def clean_identifier(entry: dict) -> dict | None:
+    kind = str(entry.get("kind", "")).strip()
+    value = str(entry.get("value", "")).strip()
+    if not kind or not value:
+        return None
+    return {
+        "kind": kind,
+        "value": value,
+        "system": str(entry.get("system", "")).strip(),
+        "is_primary": bool(entry.get("is_primary", False)),
+    }
+
+
+def clean_address(entry: dict) -> dict | None:
+    line1 = str(entry.get("line1", "")).strip()
+    if not line1:
+        return None
+    return {
+        "address_type": str(entry.get("address_type", "home")).strip() or "home",
+        "line1": line1,
+        "line2": str(entry.get("line2", "")).strip(),
+        "city": str(entry.get("city", "")).strip(),
+        "region": str(entry.get("region", "")).strip(),
+        "postal_code": str(entry.get("postal_code", "")).strip(),
+        "country": str(entry.get("country", "")).strip(),
+        "is_primary": bool(entry.get("is_primary", False)),
+    }
+
+
+def clean_contact(entry: dict) -> dict | None:
+    kind = str(entry.get("kind", "")).strip()
+    value = str(entry.get("value", "")).strip()
+    if not kind or not value:
+        return None
+    return {
+        "kind": kind,
+        "value": value,
+        "notes": str(entry.get("notes", "")).strip(),
+        "is_primary": bool(entry.get("is_primary", False)),
+    }
+
+
 def parse_tags(raw_value) -> list[str]:
     if raw_value is None:
         return []
@@ -1,12 +1,14 @@
 from __future__ import annotations
 
 import json
+from unittest import mock
 
 import pytest
 from django.contrib.auth import get_user_model
 from django.test.utils import override_settings
 
-from core.models import AIReviewRequest, Membership, Organization
+from core.models import AIReviewRequest, AuditEvent, Membership, Organization, OutboxMessage
+from core.outbox import relay_outbox
 from core.rbac import Role
 
 
@@ -25,6 +27,8 @@ def test_staff_can_create_ai_review_and_get_result(client) -> None:
     )
     assert create.status_code == 201
     review_id = create.json()["id"]
+    assert AIReviewRequest.objects.get(id=review_id).status == "pending"
+    assert relay_outbox() == 1
 
     detail = client.get(f"/ai/review/{review_id}/")
     assert detail.status_code == 200
@@ -32,6 +36,25 @@ def test_staff_can_create_ai_review_and_get_result(client) -> None:
     assert "output" in detail.json()
 
 
+@pytest.mark.django_db
+def test_ai_review_create_rolls_back_when_enqueue_fails(client) -> None:
+    user = get_user_model().objects.create_user(username="staff", password="pass")
+    org = Organization.objects.create(name="CareOS", slug="careos")
+    Membership.objects.create(user=user, organization=org, role=Role.STAFF)
+
+    client.force_login(user)
+    with mock.patch("core.views.ai_review.enqueue", side_effect=ConnectionError("down")):
+        with pytest.raises(ConnectionError):
+            client.post(
+                "/ai/review/",
+                data=json.dumps({"input_type": "episode.summary", "payload": {}}),
+                content_type="application/json",
+            )
+    assert not AIReviewRequest.objects.exists()
+    assert not AuditEvent.objects.filter(action="ai.review.created").exists()
+    assert not OutboxMessage.objects.exists()
+
+
 @pytest.mark.django_db
 @override_settings(
     AI_REVIEW_PROVIDER="mock",
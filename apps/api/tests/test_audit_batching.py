@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import tempfile
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from core.audit import audit_batch, record_audit_event
+from core.models import AuditEvent, Episode, Membership, Organization, WorkItem
+from core.rbac import Role
+
+
+def _audit_inserts(queries: CaptureQueriesContext) -> int:
+    return sum(
+        1
+        for query in queries.captured_queries
+        if query["sql"].startswith('INSERT INTO "core_auditevent"')
+    )
+
+
+def _admin(client):
+    user = get_user_model().objects.create_user(username="admin", password="pass")
+    org = Organization.objects.create(name="CareOS", slug="careos")
+    Membership.objects.create(user=user, organization=org, role=Role.ADMIN)
+    client.force_login(user)
+    return user, org
+
+
+@pytest.mark.django_db
+def test_episode_transition_writes_audit_rows_in_one_insert(client) -> None:
+    user, org = _admin(client)
+    episode = Episode.objects.create(
+        organization=org, title="Episode A", created_by=user, status="in_progress"
+    )
+    for _ in range(3):
+        WorkItem.objects.create(organization=org, episode=episode, kind="triage", status="open")
+    before = AuditEvent.objects.filter(organization=org).count()
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.post(
+            f"/episodes/{episode.id}/transition/",
+            data='{"to_state": "resolved"}',
+            content_type="application/json",
+            HTTP_X_REQUEST_ID="req-transition",
+        )
+
+    assert response.status_code == 200
+    assert _audit_inserts(queries) == 1
+    written = AuditEvent.objects.filter(organization=org, request_id="req-transition")
+    assert written.count() == AuditEvent.objects.filter(organization=org).count() - before
+    assert written.filter(action="work_item.auto_completed").count() == 3
+    assert written.filter(action="episode.transition").count() == 1
+    assert not written.filter(action__in=["WorkItem.updated", "Episode.updated"]).exists()
+    assert written.filter(action="EpisodeEvent.created").count() == 1
+    assert WorkItem.objects.filter(episode=episode, status="completed").count() == 3
+
+
+@pytest.mark.django_db
+def test_evidence_upload_writes_audit_rows_in_one_insert(client) -> None:
+    _user, org = _admin(client)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with override_settings(EVIDENCE_STORAGE_DIR=tmpdir):
+            with CaptureQueriesContext(connection) as queries:
+                response = client.post(
+                    "/evidence/",
+                    data={
+                        "title": "Note",
+                        "kind": "note",
+                        "file": SimpleUploadedFile("note.txt", b"payload"),
+                    },
+                    HTTP_X_REQUEST_ID="req-evidence",
+                )
+
+    assert response.status_code == 201
+    assert _audit_inserts(queries) == 1
+    actions = set(
+        AuditEvent.objects.filter(request_id="req-evidence").values_list("action", flat=True)
+    )
+    assert actions == {"evidence.created", "EvidenceEvent.created"}
+
+
+@pytest.mark.django_db
+def test_audit_batch_discards_events_from_rolled_back_blocks_only() -> None:
+    org = Organization.objects.create(name="CareOS", slug="careos")
+    before = AuditEvent.objects.count()
+    depth = len(connection.atomic_blocks)
+
+    with audit_batch():
+        assert len(connection.atomic_blocks) == depth
+        record_audit_event(
+            organization=org, actor_id=None, action="kept", target_type="Test", target_id="1"
+        )
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                record_audit_event(
+                    organization=org,
+                    actor_id=None,
+                    action="dropped",
+                    target_type="Test",
+                    target_id="2",
+                )
+                raise RuntimeError("boom")
+        with transaction.atomic():
+            record_audit_event(
+                organization=org,
+                actor_id=None,
+                action="committed",
+                target_type="Test",
+                target_id="3",
+            )
+        assert AuditEvent.objects.count() == before
+
+    assert sorted(
+        AuditEvent.objects.filter(target_type="Test").values_list("action", flat=True)
+    ) == ["committed", "kept"]
+
+    with pytest.raises(RuntimeError):
+        with audit_batch():
+            episode = Episode.objects.create(organization=org, title="Persisted")
+            with transaction.atomic():
+                Episode.objects.create(organization=org, title="Rolled back")
+                raise RuntimeError("boom")
+    assert list(
+        AuditEvent.objects.filter(target_type="Episode").values_list("target_id", flat=True)
+    ) == [str(episode.id)]
+
+
+@pytest.mark.django_db
+def test_generic_rows_coalesce_per_action_class_and_bulk_paths_are_audited() -> None:
+    org = Organization.objects.create(name="CareOS", slug="careos")
+
+    with audit_batch():
+        episode = Episode.objects.create(organization=org, title="Episode A")
+        episode.title = "Episode A (edited)"
+        episode.save()
+        episode.title = "Episode A (edited twice)"
+        episode.save()
+    rows = AuditEvent.objects.filter(target_type="Episode", target_id=str(episode.id))
+    assert sorted(rows.values_list("action", flat=True)) == ["Episode.created", "Episode.updated"]
+
+    with audit_batch():
+        record_audit_event(
+            organization=org,
+            actor_id=None,
+            action="episode.transition",
+            target_type="Episode",
+            target_id=str(episode.id),
+        )
+        episode.save()
+    assert sorted(rows.values_list("action", flat=True)) == [
+        "Episode.created",
+        "Episode.updated",
+        "episode.transition",
+    ]
+
+    items = WorkItem.objects.bulk_create(
+        [WorkItem(organization=org, kind="triage", status="open") for _ in range(2)]
+    )
+    created = AuditEvent.objects.filter(action="WorkItem.created")
+    assert sorted(created.values_list("target_id", flat=True)) == sorted(
+        str(item.id) for item in items
+    )
+
+    WorkItem.objects.filter(organization=org).update(status="assigned")
+    updated = AuditEvent.objects.filter(action="WorkItem.updated")
+    assert updated.count() == 2
+    assert updated.first().metadata == {"fields": ["status"]}
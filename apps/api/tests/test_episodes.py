@@ -1,10 +1,22 @@
 from __future__ import annotations
 
+import json
+
 import pytest
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
-from core.models import AuditEvent, Episode, EpisodeEvent, Membership, Organization
+from core.models import (
+    AuditEvent,
+    Episode,
+    EpisodeEvent,
+    Membership,
+    Notification,
+    Organization,
+    WorkItem,
+)
 from core.rbac import Role
 
 
@@ -181,3 +193,80 @@ def test_admin_can_cancel_episode(client) -> None:
     )
     assert response.status_code == 200
     assert response.json()["status"] == "cancelled"
+
+
+@pytest.mark.django_db
+def test_bulk_transition_is_set_based(client, django_capture_on_commit_callbacks) -> None:
+    user = get_user_model().objects.create_user(username="admin_bulk", password="pass")
+    other_org = Organization.objects.create(name="Other", slug="other-bulk")
+    org = Organization.objects.create(name="CareOS", slug="careos-bulk")
+    Membership.objects.create(user=user, organization=org, role=Role.ADMIN)
+    episodes = [
+        Episode.objects.create(
+            organization=org, title=f"Episode {index}", status="in_progress", created_by=user
+        )
+        for index in range(5)
+    ]
+    for episode in episodes:
+        WorkItem.objects.create(organization=org, episode=episode, kind="triage", status="open")
+    new_episode = Episode.objects.create(organization=org, title="New", status="new")
+    foreign = Episode.objects.create(organization=other_org, title="Foreign", status="in_progress")
+    ids = [episode.id for episode in episodes]
+
+    client.force_login(user)
+    with django_capture_on_commit_callbacks(execute=True):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post(
+                "/episodes/bulk-transition/",
+                data=json.dumps(
+                    {"episode_ids": [*ids, new_episode.id, foreign.id], "to_state": "resolved"}
+                ),
+                content_type="application/json",
+            )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["transitioned"] == ids
+    assert body["errors"] == [
+        {"id": new_episode.id, "detail": "Invalid transition."},
+        {"id": foreign.id, "detail": "Not found."},
+    ]
+    assert set(Episode.objects.filter(id__in=ids).values_list("status", flat=True)) == {"resolved"}
+    new_episode.refresh_from_db()
+    assert new_episode.status == "new"
+    assert WorkItem.objects.filter(status="completed").count() == 5
+    assert EpisodeEvent.objects.filter(event_type="episode.transition").count() == 5
+    assert AuditEvent.objects.filter(action="work_item.auto_completed").count() == 5
+    assert AuditEvent.objects.filter(action="episode.transition").count() == 5
+    assert Notification.objects.filter(recipient=user, kind="episode.transition").count() == 5
+    sql = [query["sql"] for query in queries.captured_queries]
+    assert sum(1 for q in sql if q.startswith('UPDATE "core_workitem"')) == 1
+    assert sum(1 for q in sql if q.startswith('UPDATE "core_episode"')) == 1
+    assert sum(1 for q in sql if q.startswith('INSERT INTO "core_episodeevent"')) == 1
+
+
+@pytest.mark.django_db
+def test_bulk_transition_applies_staff_rules(client) -> None:
+    user = get_user_model().objects.create_user(username="staff_bulk", password="pass")
+    org = Organization.objects.create(name="CareOS", slug="careos-bulk-staff")
+    Membership.objects.create(user=user, organization=org, role=Role.STAFF)
+    mine = Episode.objects.create(
+        organization=org, title="Mine", status="in_progress", assigned_to=user
+    )
+    theirs = Episode.objects.create(organization=org, title="Theirs", status="in_progress")
+
+    client.force_login(user)
+    response = client.post(
+        "/episodes/bulk-transition/",
+        data=json.dumps({"episode_ids": [mine.id, theirs.id], "to_state": "waiting"}),
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+    assert response.json()["transitioned"] == [mine.id]
+    assert response.json()["errors"] == [{"id": theirs.id, "detail": "Not authorized."}]
+    invalid = client.post(
+        "/episodes/bulk-transition/",
+        data=json.dumps({"episode_ids": [], "to_state": "waiting"}),
+        content_type="application/json",
+    )
+    assert invalid.status_code == 400
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
+import gzip
+import hashlib
 import json
 import tempfile
+from pathlib import Path
 
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
 from django.test.utils import override_settings
 
 from core.models import AuditEvent, Episode, Membership, Organization
@@ -52,3 +56,122 @@ def test_staff_cannot_request_exports(client) -> None:
         content_type="application/json",
     )
     assert response.status_code == 403
+
+
+@pytest.mark.django_db
+def test_export_audit_events_streams_ndjson_with_manifest(tmp_path: Path) -> None:
+    org = Organization.objects.create(name="CareOS", slug="careos")
+    other = Organization.objects.create(name="Other", slug="other")
+    events = [
+        AuditEvent.objects.create(
+            organization=org, action=f"test.{index}", target_type="Test", target_id=str(index)
+        )
+        for index in range(5)
+    ]
+    AuditEvent.objects.create(organization=other, action="test.other", target_type="Test")
+    output = tmp_path / "careos.ndjson.gz"
+
+    call_command(
+        "export_audit_events",
+        "--org-slug=careos",
+        f"--output={output}",
+        "--format=ndjson",
+        "--gzip",
+        "--chunk-size=2",
+        f"--after-id={events[1].id}",
+    )
+
+    rows = [json.loads(line) for line in gzip.decompress(output.read_bytes()).splitlines()]
+    assert [row["id"] for row in rows] == [event.id for event in events[2:]]
+    manifest = json.loads((tmp_path / "careos.ndjson.gz.manifest.json").read_text())
+    (entry,) = manifest["exports"]
+    assert entry["rows"] == 3
+    assert entry["last_id"] == events[-1].id
+    assert entry["sha256"] == hashlib.sha256(output.read_bytes()).hexdigest()
+
+
+@pytest.mark.django_db
+def test_export_audit_events_writes_one_file_per_org(tmp_path: Path) -> None:
+    for slug in ("alpha", "beta"):
+        org = Organization.objects.create(name=slug.title(), slug=slug)
+        AuditEvent.objects.create(organization=org, action="test.exported", target_type="Test")
+
+    call_command(
+        "export_audit_events",
+        "--org-slug=alpha",
+        "--org-slug=beta",
+        f"--output={tmp_path}",
+        "--since=2000-01-01",
+    )
+
+    manifest = json.loads((tmp_path / "manifest.json").read_text())
+    assert [entry["org_slug"] for entry in manifest["exports"]] == ["alpha", "beta"]
+    for entry in manifest["exports"]:
+        exported = json.loads((tmp_path / entry["file"]).read_text())
+        assert len(exported) == entry["rows"]
+        assert any(row["action"] == "test.exported" for row in exported)
+
+
+@pytest.mark.django_db
+def test_export_audit_events_resume_appends(tmp_path: Path) -> None:
+    org = Organization.objects.create(name="CareOS", slug="careos-resume")
+    for index in range(2):
+        AuditEvent.objects.create(organization=org, action=f"test.{index}", target_type="Test")
+    exported = list(AuditEvent.objects.filter(organization=org).values_list("id", flat=True))
+    output = tmp_path / "audit.ndjson.gz"
+    options = ["--org-slug=careos-resume", f"--output={output}", "--format=ndjson", "--gzip"]
+    call_command("export_audit_events", *options)
+    second = AuditEvent.objects.create(organization=org, action="test.2", target_type="Test")
+
+    call_command("export_audit_events", *options, f"--after-id={max(exported)}")
+
+    rows = [json.loads(line) for line in gzip.decompress(output.read_bytes()).splitlines()]
+    assert [row["id"] for row in rows] == [*sorted(exported), second.id]
+    (entry,) = json.loads((tmp_path / "audit.ndjson.gz.manifest.json").read_text())["exports"]
+    assert (entry["after_id"], entry["last_id"]) == (max(exported), second.id)
+    assert (entry["appended_rows"], entry["rows"]) == (1, len(rows))
+    assert entry["sha256"] == hashlib.sha256(output.read_bytes()).hexdigest()
+
+    json_output = tmp_path / "audit.json"
+    call_command("export_audit_events", "--org-slug=careos-resume", f"--output={json_output}")
+    with pytest.raises(CommandError):
+        call_command(
+            "export_audit_events",
+            "--org-slug=careos-resume",
+            f"--output={json_output}",
+            f"--after-id={max(exported)}",
+        )
+    assert len(json.loads(json_output.read_text())) == len(exported) + 1
+
+
+@pytest.mark.django_db
+def test_export_audit_events_resumes_each_org_from_its_manifest_cursor(tmp_path: Path) -> None:
+    orgs = [Organization.objects.create(name=slug.title(), slug=slug) for slug in ("alpha", "beta")]
+    for org in orgs:
+        AuditEvent.objects.create(organization=org, action="test.first", target_type="Test")
+    options = ["--org-slug=alpha", "--org-slug=beta", f"--output={tmp_path}", "--format=ndjson"]
+    call_command("export_audit_events", *options)
+    first = {
+        entry["org_slug"]: entry["last_id"]
+        for entry in json.loads((tmp_path / "manifest.json").read_text())["exports"]
+    }
+    for org in [*orgs, orgs[1]]:
+        AuditEvent.objects.create(organization=org, action="test.later", target_type="Test")
+
+    with pytest.raises(CommandError):
+        call_command("export_audit_events", *options, f"--after-id={first['alpha']}")
+    call_command("export_audit_events", *options, "--resume")
+
+    manifest = json.loads((tmp_path / "manifest.json").read_text())
+    for entry, org in zip(manifest["exports"], orgs):
+        lines = (tmp_path / entry["file"]).read_text().splitlines()
+        expected = AuditEvent.objects.filter(organization=org).order_by("id")
+        assert [json.loads(line)["id"] for line in lines] == list(
+            expected.values_list("id", flat=True)
+        )
+        assert entry["after_id"] == first[org.slug]
+        assert entry["rows"] == len(lines)
+        assert entry["appended_rows"] == (1 if org.slug == "alpha" else 2)
+        assert (
+            entry["sha256"] == hashlib.sha256((tmp_path / entry["file"]).read_bytes()).hexdigest()
+        )
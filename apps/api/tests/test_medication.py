@@ -1,12 +1,34 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import date, datetime, timedelta
 
 import pytest
+from django.contrib.auth import get_user_model
+from django.utils import timezone
 from zoneinfo import ZoneInfo
 
-from core.medication import next_reminders
-from core.models import PatientOTP
+from core.adherence import rebuild_adherence_rollups
+from core.medication import (
+    confirm_dose,
+    dispatch_due_reminders,
+    dose_times,
+    next_reminders,
+    plan_dose_slots,
+    reminder_queue,
+    sweep_missed_doses,
+)
+from core.models import (
+    MedicationAdherenceDaily,
+    MedicationDoseEvent,
+    MedicationDoseSlot,
+    MedicationSchedule,
+    Membership,
+    Notification,
+    Organization,
+    PatientOTP,
+    PatientProfile,
+)
+from core.rbac import Role
 
 
 def test_next_reminders_rolls_forward() -> None:
@@ -50,3 +72,217 @@ def test_schedule_sync_flow(client) -> None:
     )
     assert listing.status_code == 200
     assert listing.json()["results"]
+
+
+def test_dose_times_follow_dst_transitions() -> None:
+    utc = ZoneInfo("UTC")
+    slots = dose_times(
+        times=["08:00", "01:30"],
+        timezone="Europe/London",
+        start=datetime(2026, 3, 28, 0, 0, tzinfo=utc),
+        end=datetime(2026, 3, 31, 0, 0, tzinfo=utc),
+    )
+    assert [slot.strftime("%d %H:%M") for slot in slots] == [
+        "28 01:30",
+        "28 08:00",
+        "29 01:30",
+        "29 07:00",
+        "30 00:30",
+        "30 07:00",
+    ]
+
+
+@pytest.mark.django_db
+def test_planner_dispatches_reminders_and_sweeps_missed_doses() -> None:
+    org = Organization.objects.create(name="CareOS", slug="careos-meds")
+    user = get_user_model().objects.create_user(username="patient-meds", password="pass")
+    profile = PatientProfile.objects.create(user=user, organization=org, phone="+15550001111")
+    now = timezone.now().replace(second=0, microsecond=0)
+    due_time = (now - timedelta(hours=3)).astimezone(ZoneInfo("UTC"))
+    schedule = MedicationSchedule.objects.create(
+        patient=profile,
+        name="Metformin",
+        times=[due_time.strftime("%H:%M")],
+        timezone="UTC",
+        start_date=date(2026, 1, 1),
+    )
+    taken_time = (now - timedelta(hours=4)).astimezone(ZoneInfo("UTC"))
+    taken = MedicationSchedule.objects.create(
+        patient=profile,
+        name="Statin",
+        times=[taken_time.strftime("%H:%M")],
+        timezone="UTC",
+        start_date=date(2026, 1, 1),
+    )
+
+    start = now - timedelta(hours=6)
+    assert plan_dose_slots(now=start, horizon_hours=24) == 2
+    plan_dose_slots(now=start, horizon_hours=24)
+    past_slots = MedicationDoseSlot.objects.filter(scheduled_for__lt=now)
+    assert past_slots.filter(schedule=schedule).count() == 1
+
+    reminder_queue.clear()
+    assert dispatch_due_reminders(now=now) == 2
+    assert dispatch_due_reminders(now=now) == 0
+    assert set(Notification.objects.values_list("kind", flat=True)) == {"medication"}
+    assert past_slots.filter(status="reminded").count() == 2
+
+    MedicationDoseEvent.objects.create(
+        patient=profile,
+        schedule=taken,
+        status="taken",
+        scheduled_for=past_slots.get(schedule=taken).scheduled_for,
+    )
+    assert sweep_missed_doses(now=now) == 1
+    assert past_slots.get(schedule=taken).status == "taken"
+    assert past_slots.get(schedule=schedule).status == "missed"
+    assert MedicationDoseEvent.objects.filter(schedule=schedule, status="missed").count() == 1
+    assert sweep_missed_doses(now=now) == 0
+
+
+@pytest.mark.django_db
+def test_reminder_queue_picks_up_slots_planned_after_refill() -> None:
+    org = Organization.objects.create(name="CareOS", slug="careos-meds-new")
+    user = get_user_model().objects.create_user(username="patient-new", password="pass")
+    profile = PatientProfile.objects.create(user=user, organization=org, phone="+15550002222")
+    now = timezone.now().replace(second=0, microsecond=0)
+    reminder_queue.clear()
+    assert dispatch_due_reminders(now=now) == 0
+
+    due = (now + timedelta(minutes=1)).astimezone(ZoneInfo("UTC"))
+    MedicationSchedule.objects.create(
+        patient=profile,
+        name="Insulin",
+        times=[due.strftime("%H:%M")],
+        timezone="UTC",
+        start_date=now.date() - timedelta(days=1),
+    )
+    assert MedicationDoseSlot.objects.filter(scheduled_for=due).exists()
+    assert dispatch_due_reminders(now=now + timedelta(minutes=2)) == 1
+    assert dispatch_due_reminders(now=now + timedelta(minutes=2)) == 0
+
+
+@pytest.mark.django_db
+def test_adherence_rollups_update_on_insert_and_serve_windows(client) -> None:
+    org = Organization.objects.create(name="CareOS", slug="careos-adherence")
+    user = get_user_model().objects.create_user(username="patient-adh", password="pass")
+    profile = PatientProfile.objects.create(user=user, organization=org, phone="+15550002222")
+    schedule = MedicationSchedule.objects.create(
+        patient=profile,
+        name="Aspirin",
+        times=["08:00"],
+        timezone="UTC",
+        start_date=date(2026, 1, 1),
+    )
+    other = MedicationSchedule.objects.create(
+        patient=profile, name="Iron", times=["09:00"], timezone="UTC", start_date=date(2026, 1, 1)
+    )
+    now = timezone.now()
+    for days_ago, status in [
+        (1, "taken"),
+        (2, "taken"),
+        (3, "missed"),
+        (20, "missed"),
+        (60, "taken"),
+    ]:
+        MedicationDoseEvent.objects.create(
+            patient=profile,
+            schedule=schedule,
+            status=status,
+            scheduled_for=now - timedelta(days=days_ago),
+        )
+    MedicationDoseEvent.objects.bulk_create(
+        [
+            MedicationDoseEvent(
+                patient=profile,
+                schedule=other,
+                status="missed",
+                scheduled_for=now - timedelta(days=1),
+            )
+        ]
+    )
+    assert MedicationAdherenceDaily.objects.filter(schedule=schedule).count() == 5
+
+    staff = get_user_model().objects.create_user(username="staff-adh", password="pass")
+    Membership.objects.create(user=staff, organization=org, role=Role.STAFF)
+    client.force_login(staff)
+    schedule_payload = client.get(f"/medication/adherence/schedules/{schedule.id}/").json()
+    assert schedule_payload["windows"]["7d"] == {"taken": 2, "missed": 1, "adherence": 66.7}
+    assert schedule_payload["windows"]["30d"]["missed"] == 2
+    assert schedule_payload["windows"]["90d"] == {"taken": 3, "missed": 2, "adherence": 60.0}
+
+    patient_payload = client.get(f"/medication/adherence/patients/{profile.id}/").json()
+    assert patient_payload["windows"]["7d"] == {"taken": 2, "missed": 2, "adherence": 50.0}
+    assert [row["windows"]["7d"]["missed"] for row in patient_payload["schedules"]] == [1, 1]
+    org_payload = client.get("/medication/adherence/").json()
+    assert org_payload["windows"]["90d"]["taken"] == 3
+
+    before = list(
+        MedicationAdherenceDaily.objects.order_by("schedule_id", "day").values_list(
+            "schedule_id", "day", "taken", "missed"
+        )
+    )
+    assert rebuild_adherence_rollups() == len(before)
+    assert (
+        list(
+            MedicationAdherenceDaily.objects.order_by("schedule_id", "day").values_list(
+                "schedule_id", "day", "taken", "missed"
+            )
+        )
+        == before
+    )
+
+
+@pytest.mark.django_db
+def test_confirmation_after_sweep_replaces_the_missed_dose() -> None:
+    org = Organization.objects.create(name="CareOS", slug="careos-late-confirm")
+    user = get_user_model().objects.create_user(username="patient-late", password="pass")
+    profile = PatientProfile.objects.create(user=user, organization=org, phone="+15550003333")
+    now = timezone.now().replace(second=0, microsecond=0)
+    due = (now - timedelta(hours=3)).astimezone(ZoneInfo("UTC"))
+    schedule = MedicationSchedule.objects.create(
+        patient=profile,
+        name="Warfarin",
+        times=[due.strftime("%H:%M")],
+        timezone="UTC",
+        start_date=date(2026, 1, 1),
+    )
+    plan_dose_slots(now=now - timedelta(hours=4), horizon_hours=2)
+    slot = MedicationDoseSlot.objects.get(schedule=schedule, scheduled_for__lt=now)
+    assert sweep_missed_doses(now=now) == 1
+    rollup = MedicationAdherenceDaily.objects.get(schedule=schedule)
+    assert (rollup.taken, rollup.missed) == (0, 1)
+
+    event = confirm_dose(profile, schedule, "taken", slot.scheduled_for)
+    confirm_dose(profile, schedule, "taken", slot.scheduled_for)
+
+    assert list(
+        MedicationDoseEvent.objects.filter(schedule=schedule).values_list("id", "status")
+    ) == [(event.id, "taken")]
+    rollup.refresh_from_db()
+    assert (rollup.taken, rollup.missed) == (1, 0)
+    slot.refresh_from_db()
+    assert slot.status == "taken"
+    assert sweep_missed_doses(now=now) == 0
+
+
+@pytest.mark.django_db
+def test_rebuild_corrects_older_days_with_recently_changed_events() -> None:
+    org = Organization.objects.create(name="CareOS", slug="careos-rebuild-old")
+    user = get_user_model().objects.create_user(username="patient-old", password="pass")
+    profile = PatientProfile.objects.create(user=user, organization=org, phone="+15550004444")
+    schedule = MedicationSchedule.objects.create(
+        patient=profile, name="Iron", times=["09:00"], timezone="UTC", start_date=date(2026, 1, 1)
+    )
+    now = timezone.now()
+    old = confirm_dose(profile, schedule, "missed", now - timedelta(days=30))
+    untouched = confirm_dose(profile, schedule, "missed", now - timedelta(days=40))
+    MedicationDoseEvent.objects.filter(pk=untouched.pk).update(updated_at=now - timedelta(days=39))
+    MedicationAdherenceDaily.objects.filter(schedule=schedule).update(taken=5, missed=5)
+
+    changed_since = now - timedelta(days=2)
+    rebuild_adherence_rollups(since=changed_since.date(), changed_since=changed_since)
+
+    rollups = MedicationAdherenceDaily.objects.filter(schedule=schedule)
+    assert rollups.get(day=old.scheduled_for.date()).missed == 1
+    assert rollups.get(day=untouched.scheduled_for.date()).missed == 5
@@ -1,11 +1,25 @@
 from __future__ import annotations
 
+import importlib
 import json
 
 import pytest
+from django.apps import apps as django_apps
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
-from core.models import AuditEvent, Conversation, Membership, Message, MessageRead, Organization
+from core.messaging import mark_conversation_read
+from core.models import (
+    AuditEvent,
+    Conversation,
+    ConversationReadState,
+    Membership,
+    Message,
+    MessageRead,
+    Organization,
+    UserCounter,
+)
 from core.rbac import Role
 
 
@@ -39,7 +53,12 @@ def test_staff_can_create_conversation_send_and_read(client) -> None:
 
     read = client.post(f"/messages/{message_id}/read/")
     assert read.status_code == 200
-    assert MessageRead.objects.filter(message_id=message_id, reader=sender).exists()
+    assert (
+        ConversationReadState.objects.get(
+            conversation_id=conversation_id, user=sender
+        ).last_read_message_id
+        == message_id
+    )
 
 
 @pytest.mark.django_db
@@ -70,3 +89,243 @@ def test_conversation_tenant_isolation(client) -> None:
     client.force_login(user)
     response = client.get(f"/conversations/{conversation.id}/")
     assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_conversation_history_pages_by_cursor_in_constant_queries(client) -> None:
+    reader = get_user_model().objects.create_user(username="reader", password="pass")
+    writer = get_user_model().objects.create_user(username="writer", password="pass")
+    org = Organization.objects.create(name="CareOS", slug="careos-history")
+    Membership.objects.create(user=reader, organization=org, role=Role.STAFF)
+    Membership.objects.create(user=writer, organization=org, role=Role.STAFF)
+    conversation = Conversation.objects.create(organization=org)
+    conversation.participants.set([reader, writer])
+    messages = [
+        Message.objects.create(
+            organization=org, conversation=conversation, sender=writer, body=f"M{index}"
+        )
+        for index in range(45)
+    ]
+    ConversationReadState.objects.create(
+        organization=org,
+        conversation=conversation,
+        user=reader,
+        last_read_message_id=messages[29].id,
+    )
+
+    client.force_login(reader)
+    seen = []
+    query_counts = []
+    cursor = ""
+    while cursor is not None:
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(
+                f"/conversations/{conversation.id}/", {"cursor": cursor, "page_size": 20}
+            )
+        assert response.status_code == 200
+        body = response.json()
+        assert {participant["id"] for participant in body["participants"]} == {
+            reader.id,
+            writer.id,
+        }
+        seen += body["messages"]
+        query_counts.append(len(queries.captured_queries))
+        read_queries = [
+            query
+            for query in queries.captured_queries
+            if '"core_conversationreadstate"' in query["sql"]
+        ]
+        assert len(read_queries) == 1
+        cursor = body["next_cursor"]
+
+    assert [message["id"] for message in seen] == [message.id for message in messages]
+    assert [message["read"] for message in seen] == [index < 30 for index in range(45)]
+    assert len(query_counts) == 3
+    assert len(set(query_counts[1:])) == 1
+
+    response = client.get(f"/conversations/{conversation.id}/", {"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_conversation_inbox_orders_by_activity_with_unread_counts(client) -> None:
+    user = get_user_model().objects.create_user(username="inbox", password="pass")
+    peer = get_user_model().objects.create_user(username="peer", password="pass")
+    org = Organization.objects.create(name="CareOS", slug="careos-inbox")
+    Membership.objects.create(user=user, organization=org, role=Role.STAFF)
+    Membership.objects.create(user=peer, organization=org, role=Role.STAFF)
+    conversations = []
+    for index in range(5):
+        conversation = Conversation.objects.create(organization=org)
+        conversation.participants.set([user, peer])
+        conversations.append(conversation)
+    quiet, busy, answered = conversations[:3]
+    busy_messages = [
+        Message.objects.create(
+            organization=org, conversation=busy, sender=peer, body=f"busy {index}"
+        )
+        for index in range(3)
+    ]
+    ConversationReadState.objects.create(
+        organization=org,
+        conversation=busy,
+        user=user,
+        last_read_message_id=busy_messages[0].id,
+    )
+    Message.objects.create(organization=org, conversation=answered, sender=peer, body="Q")
+    Message.objects.create(organization=org, conversation=answered, sender=user, body="A")
+
+    client.force_login(user)
+    client.get("/conversations/")
+    with CaptureQueriesContext(connection) as first_page:
+        response = client.get("/conversations/", {"cursor": "", "page_size": 2})
+    body = response.json()
+    assert [row["id"] for row in body["results"]] == [answered.id, busy.id]
+    assert body["results"][0]["last_message"]["body"] == "A"
+    assert body["results"][0]["unread_count"] == 1
+    assert body["results"][1]["last_message"]["body"] == "busy 2"
+    assert body["results"][1]["unread_count"] == 2
+    assert {participant["id"] for participant in body["results"][0]["participants"]} == {
+        user.id,
+        peer.id,
+    }
+
+    with CaptureQueriesContext(connection) as second_page:
+        response = client.get("/conversations/", {"cursor": body["next_cursor"], "page_size": 3})
+    body = response.json()
+    assert [row["id"] for row in body["results"]] == [
+        conversations[4].id,
+        conversations[3].id,
+        quiet.id,
+    ]
+    assert body["results"][2] | {"participants": []} == {
+        "id": quiet.id,
+        "episode_id": None,
+        "participants": [],
+        "created_at": quiet.created_at.isoformat(),
+        "last_activity_at": quiet.created_at.isoformat(),
+        "last_message": None,
+        "unread_count": 0,
+    }
+    assert body["next_cursor"] is None
+    assert len(second_page.captured_queries) <= len(first_page.captured_queries)
+
+
+@pytest.mark.django_db
+def test_mark_conversation_read_advances_watermark_and_counters(client) -> None:
+    user = get_user_model().objects.create_user(username="watermark", password="pass")
+    peer = get_user_model().objects.create_user(username="writer2", password="pass")
+    org = Organization.objects.create(name="CareOS", slug="careos-watermark")
+    Membership.objects.create(user=user, organization=org, role=Role.STAFF)
+    Membership.objects.create(user=peer, organization=org, role=Role.STAFF)
+    conversation = Conversation.objects.create(organization=org)
+    conversation.participants.set([user, peer])
+    messages = [
+        Message.objects.create(
+            organization=org, conversation=conversation, sender=peer, body=f"M{index}"
+        )
+        for index in range(4)
+    ]
+
+    client.force_login(user)
+    assert client.get("/me/counters/").json()["unread_messages"] == 4
+    response = client.post(
+        f"/conversations/{conversation.id}/read/",
+        data=json.dumps({"message_id": messages[1].id}),
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+    assert response.json()["last_read_message_id"] == messages[1].id
+    assert UserCounter.objects.get(user=user).unread_messages == 2
+    assert client.get("/conversations/").json()["results"][0]["unread_count"] == 2
+
+    client.post(f"/messages/{messages[0].id}/read/")
+    assert ConversationReadState.objects.get(user=user).last_read_message_id == messages[1].id
+
+    response = client.post(
+        f"/conversations/{conversation.id}/read/",
+        data=json.dumps({}),
+        content_type="application/json",
+    )
+    assert response.json()["last_read_message_id"] == messages[3].id
+    assert client.get("/me/counters/").json()["unread_messages"] == 0
+    detail = client.get(f"/conversations/{conversation.id}/").json()
+    assert all(message["read"] for message in detail["messages"])
+
+    missing = client.post(
+        f"/conversations/{conversation.id}/read/",
+        data=json.dumps({"message_id": messages[3].id + 100}),
+        content_type="application/json",
+    )
+    assert missing.status_code == 404
+
+
+@pytest.mark.django_db
+def test_read_state_backfill_uses_latest_message_read(monkeypatch) -> None:
+    backfill = importlib.import_module("core.migrations.0044_conversation_read_state")
+    reader = get_user_model().objects.create_user(username="legacy", password="pass")
+    writer = get_user_model().objects.create_user(username="legacy-writer", password="pass")
+    org = Organization.objects.create(name="CareOS", slug="careos-backfill")
+    conversations = [Conversation.objects.create(organization=org) for _ in range(3)]
+    latest = {}
+    for conversation in conversations[:2]:
+        for index in range(3):
+            message = Message.objects.create(
+                organization=org, conversation=conversation, sender=writer, body=f"M{index}"
+            )
+            if index < 2:
+                MessageRead.objects.create(organization=org, message=message, reader=reader)
+                latest[conversation.id] = message.id
+
+    monkeypatch.setattr(backfill, "BATCH_SIZE", 1)
+    backfill.backfill_read_states(django_apps, None)
+
+    assert (
+        dict(
+            ConversationReadState.objects.filter(user=reader).values_list(
+                "conversation_id", "last_read_message_id"
+            )
+        )
+        == latest
+    )
+
+
+@pytest.mark.django_db
+def test_advancing_watermark_applies_unread_delta() -> None:
+    user = get_user_model().objects.create_user(username="delta", password="pass")
+    peer = get_user_model().objects.create_user(username="delta-peer", password="pass")
+    org = Organization.objects.create(name="CareOS", slug="careos-delta")
+    conversation = Conversation.objects.create(organization=org)
+    conversation.participants.set([user, peer])
+    messages = [
+        Message.objects.create(
+            organization=org, conversation=conversation, sender=sender, body=f"M{index}"
+        )
+        for index, sender in enumerate([peer, user, peer, peer])
+    ]
+    UserCounter.objects.filter(organization=org, user=user).update(unread_messages=10)
+
+    mark_conversation_read(conversation, user, messages[2].id)
+    assert UserCounter.objects.get(organization=org, user=user).unread_messages == 8
+    mark_conversation_read(conversation, user, messages[1].id)
+    assert UserCounter.objects.get(organization=org, user=user).unread_messages == 8
+    mark_conversation_read(conversation, user, messages[3].id)
+    assert UserCounter.objects.get(organization=org, user=user).unread_messages == 7
+
+
+@pytest.mark.django_db
+def test_unwatched_read_state_updates_do_not_collect_pks() -> None:
+    user = get_user_model().objects.create_user(username="quiet", password="pass")
+    org = Organization.objects.create(name="CareOS", slug="careos-quiet")
+    conversation = Conversation.objects.create(organization=org)
+    ConversationReadState.objects.create(organization=org, conversation=conversation, user=user)
+
+    with CaptureQueriesContext(connection) as queries:
+        ConversationReadState.objects.filter(conversation=conversation).update(read_at=None)
+    assert len(queries.captured_queries) == 1
+
+    with CaptureQueriesContext(connection) as queries:
+        ConversationReadState.objects.filter(conversation=conversation).update(
+            last_read_message_id=0
+        )
+    assert queries.captured_queries[0]["sql"].startswith("SELECT")
@@ -2,14 +2,34 @@ from __future__ import annotations
 
 import json
 from datetime import timedelta
+from unittest import mock
 
 import pytest
 from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail import get_connection
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.test.utils import override_settings
 from django.utils import timezone
 
-from core.models import Episode, Membership, Notification, Organization, WorkItem
-from core.notifications import check_sla_notifications
+from core.mailer import deliver_queued_emails
+from core.counters import reconcile_counters
+from core.models import (
+    AuditEvent,
+    Conversation,
+    EmailDelivery,
+    Episode,
+    Membership,
+    Message,
+    Notification,
+    Organization,
+    OutboxMessage,
+    SlaSweep,
+    UserCounter,
+    WorkItem,
+)
+from core.notifications import check_sla_notifications, create_notification
 from core.rbac import Role
 
 
@@ -76,6 +96,84 @@ def test_sla_escalation_creates_notification(client) -> None:
     ).exists()
 
 
+@pytest.mark.django_db
+@override_settings(SLA_WARNING_MINUTES=60)
+def test_sla_sweep_only_considers_newly_crossed_items() -> None:
+    user = get_user_model().objects.create_user(username="staff_sla", email="sla@example.com")
+    org = Organization.objects.create(name="CareOS", slug="careos-sla")
+    now = timezone.now()
+    soon = WorkItem.objects.create(
+        organization=org, kind="triage", assigned_to=user, due_at=now + timedelta(minutes=30)
+    )
+    later = WorkItem.objects.create(
+        organization=org, kind="triage", assigned_to=user, due_at=now + timedelta(minutes=90)
+    )
+
+    assert check_sla_notifications(now=now) == 1
+    assert AuditEvent.objects.filter(action="notification.created").count() == 1
+    assert EmailDelivery.objects.filter(to_email="sla@example.com").count() == 1
+    assert check_sla_notifications(now=now + timedelta(seconds=60)) == 0
+
+    later_tick = now + timedelta(minutes=45)
+    with CaptureQueriesContext(connection) as queries:
+        assert check_sla_notifications(now=later_tick) == 2
+    inserts = [
+        query["sql"]
+        for query in queries.captured_queries
+        if query["sql"].startswith("INSERT") and 'INTO "core_notification"' in query["sql"]
+    ]
+    assert len(inserts) == 1
+    keys = set(Notification.objects.values_list("dedupe_key", flat=True))
+    assert keys == {
+        f"sla:warning:{soon.id}",
+        f"sla:breach:{soon.id}",
+        f"sla:warning:{later.id}",
+    }
+    assert SlaSweep.objects.get().swept_until == later_tick
+
+
+@pytest.mark.django_db
+@override_settings(SLA_WARNING_MINUTES=60)
+def test_sla_sweep_notifies_late_assignments_and_earlier_due_dates() -> None:
+    user = get_user_model().objects.create_user(username="staff_late", email="late@example.com")
+    org = Organization.objects.create(name="CareOS", slug="careos-sla-late")
+    now = timezone.now()
+    overdue = WorkItem.objects.create(
+        organization=org, kind="triage", due_at=now - timedelta(minutes=10)
+    )
+    distant = WorkItem.objects.create(
+        organization=org, kind="triage", assigned_to=user, due_at=now + timedelta(hours=5)
+    )
+    assert check_sla_notifications(now=now) == 0
+
+    overdue.assigned_to = user
+    overdue.save()
+    WorkItem.objects.filter(pk=distant.pk).update(sla_breach_at=now - timedelta(minutes=1))
+    assert check_sla_notifications(now=now + timedelta(seconds=60)) == 2
+    assert set(Notification.objects.values_list("dedupe_key", flat=True)) == {
+        f"sla:breach:{overdue.id}",
+        f"sla:breach:{distant.id}",
+    }
+
+
+@pytest.mark.django_db
+def test_ignored_notification_conflicts_do_not_inflate_unread_counts() -> None:
+    user = get_user_model().objects.create_user(username="staff_dupe", email="dupe@example.com")
+    org = Organization.objects.create(name="CareOS", slug="careos-sla-dupe")
+
+    def notification(dedupe_key: str) -> Notification:
+        return Notification(
+            organization=org, recipient=user, kind="sla", title="Due", dedupe_key=dedupe_key
+        )
+
+    Notification.objects.bulk_create([notification("sla:breach:1")])
+    Notification.objects.bulk_create(
+        [notification("sla:breach:1"), notification("sla:breach:2")], ignore_conflicts=True
+    )
+    assert Notification.objects.filter(recipient=user).count() == 2
+    assert UserCounter.objects.get(user=user).unread_notifications == 2
+
+
 @pytest.mark.django_db
 def test_work_item_assignment_creates_notification(client) -> None:
     user = get_user_model().objects.create_user(username="staff4", password="pass")
@@ -118,3 +216,170 @@ def test_episode_transition_creates_notification(client) -> None:
     assert Notification.objects.filter(
         organization=org, recipient=user, kind="episode.transition"
     ).exists()
+
+
+@pytest.mark.django_db
+@override_settings(EMAIL_ORG_RATE_PER_MINUTE=2, EMAIL_MAX_ATTEMPTS=2)
+def test_notification_emails_are_queued_and_delivered_in_batches() -> None:
+    org = Organization.objects.create(name="CareOS", slug="careos-mail")
+    users = [
+        get_user_model().objects.create_user(username=f"mail{index}", email=f"u{index}@example.com")
+        for index in range(3)
+    ]
+    for user in users:
+        create_notification(
+            organization=org, recipient=user, kind="sla", title="Due", body="Soon", url="/inbox"
+        )
+    assert not mail.outbox
+    assert EmailDelivery.objects.filter(status="pending").count() == 3
+    kicks = OutboxMessage.objects.filter(task_name="core.tasks.deliver_queued_emails_task")
+    assert kicks.count() == 1
+
+    now = timezone.now()
+    with mock.patch("core.mailer.get_connection", wraps=get_connection) as connections:
+        assert deliver_queued_emails(now=now) == 2
+    assert connections.call_count == 1
+    assert sorted(message.to[0] for message in mail.outbox) == ["u0@example.com", "u1@example.com"]
+    deferred = EmailDelivery.objects.get(status="pending")
+    assert deferred.available_at == now + timedelta(minutes=1)
+    assert deferred.attempts == 0
+
+    later = now + timedelta(minutes=2)
+    with mock.patch(
+        "django.core.mail.backends.locmem.EmailBackend.send_messages",
+        side_effect=ConnectionError("smtp down"),
+    ):
+        assert deliver_queued_emails(now=later) == 0
+        deferred.refresh_from_db()
+        assert deferred.attempts == 1
+        assert deferred.available_at == later + timedelta(seconds=30)
+        deliver_queued_emails(now=later + timedelta(seconds=30))
+    deferred.refresh_from_db()
+    assert deferred.status == "failed"
+    assert "smtp down" in deferred.last_error
+
+
+@pytest.mark.django_db
+def test_email_sends_happen_after_the_claim_and_expired_claims_are_retried() -> None:
+    org = Organization.objects.create(name="CareOS", slug="careos-mail-claim")
+    delivery = EmailDelivery.objects.create(
+        organization=org, to_email="claim@example.com", subject="Due", body="Soon"
+    )
+    now = timezone.now()
+    seen = []
+
+    def send(messages):
+        seen.append(EmailDelivery.objects.get(id=delivery.id).status)
+        raise ConnectionError("smtp down")
+
+    with mock.patch(
+        "django.core.mail.backends.locmem.EmailBackend.send_messages", side_effect=send
+    ):
+        assert deliver_queued_emails(now=now) == 0
+    assert seen == ["sending"]
+    delivery.refresh_from_db()
+    assert delivery.status == "pending"
+    assert delivery.attempts == 1
+
+    later = now + timedelta(seconds=1)
+    EmailDelivery.objects.filter(id=delivery.id).update(status="sending", available_at=later)
+    assert deliver_queued_emails(now=now) == 0
+    assert deliver_queued_emails(now=later) == 1
+    delivery.refresh_from_db()
+    assert delivery.status == "sent"
+    assert delivery.sent_at == later
+    assert [message.to[0] for message in mail.outbox] == ["claim@example.com"]
+
+
+@pytest.mark.django_db
+def test_work_item_saves_refresh_counters_only_when_counted_fields_change(
+    django_capture_on_commit_callbacks,
+) -> None:
+    user = get_user_model().objects.create_user(username="counted_saves", password="pass")
+    org = Organization.objects.create(name="CareOS", slug="careos-counted-saves")
+    with django_capture_on_commit_callbacks(execute=True):
+        item = WorkItem.objects.create(
+            organization=org, kind="triage", status="assigned", assigned_to=user
+        )
+    assert UserCounter.objects.get(user=user).open_work_items == 1
+
+    item.kind = "review"
+    with CaptureQueriesContext(connection) as queries:
+        with django_capture_on_commit_callbacks() as callbacks:
+            item.save(update_fields=["kind", "updated_at"])
+    assert not any(
+        query["sql"].startswith("SELECT") and '"core_workitem"' in query["sql"]
+        for query in queries.captured_queries
+    )
+    assert not callbacks
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        item.save()
+    assert not callbacks
+
+    item.status = "completed"
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        item.save(update_fields=["status"])
+    assert len(callbacks) == 1
+    assert UserCounter.objects.get(user=user).open_work_items == 0
+
+
+@pytest.mark.django_db
+def test_me_counters_are_maintained_on_write_and_reconciled(
+    client, django_capture_on_commit_callbacks
+) -> None:
+    user = get_user_model().objects.create_user(username="counted", password="pass")
+    other = get_user_model().objects.create_user(username="sender", password="pass")
+    org = Organization.objects.create(name="CareOS", slug="careos-counters")
+    Membership.objects.create(user=user, organization=org, role=Role.STAFF)
+    Membership.objects.create(user=other, organization=org, role=Role.STAFF)
+    now = timezone.now()
+    for index in range(3):
+        Notification.objects.create(
+            organization=org, recipient=user, title=f"N{index}", dedupe_key=f"seed:{index}"
+        )
+    with django_capture_on_commit_callbacks(execute=True):
+        item = WorkItem.objects.create(organization=org, kind="triage", status="open")
+        WorkItem.objects.create(
+            organization=org, kind="triage", assigned_to=user, due_at=now - timedelta(minutes=5)
+        )
+    conversation = Conversation.objects.create(organization=org)
+    conversation.participants.set([user, other])
+    message = Message.objects.create(
+        organization=org, conversation=conversation, sender=other, body="Hi"
+    )
+    Message.objects.create(organization=org, conversation=conversation, sender=user, body="Yo")
+
+    client.force_login(user)
+    with django_capture_on_commit_callbacks(execute=True):
+        assigned = client.post(
+            f"/work-items/{item.id}/assign/", data=json.dumps({}), content_type="application/json"
+        )
+    assert assigned.status_code == 200
+    with CaptureQueriesContext(connection) as queries:
+        counters = client.get("/me/counters/").json()
+    assert not any('"core_notification"' in query["sql"] for query in queries.captured_queries)
+    assert counters == {
+        "unread_notifications": 4,
+        "open_work_items": 2,
+        "breached_slas": 1,
+        "unread_messages": 1,
+    }
+
+    client.post(f"/messages/{message.id}/read/")
+    with django_capture_on_commit_callbacks(execute=True):
+        client.post(f"/work-items/{item.id}/complete/")
+    response = client.post("/notifications/read-all/")
+    assert response.json() == {"updated": 4}
+    assert client.get("/me/counters/").json() == {
+        "unread_notifications": 0,
+        "open_work_items": 1,
+        "breached_slas": 1,
+        "unread_messages": 0,
+    }
+
+    UserCounter.objects.filter(user=user).update(unread_notifications=9, open_work_items=0)
+    assert reconcile_counters(organization_id=org.id) == 2
+    counter = UserCounter.objects.get(user=user)
+    assert (counter.unread_notifications, counter.open_work_items) == (0, 1)
+    assert counter.reconciled_at is not None
@@ -1,11 +1,27 @@
 from __future__ import annotations
 
 import json
+import logging
+import os
+import subprocess
+import sys
+from pathlib import Path
 
 import pytest
 from django.contrib.auth import get_user_model
+from django.http import JsonResponse
+from django.test.utils import override_settings
 
-from core.models import AuditEvent, Membership, Organization
+from careos_api.logging import JsonFormatter
+from careos_api.query_accounting import QueryAccountingMiddleware, normalize_sql
+from core.models import (
+    AuditEvent,
+    Conversation,
+    Membership,
+    Message,
+    MessageRead,
+    Organization,
+)
 from core.rbac import Role
 
 
@@ -30,9 +46,7 @@ def test_request_id_in_response_and_audit(client) -> None:
     )
     assert response.status_code == 201
     request_id = response["X-Request-ID"]
-    event = AuditEvent.objects.filter(
-        organization=org, action="privacy.consent.recorded"
-    ).first()
+    event = AuditEvent.objects.filter(organization=org, action="privacy.consent.recorded").first()
     assert event is not None
     assert event.request_id == request_id
 
@@ -46,3 +60,145 @@ def test_metrics_endpoint_returns_snapshot(client) -> None:
     payload = metrics.json()
     assert "total_requests" in payload
     assert "last_duration_ms" in payload
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint_renders_prometheus_histograms(client) -> None:
+    assert client.get("/health/").status_code == 200
+    response = client.get("/metrics/", HTTP_ACCEPT="text/plain")
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain")
+    body = response.content.decode()
+    assert "# TYPE careos_http_request_duration_seconds histogram" in body
+    assert 'route="health/",method="GET",status="2xx",le="+Inf"' in body
+    assert 'careos_http_request_duration_seconds_count{route="health/",method="GET"' in body
+
+
+def test_metrics_spool_aggregates_worker_files(tmp_path: Path) -> None:
+    from careos_api.observability import MetricsCollector
+
+    first = MetricsCollector(spool_dir=str(tmp_path))
+    first.record(3.0, route="episodes/", method="GET", status=200)
+    first.spool()
+    (tmp_path / "metrics-other.json").write_text(
+        json.dumps(
+            {
+                "total_requests": 2,
+                "histograms": [
+                    {
+                        "labels": ["episodes/", "GET", "2xx"],
+                        "buckets": [0, 0, 2] + [0] * 12,
+                        "count": 2,
+                        "sum": 0.006,
+                    }
+                ],
+            }
+        )
+    )
+
+    state = first.aggregate()
+    assert state["total_requests"] == 3
+    (histogram,) = state["histograms"]
+    assert histogram["count"] == 3
+    assert histogram["buckets"][2] == 3
+    assert "careos_http_requests_total 3" in first.render_prometheus()
+
+
+def test_metrics_spool_retires_dead_workers_without_losing_counts(tmp_path: Path) -> None:
+    from careos_api.observability import MetricsCollector
+
+    exited = subprocess.Popen([sys.executable, "-c", "pass"])
+    exited.wait()
+    spooled: dict = {
+        "total_requests": 4,
+        "histograms": [
+            {
+                "labels": ["episodes/", "GET", "2xx"],
+                "buckets": [4] + [0] * 14,
+                "count": 4,
+                "sum": 0.004,
+            }
+        ],
+    }
+    dead_file = tmp_path / f"metrics-{exited.pid}-deadbeef.json"
+    dead_file.write_text(json.dumps(spooled))
+    reused_pid_file = tmp_path / f"metrics-{os.getpid()}.json"
+    reused_pid_file.write_text(json.dumps(spooled | {"total_requests": 2}))
+
+    collector = MetricsCollector(spool_dir=str(tmp_path))
+    collector.record(3.0, route="episodes/", method="GET", status=200)
+    assert collector.aggregate()["total_requests"] == 7
+    assert not dead_file.exists()
+    assert reused_pid_file.exists()
+    assert (tmp_path / "metrics-retired.json").exists()
+
+    collector.record(3.0, route="episodes/", method="GET", status=200)
+    state = collector.aggregate()
+    assert state["total_requests"] == 8
+    (histogram,) = state["histograms"]
+    assert histogram["count"] == 10
+
+
+def test_normalize_sql_collapses_literals_and_in_lists() -> None:
+    assert (
+        normalize_sql(
+            "SELECT 1 AS \"a\" FROM t WHERE x = %s AND y IN (%s, %s) AND z = 'v' LIMIT 21"
+        )
+        == 'SELECT ? AS "a" FROM t WHERE x = ? AND y IN (...) AND z = ? LIMIT ?'
+    )
+
+
+@pytest.mark.django_db
+def test_query_accounting_flags_n_plus_one(rf, caplog) -> None:
+    user = get_user_model().objects.create_user(username="staff", password="pass")
+    org = Organization.objects.create(name="CareOS", slug="careos")
+    conversation = Conversation.objects.create(organization=org)
+    for index in range(6):
+        Message.objects.create(
+            organization=org, conversation=conversation, sender=user, body=f"m{index}"
+        )
+
+    def view(request):
+        return JsonResponse(
+            {
+                "read": [
+                    MessageRead.objects.filter(message=message, reader=user).exists()
+                    for message in Message.objects.filter(conversation=conversation)
+                ]
+            }
+        )
+
+    request = rf.get(f"/conversations/{conversation.id}/")
+    with override_settings(DB_N_PLUS_ONE_THRESHOLD=3):
+        with caplog.at_level(logging.WARNING, logger="careos_api.db"):
+            response = QueryAccountingMiddleware(view)(request)
+
+    assert response.status_code == 200
+    assert int(response["X-DB-Queries"]) >= 6
+    assert float(response["X-DB-Time-ms"]) >= 0
+    (record,) = [item for item in caplog.records if item.getMessage() == "db.n_plus_one"]
+    assert any(
+        "core_messageread" in template and count == 6
+        for template, count in record.db_repeated_queries.items()
+    )
+    payload = json.loads(JsonFormatter().format(record))
+    assert payload["db_queries"] == int(response["X-DB-Queries"])
+    assert payload["path"] == f"/conversations/{conversation.id}/"
+
+
+@pytest.mark.django_db
+def test_query_accounting_logs_every_request_at_the_configured_level(client, caplog) -> None:
+    response = client.get("/health/")
+
+    (record,) = [item for item in caplog.records if item.getMessage() == "db.request"]
+    assert record.levelno == logging.INFO
+    assert logging.getLogger("careos_api.db").isEnabledFor(record.levelno)
+    assert record.db_queries == int(response["X-DB-Queries"])
+    assert record.path == "/health/"
+
+
+@pytest.mark.django_db
+def test_query_headers_can_be_disabled(client) -> None:
+    with override_settings(DB_QUERY_HEADERS_ENABLED=False):
+        response = client.get("/health/")
+    assert "X-DB-Queries" not in response
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from core.models import AIReviewRequest, Organization, OutboxMessage
+from core.outbox import enqueue, prune_outbox, relay_outbox
+from core.tasks import process_ai_review_request
+
+
+@pytest.mark.django_db
+@override_settings(AI_REVIEW_PROVIDER="mock")
+def test_outbox_dedupes_pending_messages_and_relays_in_batches() -> None:
+    org = Organization.objects.create(name="CareOS", slug="careos-outbox")
+    reviews = [
+        AIReviewRequest.objects.create(
+            organization=org, input_type="episode.summary", payload={}, status="pending"
+        )
+        for _ in range(3)
+    ]
+    for review in reviews:
+        enqueue(process_ai_review_request, review.id, dedupe_key=f"ai-review:{review.id}")
+    enqueue(process_ai_review_request, reviews[0].id, dedupe_key=f"ai-review:{reviews[0].id}")
+    assert OutboxMessage.objects.filter(status="pending").count() == 3
+
+    assert relay_outbox(batch_size=2) == 3
+    assert OutboxMessage.objects.filter(status="sent").count() == 3
+    assert set(AIReviewRequest.objects.values_list("status", flat=True)) == {"completed"}
+    assert relay_outbox() == 0
+
+    enqueue(process_ai_review_request, reviews[0].id, dedupe_key=f"ai-review:{reviews[0].id}")
+    assert OutboxMessage.objects.filter(status="pending").count() == 1
+
+
+@pytest.mark.django_db
+@override_settings(OUTBOX_MAX_ATTEMPTS=2)
+def test_outbox_retries_with_backoff_then_fails() -> None:
+    enqueue("core.tasks.check_sla_notifications_task")
+    now = timezone.now()
+    with mock.patch(
+        "core.tasks.check_sla_notifications_task.apply_async", side_effect=ConnectionError("down")
+    ):
+        assert relay_outbox(now=now) == 1
+        message = OutboxMessage.objects.get()
+        assert message.status == "pending"
+        assert message.attempts == 1
+        assert message.available_at == now + timedelta(seconds=2)
+        assert "ConnectionError" in message.last_error
+        assert relay_outbox(now=now) == 0
+
+        relay_outbox(now=now + timedelta(seconds=2))
+    message.refresh_from_db()
+    assert message.status == "failed"
+    assert message.attempts == 2
+
+
+@pytest.mark.django_db
+def test_prune_outbox_removes_old_sent_messages() -> None:
+    now = timezone.now()
+    OutboxMessage.objects.create(task_name="x", status="sent", sent_at=now - timedelta(days=2))
+    OutboxMessage.objects.create(task_name="y", status="sent", sent_at=now)
+    OutboxMessage.objects.create(task_name="z")
+    assert prune_outbox(now=now, batch_size=1) == 1
+    assert sorted(OutboxMessage.objects.values_list("task_name", flat=True)) == ["y", "z"]
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import pytest
+from django.contrib.auth import get_user_model
+
+from core.models import AuditEvent, Episode, Membership, Organization
+from core.rbac import Role
+
+
+def _admin_client(client):
+    user = get_user_model().objects.create_user(username="admin", password="pass")
+    org = Organization.objects.create(name="CareOS", slug="careos")
+    Membership.objects.create(user=user, organization=org, role=Role.ADMIN)
+    client.force_login(user)
+    return user, org
+
+
+@pytest.mark.django_db
+def test_cursor_pagination_walks_every_row_once(client) -> None:
+    user, org = _admin_client(client)
+    created = [
+        Episode.objects.create(organization=org, title=f"Episode {index}", created_by=user)
+        for index in range(7)
+    ]
+
+    seen: list[int] = []
+    response = client.get("/episodes/", {"cursor": "", "limit": 3})
+    while True:
+        assert response.status_code == 200
+        data = response.json()
+        assert "count" not in data
+        assert "page" not in data
+        seen.extend(item["id"] for item in data["results"])
+        if not data["next_cursor"]:
+            break
+        response = client.get("/episodes/", {"cursor": data["next_cursor"], "limit": 3})
+
+    assert seen == [episode.id for episode in reversed(created)]
+
+
+@pytest.mark.django_db
+def test_cursor_pagination_count_is_opt_in(client) -> None:
+    user, org = _admin_client(client)
+    for index in range(4):
+        AuditEvent.objects.create(
+            organization=org, actor=user, action=f"test.{index}", target_type="Test"
+        )
+    total = AuditEvent.objects.filter(organization=org).count()
+
+    exact = client.get("/audit-events/", {"cursor": "", "limit": 2, "count": "exact"})
+    assert exact.status_code == 200
+    assert exact.json()["count"] == total
+
+    cached = client.get("/audit-events/", {"cursor": "", "limit": 2, "count": "cached"})
+    assert cached.json()["count"] == total
+    AuditEvent.objects.create(organization=org, actor=user, action="test.late")
+    assert (
+        client.get("/audit-events/", {"cursor": "", "limit": 2, "count": "cached"}).json()["count"]
+        == total
+    )
+
+    estimated = client.get("/audit-events/", {"cursor": "", "limit": 2, "count": "estimate"})
+    assert estimated.json()["count"] >= total
+
+
+@pytest.mark.django_db
+def test_page_mode_keeps_exact_count(client) -> None:
+    user, org = _admin_client(client)
+    for index in range(3):
+        Episode.objects.create(organization=org, title=f"Episode {index}", created_by=user)
+
+    response = client.get("/episodes/", {"page": 2, "page_size": 2})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["count"] == 3
+    assert data["page"] == 2
+    assert len(data["results"]) == 1
+    assert data["next_cursor"] is None
+
+
+@pytest.mark.django_db
+def test_invalid_cursor_is_rejected(client) -> None:
+    _admin_client(client)
+    response = client.get("/episodes/", {"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "invalid cursor"
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import json
+from datetime import date, timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+
+from core.duplicates import scan_organization, soundex
+from core.models import (
+    Membership,
+    Organization,
+    Patient,
+    PatientDuplicateCandidate,
+    PatientDuplicateScan,
+)
+from core.rbac import Role
+
+
+def test_soundex_groups_similar_surnames() -> None:
+    assert soundex("Robert") == "R163"
+    assert soundex("Rupert") == "R163"
+    assert soundex("Ashcraft") == "A261"
+    assert soundex("Smith") == soundex("Smyth")
+    assert soundex("") == ""
+
+
+@pytest.mark.django_db
+def test_scan_is_incremental_and_preserves_dismissals(client, settings) -> None:
+    settings.DUPLICATE_SCAN_OVERLAP_SECONDS = 0
+    user = get_user_model().objects.create_user(username="staff", password="pass")
+    org = Organization.objects.create(name="CareOS", slug="careos")
+    Membership.objects.create(user=user, organization=org, role=Role.STAFF)
+    ada = Patient.objects.create(
+        organization=org,
+        given_name="Ada",
+        family_name="Smith",
+        date_of_birth=date(1980, 1, 2),
+        phone="07700 900123",
+        postal_code="LS1 4AP",
+    )
+    ada_twin = Patient.objects.create(
+        organization=org,
+        given_name="Ada",
+        family_name="Smyth",
+        date_of_birth=date(1980, 1, 2),
+        phone="+44 7700 900123",
+    )
+    Patient.objects.create(
+        organization=org, given_name="Bob", family_name="Jones", postal_code="LS14AP"
+    )
+
+    assert scan_organization(org) == 3
+    pair = PatientDuplicateCandidate.objects.get(organization=org)
+    assert (pair.patient_id, pair.candidate_id) == (ada.id, ada_twin.id)
+    assert pair.reasons == ["date_of_birth", "phone", "family_phonetic", "given_name"]
+    assert pair.score == pytest.approx(0.65)
+    assert scan_organization(org) == 0
+
+    client.force_login(user)
+    listing = client.get("/patients/duplicates/").json()
+    assert [row["id"] for row in listing["results"]] == [pair.id]
+    assert listing["results"][0]["candidate"]["id"] == ada_twin.id
+    dismiss = client.post(f"/patients/duplicates/{pair.id}/dismiss/")
+    assert dismiss.json()["status"] == "dismissed"
+    assert client.get("/patients/duplicates/").json()["results"] == []
+
+    ada_twin.email = "ada@example.com"
+    ada_twin.save()
+    assert scan_organization(org) == 1
+    pair.refresh_from_db()
+    assert pair.status == "dismissed"
+
+
+@pytest.mark.django_db
+def test_changed_patient_drops_stale_candidates_and_merge_closes_pair(client) -> None:
+    user = get_user_model().objects.create_user(username="admin", password="pass")
+    org = Organization.objects.create(name="CareOS", slug="careos-merge")
+    Membership.objects.create(user=user, organization=org, role=Role.ADMIN)
+    first = Patient.objects.create(
+        organization=org, given_name="Grace", family_name="Hopper", email="grace@example.com"
+    )
+    second = Patient.objects.create(
+        organization=org, given_name="Grace", family_name="Hopper", email="GRACE@example.com"
+    )
+    third = Patient.objects.create(
+        organization=org, given_name="Grace", family_name="Hopper", email="grace@example.com"
+    )
+    scan_organization(org)
+    assert PatientDuplicateCandidate.objects.filter(organization=org).count() == 3
+
+    third.given_name = "Gail"
+    third.family_name = "Other"
+    third.email = "gail@example.com"
+    third.save()
+    scan_organization(org)
+    assert list(PatientDuplicateCandidate.objects.values_list("patient_id", "candidate_id")) == [
+        (first.id, second.id)
+    ]
+
+    client.force_login(user)
+    response = client.post(
+        f"/patients/{first.id}/merge/",
+        data=json.dumps({"source_id": second.id}),
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+    assert PatientDuplicateCandidate.objects.get().status == "merged"
+    assert client.get("/patients/duplicates/?status=merged").json()["results"] == []
+
+
+@pytest.mark.django_db
+def test_scan_rescans_overlap_and_sees_queryset_updates(settings) -> None:
+    settings.DUPLICATE_SCAN_OVERLAP_SECONDS = 0
+    org = Organization.objects.create(name="CareOS", slug="careos-overlap")
+    ada = Patient.objects.create(
+        organization=org, given_name="Ada", family_name="Smith", phone="07700 900123"
+    )
+    twin = Patient.objects.create(organization=org, given_name="Ada", family_name="Jones")
+    assert scan_organization(org) == 2
+    assert not PatientDuplicateCandidate.objects.filter(organization=org).exists()
+
+    Patient.objects.filter(pk=twin.pk).update(family_name="Smith", phone="07700 900123")
+    assert scan_organization(org) == 1
+    assert PatientDuplicateCandidate.objects.filter(patient=ada, candidate=twin).exists()
+
+    state = PatientDuplicateScan.objects.get(organization=org)
+    late = Patient.objects.create(
+        organization=org, given_name="Ada", family_name="Smith", phone="07700 900123"
+    )
+    Patient.objects.filter(pk=late.pk).update(
+        updated_at=state.last_updated_at - timedelta(seconds=30)
+    )
+    assert scan_organization(org) == 0
+
+    settings.DUPLICATE_SCAN_OVERLAP_SECONDS = 60
+    assert scan_organization(org) == 3
+    assert PatientDuplicateCandidate.objects.filter(candidate=late).count() == 2
+
+
+@pytest.mark.django_db
+def test_only_scanned_field_updates_mark_patients_for_rescan() -> None:
+    org = Organization.objects.create(name="CareOS", slug="careos-touch")
+    patient = Patient.objects.create(organization=org, given_name="Ada", family_name="Smith")
+    updated_at = Patient.objects.get(pk=patient.pk).updated_at
+
+    Patient.objects.filter(pk=patient.pk).update(restricted=True)
+    assert Patient.objects.get(pk=patient.pk).updated_at == updated_at
+
+    Patient.objects.filter(pk=patient.pk).update(phone="07700 900123")
+    assert Patient.objects.get(pk=patient.pk).updated_at > updated_at
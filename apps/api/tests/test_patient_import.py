@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import json
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+
+from core.models import (
+    Membership,
+    Organization,
+    Patient,
+    PatientAddress,
+    PatientIdentifier,
+    PatientImportJob,
+)
+from core.outbox import relay_outbox
+from core.rbac import Role
+
+CSV_ROWS = (
+    "given_name,family_name,date_of_birth,nhs_number,identifiers\n"
+    'Ada,Lovelace,1815-12-10,123 456 7890,"[{""kind"": ""MRN"", ""value"": ""A1""}]"\n'
+    "Grace,Hopper,1906-12-09,2222222222,\n"
+    "Alan,,1912-06-23,3333333333,\n"
+    "Edsger,Dijkstra,not-a-date,4444444444,\n"
+    "Barbara,Liskov,1939-11-07,12345,\n"
+    "Ada,Duplicate,,1234567890,\n"
+)
+
+
+@pytest.mark.django_db
+def test_admin_imports_csv_and_skips_conflicts(
+    client, tmp_path: Path, django_capture_on_commit_callbacks
+) -> None:
+    user = get_user_model().objects.create_user(username="admin", password="pass")
+    org = Organization.objects.create(name="CareOS", slug="careos")
+    Membership.objects.create(user=user, organization=org, role=Role.ADMIN)
+    Patient.objects.create(
+        organization=org, given_name="Existing", family_name="Hopper", nhs_number="2222222222"
+    )
+    client.force_login(user)
+
+    upload = SimpleUploadedFile("patients.csv", CSV_ROWS.encode(), content_type="text/csv")
+    with override_settings(IMPORT_STORAGE_DIR=str(tmp_path)):
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.post("/patients/imports/", data={"file": upload})
+        assert response.status_code == 202
+        relay_outbox()
+    job_id = response.json()["id"]
+
+    detail = client.get(f"/patients/imports/{job_id}/").json()
+    assert detail["status"] == "done"
+    assert detail["format"] == "csv"
+    assert detail["total_rows"] == 6
+    assert detail["created"] == 1
+    assert detail["skipped"] == 1
+    assert detail["errors"] == 4
+    assert [error["row"] for error in detail["row_errors"]] == [4, 5, 6, 7]
+    assert detail["rows_per_second"] > 0
+
+    ada = Patient.objects.get(organization=org, nhs_number="1234567890")
+    assert list(ada.identifiers.values_list("kind", "value")) == [("MRN", "A1")]
+    assert Patient.objects.get(organization=org, nhs_number="2222222222").given_name == "Existing"
+
+    listing = client.get("/patients/imports/").json()
+    assert [job["id"] for job in listing["results"]] == [job_id]
+
+
+@pytest.mark.django_db
+def test_staff_cannot_import_patients(client) -> None:
+    user = get_user_model().objects.create_user(username="staff", password="pass")
+    org = Organization.objects.create(name="CareOS", slug="careos-staff")
+    Membership.objects.create(user=user, organization=org, role=Role.STAFF)
+    client.force_login(user)
+
+    upload = SimpleUploadedFile("patients.csv", CSV_ROWS.encode(), content_type="text/csv")
+    response = client.post("/patients/imports/", data={"file": upload})
+    assert response.status_code == 403
+    assert not PatientImportJob.objects.exists()
+
+
+@pytest.mark.django_db
+def test_import_command_updates_conflicts_from_ndjson(tmp_path: Path) -> None:
+    org = Organization.objects.create(name="CareOS", slug="careos-cmd")
+    existing = Patient.objects.create(
+        organization=org, given_name="Old", family_name="Name", nhs_number="5555555555"
+    )
+    PatientIdentifier.objects.create(organization=org, patient=existing, kind="MRN", value="OLD")
+    rows = [
+        {
+            "given_name": "New",
+            "family_name": "Name",
+            "nhs_number": "5555555555",
+            "identifiers": [{"kind": "MRN", "value": "NEW"}],
+        }
+    ]
+    rows += [
+        {
+            "given_name": f"Patient{index}",
+            "family_name": "Bulk",
+            "nhs_number": f"{6000000000 + index}",
+            "addresses": [{"line1": f"{index} High Street", "city": "Leeds"}],
+        }
+        for index in range(5)
+    ]
+    source = tmp_path / "patients.ndjson"
+    source.write_text("\n".join(json.dumps(row) for row in rows) + "\n{broken\n")
+
+    out = StringIO()
+    call_command(
+        "import_patients",
+        "--org-slug=careos-cmd",
+        f"--file={source}",
+        "--conflict=update",
+        "--batch-size=2",
+        stdout=out,
+        stderr=StringIO(),
+    )
+
+    job = PatientImportJob.objects.get(organization=org)
+    assert job.source_format == "ndjson"
+    assert (job.created_count, job.updated_count, job.error_count) == (5, 1, 1)
+    existing.refresh_from_db()
+    assert existing.given_name == "New"
+    assert list(existing.identifiers.values_list("value", flat=True)) == ["NEW"]
+    assert PatientAddress.objects.filter(organization=org).count() == 5
+    assert "5 created, 1 updated" in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_import_validates_fields_and_updates_only_present_columns(tmp_path: Path) -> None:
+    org = Organization.objects.create(name="CareOS", slug="careos-columns")
+    existing = Patient.objects.create(
+        organization=org,
+        given_name="Old",
+        family_name="Name",
+        nhs_number="7777777777",
+        phone="+447700900000",
+        email="old@example.com",
+        restricted=True,
+    )
+    source = tmp_path / "patients.csv"
+    source.write_text(
+        "given_name,family_name,nhs_number,email\n"
+        "New,Name,7777777777,new@example.com\n"
+        "Bad,Email,8888888888,not-an-email\n"
+        f"{'x' * 121},Long,9999999999,\n"
+    )
+
+    call_command(
+        "import_patients",
+        "--org-slug=careos-columns",
+        f"--file={source}",
+        "--conflict=update",
+        stdout=StringIO(),
+        stderr=StringIO(),
+    )
+
+    job = PatientImportJob.objects.get(organization=org)
+    assert job.status == "done"
+    assert (job.created_count, job.updated_count, job.error_count) == (0, 1, 2)
+    assert [error["row"] for error in job.errors] == [3, 4]
+    assert job.errors[0]["error"].startswith("email:")
+    assert job.errors[1]["error"].startswith("given_name:")
+    existing.refresh_from_db()
+    assert (existing.given_name, existing.email) == ("New", "new@example.com")
+    assert existing.phone == "+447700900000"
+    assert existing.restricted
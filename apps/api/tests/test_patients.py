@@ -5,10 +5,24 @@ from datetime import timedelta
 
 import pytest
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
-from core.models import AuditEvent, ConsentRecord, Episode, Membership, Organization, Patient
+from core.models import (
+    AuditEvent,
+    CareCircleMember,
+    ConsentRecord,
+    Episode,
+    Membership,
+    Organization,
+    Patient,
+    PatientIdentifier,
+    PortalSession,
+)
+from core.merge import collapse_merge_chains, resolve_patient
 from core.rbac import Role
+from core.tokens import hash_token
 
 
 @pytest.mark.django_db
@@ -20,7 +34,9 @@ def test_admin_can_create_and_view_patient(client) -> None:
     client.force_login(user)
     create = client.post(
         "/patients/",
-        data=json.dumps({"given_name": "Ada", "family_name": "Lovelace", "nhs_number": "1234567890"}),
+        data=json.dumps(
+            {"given_name": "Ada", "family_name": "Lovelace", "nhs_number": "1234567890"}
+        ),
         content_type="application/json",
     )
     assert create.status_code == 201
@@ -130,7 +146,7 @@ def test_care_circle_and_consents_require_patient_write(client) -> None:
 
 
 @pytest.mark.django_db
-def test_restricted_episode_requires_consent(client) -> None:
+def test_restricted_episode_requires_consent(client, django_capture_on_commit_callbacks) -> None:
     user = get_user_model().objects.create_user(username="staff-consent", password="pass")
     org = Organization.objects.create(name="CareOS", slug="careos-consent")
     Membership.objects.create(user=user, organization=org, role=Role.STAFF)
@@ -146,19 +162,20 @@ def test_restricted_episode_requires_consent(client) -> None:
     detail = client.get(f"/episodes/{episode.id}/")
     assert detail.status_code == 403
 
-    ConsentRecord.objects.create(
-        organization=org,
-        patient=patient,
-        subject_type="patient",
-        subject_id=str(patient.id),
-        consent_type="episodes.read",
-        scope="episodes.read",
-        lawful_basis="consent",
-        granted_by="patient",
-        policy_version="v1",
-        expires_at=timezone.now() + timedelta(days=1),
-        granted=True,
-    )
+    with django_capture_on_commit_callbacks(execute=True):
+        ConsentRecord.objects.create(
+            organization=org,
+            patient=patient,
+            subject_type="patient",
+            subject_id=str(patient.id),
+            consent_type="episodes.read",
+            scope="episodes.read",
+            lawful_basis="consent",
+            granted_by="patient",
+            policy_version="v1",
+            expires_at=timezone.now() + timedelta(days=1),
+            granted=True,
+        )
 
     detail_ok = client.get(f"/episodes/{episode.id}/")
     assert detail_ok.status_code == 200
@@ -203,6 +220,95 @@ def test_staff_can_merge_patient_and_emit_audit(client) -> None:
     ).exists()
 
 
+@pytest.mark.django_db
+def test_merge_repoints_every_relation_and_compresses_chains(client) -> None:
+    user = get_user_model().objects.create_user(username="staff-merge", password="pass")
+    org = Organization.objects.create(name="CareOS", slug="careos-merge-all")
+    Membership.objects.create(user=user, organization=org, role=Role.STAFF)
+    target = Patient.objects.create(organization=org, given_name="Target", family_name="One")
+    source = Patient.objects.create(organization=org, given_name="Source", family_name="Two")
+    older = Patient.objects.create(
+        organization=org, given_name="Older", family_name="Two", merged_into=source
+    )
+    PatientIdentifier.objects.create(organization=org, patient=source, kind="MRN", value="S1")
+    CareCircleMember.objects.create(
+        organization=org, patient=source, person_name="Sam", relationship="Son"
+    )
+    PortalSession.objects.create(
+        organization=org,
+        patient=source,
+        role="patient",
+        token_hash=hash_token("session-token"),
+        expires_at=timezone.now() + timedelta(hours=1),
+    )
+    ConsentRecord.objects.create(
+        organization=org,
+        patient=source,
+        subject_type="patient",
+        subject_id=str(source.id),
+        consent_type="care",
+        policy_version="v1",
+    )
+
+    client.force_login(user)
+    dry_run = client.post(
+        f"/patients/{target.id}/merge/",
+        data=json.dumps({"source_ids": [source.id], "dry_run": True}),
+        content_type="application/json",
+    ).json()
+    assert dry_run["dry_run"] is True
+    assert dry_run["counts"]["PatientIdentifier"] == 1
+    assert dry_run["counts"]["Patient.merged_into"] == 1
+    source.refresh_from_db()
+    assert source.merged_into_id is None
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.post(
+            f"/patients/{target.id}/merge/",
+            data=json.dumps({"source_id": source.id}),
+            content_type="application/json",
+        )
+    assert response.status_code == 200
+    assert response.json()["counts"]["CareCircleMember"] == 1
+    updates = [
+        query["sql"]
+        for query in queries.captured_queries
+        if query["sql"].startswith('UPDATE "core_patientidentifier"')
+    ]
+    assert len(updates) == 1
+    older.refresh_from_db()
+    assert older.merged_into_id == target.id
+    assert target.identifiers.count() == 1
+    assert target.care_circle.count() == 1
+    assert PortalSession.objects.get().patient_id == target.id
+    assert ConsentRecord.objects.get().patient_id == target.id
+
+    resolved = client.get(f"/patients/{older.id}/").json()
+    assert resolved["id"] == target.id
+    assert resolved["resolved_from_id"] == older.id
+
+
+@pytest.mark.django_db
+def test_collapse_merge_chains_points_every_patient_at_survivor() -> None:
+    org = Organization.objects.create(name="CareOS", slug="careos-chains")
+    root = Patient.objects.create(organization=org, given_name="Root", family_name="A")
+    middle = Patient.objects.create(
+        organization=org, given_name="Middle", family_name="A", merged_into=root
+    )
+    leaf = Patient.objects.create(
+        organization=org, given_name="Leaf", family_name="A", merged_into=middle
+    )
+    deepest = Patient.objects.create(
+        organization=org, given_name="Deepest", family_name="A", merged_into=leaf
+    )
+
+    assert collapse_merge_chains() > 0
+    for patient in (middle, leaf, deepest):
+        patient.refresh_from_db()
+        assert patient.merged_into_id == root.id
+    assert resolve_patient(org, deepest.id) == root
+
+
 @pytest.mark.django_db
 def test_viewer_cannot_merge_patient(client) -> None:
     user = get_user_model().objects.create_user(username="viewer2", password="pass")
@@ -218,3 +324,152 @@ def test_viewer_cannot_merge_patient(client) -> None:
         content_type="application/json",
     )
     assert response.status_code == 403
+
+
+@pytest.mark.django_db
+def test_patient_search_uses_ranked_token_index(client) -> None:
+    user = get_user_model().objects.create_user(username="staff-rank", password="pass")
+    org = Organization.objects.create(name="CareOS", slug="careos-rank")
+    other_org = Organization.objects.create(name="Other", slug="other-rank")
+    Membership.objects.create(user=user, organization=org, role=Role.STAFF)
+    exact = Patient.objects.create(
+        organization=org, given_name="Ada", family_name="Lovelace", phone="+44 7700 900123"
+    )
+    prefix = Patient.objects.create(organization=org, given_name="Adam", family_name="Smith")
+    by_nhs = Patient.objects.create(
+        organization=org, given_name="Grace", family_name="Hopper", nhs_number="9434765919"
+    )
+    Patient.objects.create(organization=other_org, given_name="Ada", family_name="Elsewhere")
+    renamed = Patient.objects.create(organization=org, given_name="Zed", family_name="Old")
+    Patient.objects.filter(id=renamed.id).update(family_name="Brontë")
+
+    client.force_login(user)
+    ranked = client.get("/patients/search/", {"q": "ada"}).json()["results"]
+    assert [item["id"] for item in ranked] == [exact.id, prefix.id]
+
+    both_words = client.get("/patients/search/", {"q": "ada love"}).json()["results"]
+    assert [item["id"] for item in both_words] == [exact.id]
+
+    nhs = client.get("/patients/search/", {"q": "943 476 5919"}).json()["results"]
+    assert [item["id"] for item in nhs] == [by_nhs.id]
+
+    phone = client.get("/patients/", {"search": "+447700900123"}).json()["results"]
+    assert [item["id"] for item in phone] == [exact.id]
+
+    accented = client.get("/patients/", {"search": "bronte"}).json()["results"]
+    assert [item["id"] for item in accented] == [renamed.id]
+
+    first = client.get("/patients/search/", {"q": "ada", "cursor": "", "limit": 1}).json()
+    second = client.get(
+        "/patients/search/", {"q": "ada", "cursor": first["next_cursor"], "limit": 1}
+    ).json()
+    assert [first["results"][0]["id"], second["results"][0]["id"]] == [exact.id, prefix.id]
+
+
+@pytest.mark.django_db
+def test_patient_search_matches_word_prefixes_of_any_length(client) -> None:
+    user = get_user_model().objects.create_user(username="staff-prefix", password="pass")
+    org = Organization.objects.create(name="CareOS", slug="careos-prefix")
+    Membership.objects.create(user=user, organization=org, role=Role.STAFF)
+    long_name = Patient.objects.create(
+        organization=org,
+        given_name="Hugh",
+        family_name="Featherstonehaugh",
+        phone="+44 7700 900123",
+    )
+    Patient.objects.create(organization=org, given_name="Hugh", family_name="Featherstonely")
+
+    client.force_login(user)
+
+    def search(query: str) -> list[int]:
+        results = client.get("/patients/", {"search": query}).json()["results"]
+        return [item["id"] for item in results]
+
+    assert search("featherstoneh") == [long_name.id]
+    assert search("hugh featherstonehaugh") == [long_name.id]
+    assert len(search("featherstone")) == 2
+    # Matching is by word prefix: substrings inside a word or trailing digits do not match.
+    assert search("stonehaugh") == []
+    assert search("900123") == []
+
+
+@pytest.mark.django_db
+def test_patient_list_include_prefetches_profiles(client) -> None:
+    user = get_user_model().objects.create_user(username="staff-include", password="pass")
+    org = Organization.objects.create(name="CareOS", slug="careos-include")
+    Membership.objects.create(user=user, organization=org, role=Role.STAFF)
+    client.force_login(user)
+
+    def list_queries(count: int) -> int:
+        for index in range(count):
+            patient = Patient.objects.create(
+                organization=org, given_name=f"P{index}", family_name="Include"
+            )
+            PatientIdentifier.objects.create(
+                organization=org, patient=patient, kind="mrn", value=f"M{index}"
+            )
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get("/patients/", {"include": "identifiers,contacts"})
+        assert response.status_code == 200
+        for item in response.json()["results"]:
+            assert len(item["identifiers"]) == 1
+            assert item["contacts"] == []
+            assert "addresses" not in item
+        return len(queries)
+
+    client.get("/patients/")
+    assert list_queries(2) == list_queries(8)
+    plain = client.get("/patients/").json()["results"][0]
+    assert "identifiers" not in plain
+
+
+@pytest.mark.django_db
+def test_patient_profile_update_is_a_diff(client) -> None:
+    user = get_user_model().objects.create_user(username="admin-diff", password="pass")
+    org = Organization.objects.create(name="CareOS", slug="careos-diff")
+    Membership.objects.create(user=user, organization=org, role=Role.ADMIN)
+    client.force_login(user)
+    created = client.post(
+        "/patients/",
+        data=json.dumps(
+            {
+                "given_name": "Ada",
+                "family_name": "Lovelace",
+                "identifiers": [
+                    {"kind": "mrn", "value": "A1"},
+                    {"kind": "hospital", "value": "H1"},
+                ],
+            }
+        ),
+        content_type="application/json",
+    ).json()
+    mrn, hospital = created["identifiers"]
+
+    updated = client.patch(
+        f"/patients/{created['id']}/",
+        data=json.dumps(
+            {
+                "identifiers": [
+                    {"kind": "mrn", "value": "A1"},
+                    {"id": hospital["id"], "kind": "hospital", "value": "H2"},
+                    {"kind": "nhs", "value": "N1"},
+                ],
+                "contacts": [{"kind": "phone", "value": "+447700900123"}],
+            }
+        ),
+        content_type="application/json",
+    )
+
+    assert updated.status_code == 200
+    identifiers = updated.json()["identifiers"]
+    assert [item["id"] for item in identifiers[:2]] == [mrn["id"], hospital["id"]]
+    assert [item["value"] for item in identifiers] == ["A1", "H2", "N1"]
+    assert updated.json()["contacts"][0]["value"] == "+447700900123"
+
+    trimmed = client.patch(
+        f"/patients/{created['id']}/",
+        data=json.dumps({"identifiers": [{"kind": "nhs", "value": "N1"}]}),
+        content_type="application/json",
+    )
+    assert [item["value"] for item in trimmed.json()["identifiers"]] == ["N1"]
+    assert PatientIdentifier.objects.filter(patient_id=created["id"]).count() == 1
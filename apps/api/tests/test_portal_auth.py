@@ -6,10 +6,23 @@ from datetime import timedelta
 
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
-from core.models import Membership, Organization, Patient, PortalInvite
+from core.models import (
+    Membership,
+    Organization,
+    Patient,
+    PatientOTP,
+    PatientProfile,
+    PatientToken,
+    PortalInvite,
+    PortalSession,
+)
 from core.rbac import Role
+from core.tokens import authenticate, hash_token, sweep_expired_tokens, token_cache
 
 
 @pytest.mark.django_db
@@ -70,3 +83,141 @@ def test_portal_tenant_isolation(client) -> None:
 
     staff_endpoint = client.get("/episodes/")
     assert staff_endpoint.status_code == 401
+
+
+@pytest.mark.django_db
+def test_portal_session_tokens_are_hashed_cached_and_revocable(
+    client, settings, django_capture_on_commit_callbacks
+) -> None:
+    settings.SESSION_EXPIRY_COALESCE_MINUTES = 15
+    org = Organization.objects.create(name="CareOS", slug="careos3")
+    patient = Patient.objects.create(organization=org, given_name="Cy", family_name="Cole")
+    PortalInvite.objects.create(
+        organization=org,
+        patient=patient,
+        email="cy@example.com",
+        role="PATIENT",
+        token_hash="unused",
+        expires_at=timezone.now() + timedelta(hours=2),
+        accepted_at=timezone.now(),
+    )
+    login = client.post(
+        "/portal/auth/login/",
+        data=json.dumps({"email": "cy@example.com"}),
+        content_type="application/json",
+    )
+    portal_token = login.json()["token"]
+    session = PortalSession.objects.get()
+    assert session.token_hash == hash_token(portal_token)
+    assert not PortalSession.objects.filter(token_hash=portal_token).exists()
+
+    headers = {"HTTP_AUTHORIZATION": f"Bearer {portal_token}"}
+    assert client.get("/portal/me/", **headers).status_code == 200
+    with CaptureQueriesContext(connection) as queries:
+        assert client.get("/portal/me/", **headers).status_code == 200
+    assert not any('FROM "core_portalsession"' in q["sql"] for q in queries.captured_queries)
+    assert token_cache.stats().hits >= 1
+
+    stale = timezone.now() + timedelta(hours=1)
+    PortalSession.objects.filter(pk=session.pk).update(expires_at=stale)
+    token_cache.clear()
+    client.get("/portal/me/", **headers)
+    session.refresh_from_db()
+    assert session.expires_at > stale + timedelta(hours=20)
+    refreshed = session.expires_at
+    client.get("/portal/me/", **headers)
+    session.refresh_from_db()
+    assert session.expires_at == refreshed
+
+    with django_capture_on_commit_callbacks(execute=True):
+        logout = client.post("/portal/auth/logout/", **headers)
+    assert logout.status_code == 200
+    assert not PortalSession.objects.exists()
+    assert client.get("/portal/me/", **headers).status_code == 401
+
+
+@pytest.mark.django_db
+def test_sweep_expired_tokens_prunes_in_batches(client, django_capture_on_commit_callbacks) -> None:
+    org = Organization.objects.create(name="CareOS", slug="careos4")
+    patient = Patient.objects.create(organization=org, given_name="Di", family_name="Dee")
+    profile = PatientProfile.objects.create(
+        organization=org,
+        user=get_user_model().objects.create_user(username="patient_di"),
+        phone="+441",
+    )
+    past = timezone.now() - timedelta(minutes=1)
+    future = timezone.now() + timedelta(hours=1)
+    for index in range(3):
+        PortalSession.objects.create(
+            organization=org,
+            patient=patient,
+            role="PATIENT",
+            token_hash=hash_token(f"expired-{index}"),
+            expires_at=past,
+        )
+        PatientToken.objects.create(
+            patient=profile, token_hash=hash_token(f"old-{index}"), expires_at=past
+        )
+        PatientOTP.objects.create(phone="+441", code="123456", expires_at=past)
+    PortalSession.objects.create(
+        organization=org,
+        patient=patient,
+        role="PATIENT",
+        token_hash=hash_token("live"),
+        expires_at=future,
+    )
+    PatientToken.objects.create(patient=profile, token_hash=hash_token("fresh"), expires_at=future)
+
+    swept = sweep_expired_tokens(batch_size=2)
+
+    assert swept == {"PortalSession": 3, "PatientToken": 3, "PatientOTP": 3}
+    assert PortalSession.objects.get().token_hash == hash_token("live")
+    assert PatientToken.objects.count() == 1
+    assert not PatientOTP.objects.exists()
+    response = client.get("/patient/adherence/", HTTP_AUTHORIZATION="Bearer fresh")
+    assert response.status_code == 200
+    with django_capture_on_commit_callbacks(execute=True):
+        logout = client.post("/patient/auth/logout/", HTTP_AUTHORIZATION="Bearer fresh")
+    assert logout.status_code == 200
+    assert client.get("/patient/adherence/", HTTP_AUTHORIZATION="Bearer fresh").status_code == 401
+
+
+@pytest.mark.django_db
+def test_cached_tokens_are_rebuilt_per_request_and_follow_patient_changes(
+    settings, django_capture_on_commit_callbacks
+) -> None:
+    org = Organization.objects.create(name="CareOS", slug="careos5")
+    patient = Patient.objects.create(organization=org, given_name="Ed", family_name="Eve")
+    PortalSession.objects.create(
+        organization=org,
+        patient=patient,
+        role="PATIENT",
+        token_hash=hash_token("cached"),
+        expires_at=timezone.now() + timedelta(hours=1),
+    )
+
+    first = authenticate(PortalSession, "cached", "patient", "organization")
+    with CaptureQueriesContext(connection) as queries:
+        second = authenticate(PortalSession, "cached", "patient", "organization")
+    assert not queries.captured_queries
+    assert first is not None and second is not None
+    assert second is not first
+    assert second.patient is not first.patient
+    assert second.organization.slug == "careos5"
+
+    second.patient.restricted = True
+    third = authenticate(PortalSession, "cached", "patient")
+    assert third is not None and not third.patient.restricted
+
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        Patient.objects.filter(pk=patient.pk).update(restricted=True)
+        assert cache.get(f"tokens:revoked:{hash_token('cached')}") is None
+    assert len(callbacks) == 1
+    assert cache.get(f"tokens:revoked:{hash_token('cached')}")
+    fourth = authenticate(PortalSession, "cached", "patient", "organization")
+    assert fourth is not None and fourth.patient.restricted
+
+    settings.SHARED_CACHE_ENABLED = False
+    token_cache.clear()
+    authenticate(PortalSession, "cached", "patient")
+    assert token_cache.stats().size == 0
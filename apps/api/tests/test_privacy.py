@@ -2,13 +2,19 @@ from __future__ import annotations
 
 import json
 import tempfile
+from datetime import timedelta
+from unittest import mock
 
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache import cache
+from django.db import connection
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test.utils import override_settings
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.utils import timezone
 
+from core.consent import EPISODES_READ, has_active_consent, patients_with_active_consent
 from core.models import ConsentRecord, Episode, EvidenceItem, Membership, Organization, Patient
 from core.rbac import Role
 from core.views.privacy import purge_retention
@@ -41,14 +47,95 @@ def test_consent_records_create_and_list(client) -> None:
     assert len(listing.json()["results"]) == 1
 
 
+@pytest.mark.django_db
+def test_consent_cache_respects_expiry_and_invalidation(
+    django_assert_num_queries, django_capture_on_commit_callbacks
+) -> None:
+    org = Organization.objects.create(name="CareOS", slug="careos-consent")
+    patient = Patient.objects.create(
+        organization=org, given_name="Ada", family_name="L", restricted=True
+    )
+    other = Patient.objects.create(
+        organization=org, given_name="Bob", family_name="K", restricted=True
+    )
+    consent = ConsentRecord.objects.create(
+        organization=org,
+        patient=patient,
+        subject_type="patient",
+        subject_id=str(patient.id),
+        consent_type="care",
+        scope=EPISODES_READ,
+        policy_version="v1",
+        expires_at=timezone.now() + timedelta(hours=1),
+    )
+
+    with django_assert_num_queries(1):
+        assert patients_with_active_consent(org.id, [patient.id, other.id], EPISODES_READ) == {
+            patient.id
+        }
+    with django_assert_num_queries(0):
+        assert has_active_consent(patient, EPISODES_READ)
+        assert not has_active_consent(other, EPISODES_READ)
+
+    later = timezone.now() + timedelta(hours=2)
+    with mock.patch("core.consent.timezone.now", return_value=later):
+        with django_assert_num_queries(0):
+            assert not has_active_consent(patient, EPISODES_READ)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        consent.revoked_at = timezone.now()
+        consent.granted = False
+        consent.save(update_fields=["granted", "revoked_at"])
+    assert not has_active_consent(patient, EPISODES_READ)
+
+
+@pytest.mark.django_db
+def test_episode_list_redacts_restricted_patients_without_consent(client) -> None:
+    user = get_user_model().objects.create_user(username="staff-consent", password="pass")
+    org = Organization.objects.create(name="CareOS", slug="careos-consent-list")
+    Membership.objects.create(user=user, organization=org, role=Role.STAFF)
+    open_patient = Patient.objects.create(organization=org, given_name="Open", family_name="P")
+    consented = Patient.objects.create(
+        organization=org, given_name="Yes", family_name="P", restricted=True
+    )
+    ConsentRecord.objects.create(
+        organization=org,
+        patient=consented,
+        subject_type="patient",
+        subject_id=str(consented.id),
+        consent_type="care",
+        scope=EPISODES_READ,
+        policy_version="v1",
+    )
+    for index in range(3):
+        hidden = Patient.objects.create(
+            organization=org, given_name=f"No{index}", family_name="P", restricted=True
+        )
+        Episode.objects.create(organization=org, title=f"Hidden {index}", patient=hidden)
+    Episode.objects.create(organization=org, title="Visible", patient=open_patient)
+    Episode.objects.create(organization=org, title="Consented", patient=consented)
+
+    client.force_login(user)
+    client.get("/episodes/")
+    cache.clear()
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get("/episodes/")
+    consent_queries = [
+        query for query in queries.captured_queries if "core_consentrecord" in query["sql"]
+    ]
+    assert len(consent_queries) == 1
+    titles = {row["title"] for row in response.json()["results"]}
+    assert titles == {"Visible", "Consented", ""}
+    redacted = [row for row in response.json()["results"] if row.get("consent_required")]
+    assert len(redacted) == 3
+
+
 @pytest.mark.django_db
 def test_dsar_export_and_download(client) -> None:
     user = get_user_model().objects.create_user(username="admin2", password="pass")
     org = Organization.objects.create(name="CareOS", slug="careos2")
     Membership.objects.create(user=user, organization=org, role=Role.ADMIN)
-    patient = Patient.objects.create(
-        organization=org, given_name="Ada", family_name="Lovelace"
-    )
+    patient = Patient.objects.create(organization=org, given_name="Ada", family_name="Lovelace")
     ConsentRecord.objects.create(
         organization=org,
         subject_type="patient",
@@ -133,3 +220,68 @@ def test_retention_purge_removes_evidence(client) -> None:
     )
     purge_retention(now=timezone.now().date())
     assert not EvidenceItem.objects.filter(id=evidence.id).exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("shared", [True, False])
+def test_consent_revocation_reaches_other_workers(
+    settings, monkeypatch, shared, django_capture_on_commit_callbacks
+) -> None:
+    settings.SHARED_CACHE_ENABLED = shared
+    org = Organization.objects.create(name="CareOS", slug="careos-consent-workers")
+    patient = Patient.objects.create(
+        organization=org, given_name="Ada", family_name="L", restricted=True
+    )
+    consent = ConsentRecord.objects.create(
+        organization=org,
+        patient=patient,
+        subject_type="patient",
+        subject_id=str(patient.id),
+        consent_type="care",
+        scope=EPISODES_READ,
+        policy_version="v1",
+    )
+    revoking_worker = LocMemCache("consent-shared" if shared else "consent-a", {})
+    reading_worker = LocMemCache("consent-shared" if shared else "consent-b", {})
+    for worker in (revoking_worker, reading_worker):
+        monkeypatch.setattr("core.consent.cache", worker)
+        assert has_active_consent(patient, EPISODES_READ)
+
+    monkeypatch.setattr("core.consent.cache", revoking_worker)
+    with django_capture_on_commit_callbacks(execute=True):
+        consent.revoked_at = timezone.now()
+        consent.granted = False
+        consent.save(update_fields=["granted", "revoked_at"])
+
+    monkeypatch.setattr("core.consent.cache", reading_worker)
+    assert not has_active_consent(patient, EPISODES_READ)
+
+
+@pytest.mark.django_db
+def test_consent_cache_is_invalidated_after_the_revocation_commits(
+    django_capture_on_commit_callbacks,
+) -> None:
+    org = Organization.objects.create(name="CareOS", slug="careos-consent-commit")
+    patient = Patient.objects.create(
+        organization=org, given_name="Ada", family_name="L", restricted=True
+    )
+    consent = ConsentRecord.objects.create(
+        organization=org,
+        patient=patient,
+        subject_type="patient",
+        subject_id=str(patient.id),
+        consent_type="care",
+        scope=EPISODES_READ,
+        policy_version="v1",
+    )
+    assert has_active_consent(patient, EPISODES_READ)
+
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        consent.revoked_at = timezone.now()
+        consent.granted = False
+        consent.save(update_fields=["granted", "revoked_at"])
+        assert cache.get(f"consent:{patient.id}:{EPISODES_READ}") is not None
+
+    assert len(callbacks) == 1
+    assert cache.get(f"consent:{patient.id}:{EPISODES_READ}") is None
+    assert not has_active_consent(patient, EPISODES_READ)
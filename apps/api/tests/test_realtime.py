@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient
+
+from core.models import AIReviewRequest, Conversation, Membership, Message, Organization
+from core.notifications import create_notification
+from core.rbac import Role
+from core.realtime import MemoryBroker, get_broker, stream_key
+
+
+def _drain(broker, key: str) -> list:
+    return async_to_sync(broker.read)(key, "0", 0)
+
+
+@pytest.mark.django_db
+def test_writes_publish_events_to_recipients_on_commit(
+    django_capture_on_commit_callbacks,
+) -> None:
+    sender = get_user_model().objects.create_user(username="sender", password="pass")
+    recipient = get_user_model().objects.create_user(username="recipient", password="pass")
+    org = Organization.objects.create(name="CareOS", slug="careos-realtime")
+    Membership.objects.create(user=sender, organization=org, role=Role.STAFF)
+    Membership.objects.create(user=recipient, organization=org, role=Role.STAFF)
+    conversation = Conversation.objects.create(organization=org)
+    conversation.participants.set([sender, recipient])
+    broker = get_broker()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        create_notification(
+            organization=org,
+            recipient=recipient,
+            kind="work_item.assigned",
+            title="Assigned",
+            body="",
+            url="/inbox",
+            dedupe_key="realtime",
+        )
+        message = Message.objects.create(
+            organization=org, conversation=conversation, sender=sender, body="Hi"
+        )
+        review = AIReviewRequest.objects.create(
+            organization=org, input_type="note", created_by=sender
+        )
+        review.status = "completed"
+        review.save(update_fields=["status"])
+        review.save(update_fields=["output"])
+
+    received = _drain(broker, stream_key(org.id, recipient.id))
+    assert [event.kind for event in received] == ["notification", "message"]
+    assert received[0].data["title"] == "Assigned"
+    assert received[1].data["id"] == message.id
+    sent = _drain(broker, stream_key(org.id, sender.id))
+    assert [(event.kind, event.data["status"]) for event in sent] == [
+        ("ai_review", "pending"),
+        ("ai_review", "completed"),
+    ]
+
+
+def test_memory_broker_reports_trimmed_history() -> None:
+    broker = MemoryBroker(buffer_size=2)
+    first = broker.publish("1:1", "notification", {"id": 1})
+    second = broker.publish("1:1", "notification", {"id": 2})
+    broker.publish("1:1", "notification", {"id": 3})
+
+    assert async_to_sync(broker.replayable)("1:1", second)
+    assert async_to_sync(broker.replayable)("1:1", first)
+    broker.publish("1:1", "notification", {"id": 4})
+    assert not async_to_sync(broker.replayable)("1:1", first)
+    assert not async_to_sync(broker.replayable)("1:1", "garbage")
+
+
+@pytest.mark.django_db
+def test_event_stream_resumes_heartbeats_and_caps_connections(settings) -> None:
+    settings.REALTIME_HEARTBEAT_SECONDS = 0.05
+    settings.REALTIME_MAX_CONNECTIONS_PER_USER = 1
+    user = get_user_model().objects.create_user(username="listener", password="pass")
+    org = Organization.objects.create(name="CareOS", slug="careos-stream")
+    Membership.objects.create(user=user, organization=org, role=Role.STAFF)
+    client = AsyncClient()
+    client.force_login(user)
+    broker = get_broker()
+    key = stream_key(org.id, user.id)
+    first = broker.publish(key, "notification", {"id": 1})
+    second = broker.publish(key, "notification", {"id": 2})
+
+    async def scenario() -> None:
+        response = await client.get("/events/stream/", headers={"Last-Event-ID": first})
+        assert response.status_code == 200
+        assert response["Content-Type"] == "text/event-stream"
+        chunks = aiter(response.streaming_content)
+        assert (await anext(chunks)).startswith(b"retry: ")
+        resumed = await anext(chunks)
+        assert resumed.startswith(f"id: {second}\nevent: notification\n".encode())
+
+        rejected = await client.get("/events/stream/")
+        assert rejected.status_code == 429
+
+        assert await anext(chunks) == b": heartbeat\n\n"
+        asyncio.get_running_loop().call_later(0.01, broker.publish, key, "message", {"id": 3})
+        assert b"event: message" in await anext(chunks)
+
+        reader = asyncio.ensure_future(anext(chunks))
+        await asyncio.sleep(0.01)
+        reader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await reader
+
+        reconnected = await client.get("/events/stream/", headers={"Last-Event-ID": "stale"})
+        assert reconnected.status_code == 200
+        chunks = aiter(reconnected.streaming_content)
+        await anext(chunks)
+        assert b"event: resync" in await anext(chunks)
+
+    async_to_sync(scenario)()
+
+
+@pytest.mark.django_db
+def test_event_stream_releases_slot_when_closed_before_streaming(settings) -> None:
+    settings.REALTIME_MAX_CONNECTIONS_PER_USER = 1
+    user = get_user_model().objects.create_user(username="dropper", password="pass")
+    org = Organization.objects.create(name="CareOS", slug="careos-drop")
+    Membership.objects.create(user=user, organization=org, role=Role.STAFF)
+    client = AsyncClient()
+    client.force_login(user)
+
+    async def scenario() -> None:
+        for _attempt in range(3):
+            response = await client.get("/events/stream/")
+            assert response.status_code == 200
+            response.close()
+            await asyncio.sleep(0)
+
+    async_to_sync(scenario)()
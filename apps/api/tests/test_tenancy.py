@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Membership, Organization
+from core.rbac import Role
+from core.tenancy import membership_cache
+
+
+@pytest.mark.django_db
+def test_membership_resolution_is_cached(client) -> None:
+    user = get_user_model().objects.create_user(username="staff", password="pass")
+    org = Organization.objects.create(name="CareOS", slug="careos")
+    Membership.objects.create(user=user, organization=org, role=Role.STAFF)
+
+    client.force_login(user)
+    assert client.get("/me/").status_code == 200
+    stats = membership_cache.stats()
+    assert stats.misses == 1
+    assert stats.hits == 0
+
+    response = client.get("/me/")
+    assert response.status_code == 200
+    assert response.json()["organization_id"] == org.id
+    stats = membership_cache.stats()
+    assert stats.hits == 1
+    assert stats.size == 1
+
+
+@pytest.mark.django_db
+def test_deactivated_member_is_locked_out_immediately(client) -> None:
+    admin = get_user_model().objects.create_user(username="admin", password="pass")
+    staff = get_user_model().objects.create_user(username="staff2", password="pass")
+    org = Organization.objects.create(name="CareOS", slug="careos2")
+    Membership.objects.create(user=admin, organization=org, role=Role.ADMIN)
+    target = Membership.objects.create(user=staff, organization=org, role=Role.STAFF)
+
+    client.force_login(staff)
+    assert client.get("/me/").status_code == 200
+    assert client.get("/me/").status_code == 200
+
+    client.force_login(admin)
+    deactivate = client.post(f"/orgs/members/{target.id}/deactivate/")
+    assert deactivate.status_code == 200
+
+    client.force_login(staff)
+    assert client.get("/me/").status_code == 403
+
+
+@pytest.mark.django_db
+def test_role_change_and_org_header_are_respected(client) -> None:
+    user = get_user_model().objects.create_user(username="multi", password="pass")
+    org_a = Organization.objects.create(name="CareOS A", slug="careos-a")
+    org_b = Organization.objects.create(name="CareOS B", slug="careos-b")
+    membership_a = Membership.objects.create(user=user, organization=org_a, role=Role.STAFF)
+    Membership.objects.create(user=user, organization=org_b, role=Role.ADMIN)
+
+    client.force_login(user)
+    assert client.get("/me/", HTTP_X_ORG_ID=str(org_a.id)).json()["role"] == Role.STAFF
+    assert client.get("/me/", HTTP_X_ORG_ID=str(org_b.id)).json()["role"] == Role.ADMIN
+
+    membership_a.role = Role.VIEWER
+    membership_a.save(update_fields=["role"])
+    assert client.get("/me/", HTTP_X_ORG_ID=str(org_a.id)).json()["role"] == Role.VIEWER
+
+    rename = client.patch(
+        "/orgs/current/",
+        data=json.dumps({"name": "CareOS Renamed"}),
+        content_type="application/json",
+        HTTP_X_ORG_ID=str(org_b.id),
+    )
+    assert rename.status_code == 200
+    current = client.get("/orgs/current/", HTTP_X_ORG_ID=str(org_b.id))
+    assert current.json()["name"] == "CareOS Renamed"
+
+
+@pytest.mark.django_db
+def test_membership_cache_requires_shared_cache(client, settings, monkeypatch) -> None:
+    user = get_user_model().objects.create_user(username="worker", password="pass")
+    org = Organization.objects.create(name="CareOS", slug="careos-workers")
+    membership = Membership.objects.create(user=user, organization=org, role=Role.STAFF)
+    client.force_login(user)
+
+    settings.SHARED_CACHE_ENABLED = False
+    assert client.get("/me/").status_code == 200
+    assert client.get("/me/").status_code == 200
+    assert membership_cache.stats().size == 0
+
+    settings.SHARED_CACHE_ENABLED = True
+    assert client.get("/me/").status_code == 200
+    cached = membership_cache.get(user.id, "")
+    assert cached is not None
+    with CaptureQueriesContext(connection) as queries:
+        assert cached.deactivated_at is None
+    assert not queries.captured_queries
+
+    settings.SHARED_CACHE_ENABLED = False
+    monkeypatch.setattr(membership_cache, "invalidate_user", lambda user_id: None)
+    membership.is_active = False
+    membership.save(update_fields=["is_active"])
+    assert membership_cache.stats().size == 1
+    assert client.get("/me/").status_code == 403
+
+
+@pytest.mark.django_db
+def test_queryset_update_invalidates_cached_membership(client) -> None:
+    user = get_user_model().objects.create_user(username="bulk", password="pass")
+    org = Organization.objects.create(name="CareOS", slug="careos-bulk")
+    Membership.objects.create(user=user, organization=org, role=Role.STAFF)
+
+    client.force_login(user)
+    assert client.get("/me/").json()["role"] == Role.STAFF
+    assert client.get("/me/").json()["role"] == Role.STAFF
+
+    Membership.objects.filter(organization=org).update(role=Role.VIEWER)
+    assert client.get("/me/").json()["role"] == Role.VIEWER
+
+    Membership.objects.filter(organization=org).update(is_active=False)
+    assert client.get("/me/").status_code == 403
+
+
+@pytest.mark.django_db
+def test_cache_hits_revalidate_generation_once_per_window(monkeypatch) -> None:
+    user = get_user_model().objects.create_user(username="hot", password="pass")
+    org = Organization.objects.create(name="CareOS", slug="careos-hot")
+    membership = Membership.objects.create(user=user, organization=org, role=Role.STAFF)
+    clock = [1000.0]
+    monkeypatch.setattr("core.tenancy.time.monotonic", lambda: clock[0])
+    monkeypatch.setattr(membership_cache, "generation_check_seconds", 1.0)
+    membership_cache.set(user.id, "", membership, membership_cache.generation(user.id))
+
+    lookups: list[int] = []
+    original = membership_cache.generation
+
+    def counting_generation(user_id: int) -> int:
+        lookups.append(user_id)
+        return original(user_id)
+
+    monkeypatch.setattr(membership_cache, "generation", counting_generation)
+    assert membership_cache.get(user.id, "") is not None
+    assert membership_cache.get(user.id, "") is not None
+    assert lookups == []
+
+    clock[0] += 2
+    assert membership_cache.get(user.id, "") is not None
+    assert membership_cache.get(user.id, "") is not None
+    assert lookups == [user.id]
+
+    membership_cache._bump_generation(user.id)
+    clock[0] += 2
+    assert membership_cache.get(user.id, "") is None